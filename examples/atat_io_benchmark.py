@@ -0,0 +1,98 @@
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from pymatgen.core import Lattice, Structure
+
+from blade.tools.blade_atat_io import BladeAtatIO
+
+# Compare the per-line ATAT str.out I/O against the vectorized BladeAtatIO on large supercells
+n_atoms = 500
+repeats = 50
+
+
+def read_loop(path):
+    lines = [line.rstrip() for line in Path(path).read_text().splitlines() if line.strip()]
+    coord_sys = np.array([[float(x) for x in lines[i].split()] for i in range(3)], dtype=float)
+    supercell = np.array([[float(x) for x in lines[i].split()] for i in range(3, 6)], dtype=float)
+    species, coords = [], []
+    for line in lines[6:]:
+        parts = line.split()
+        if len(parts) < BladeAtatIO.atom_fields:
+            continue
+        coords.append([float(parts[0]), float(parts[1]), float(parts[2])])
+        species.append(parts[3])
+    return coord_sys, supercell, np.array(coords, dtype=float), species
+
+
+def write_loop(path, coord_sys, supercell, coords, species):
+    with Path(path).open("w") as f:
+        for row in coord_sys:
+            f.write(" ".join(f"{x:.6f}" for x in row) + "\n")
+        for row in supercell:
+            f.write(" ".join(f"{x:.6f}" for x in row) + "\n")
+        for xyz, sp in zip(coords, species, strict=True):
+            f.write(" ".join(f"{x:.6f}" for x in xyz) + f" {sp}\n")
+
+
+def relax_loop(template_str, contcar, output_str):
+    coord_sys, supercell, template_coords, template_species = read_loop(template_str)
+    relaxed = Structure.from_file(contcar)
+    template_frac = template_coords @ np.linalg.inv(supercell)
+    unwrapped = np.array(
+        [
+            f - np.round(f - r)
+            for f, r in zip(np.array(relaxed.frac_coords), template_frac, strict=True)
+        ],
+        dtype=float,
+    )
+    write_loop(output_str, coord_sys, supercell, unwrapped @ supercell, template_species)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(*args)
+    return (time.perf_counter() - start) / repeats * 1e3
+
+
+rng = np.random.default_rng(0)
+n_side = int(np.ceil((n_atoms / 4) ** (1 / 3)))
+supercell = np.eye(3) * n_side
+coords = rng.random((n_atoms, 3)) * n_side
+species = list(rng.choice(["Al", "Ni", "Ti", "Zr"], size=n_atoms))
+species.sort()
+
+with tempfile.TemporaryDirectory() as tmp_name:
+    tmp = Path(tmp_name)
+    template = tmp / "str_template.out"
+    BladeAtatIO.write_str(template, np.eye(3) * 3.6, supercell, coords, species)
+
+    frac = coords / n_side + rng.normal(scale=0.01, size=coords.shape)
+    relaxed = Structure(Lattice(supercell * 3.6), species, frac % 1.0)
+    contcar = tmp / "CONTCAR"
+    relaxed.to(filename=str(contcar), fmt="poscar")
+
+    results = {
+        "read": (timed(read_loop, template), timed(BladeAtatIO.read_str, template)),
+        "write": (
+            timed(write_loop, tmp / "a.out", np.eye(3), supercell, coords, species),
+            timed(BladeAtatIO.write_str, tmp / "b.out", np.eye(3), supercell, coords, species),
+        ),
+        "relaxed str.out": (
+            timed(relax_loop, template, contcar, tmp / "c.out"),
+            timed(
+                BladeAtatIO.write_relaxed_str_out_from_template, template, contcar, tmp / "d.out"
+            ),
+        ),
+    }
+
+    assert (tmp / "a.out").read_text() == (tmp / "b.out").read_text()
+    assert (tmp / "c.out").read_text() == (tmp / "d.out").read_text()
+
+print(f"{n_atoms} atoms, mean of {repeats} runs")
+for name, (loop_ms, vec_ms) in results.items():
+    print(
+        f"{name:>16}: loop {loop_ms:8.3f} ms | vectorized {vec_ms:8.3f} ms | speedup {loop_ms / vec_ms:5.1f}x"
+    )
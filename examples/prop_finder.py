@@ -1,23 +1,20 @@
+import argparse
+import csv
 import itertools
-import os
-from pathlib import Path
+import re
 import time
-import pandas as pd
 from itertools import combinations
-import argparse
-import re
-import matplotlib.pyplot as plt
-
-from pycalphad import Database, binplot
-from pycalphad import variables as v
+from pathlib import Path
 
-import csv
-import itertools
-import csv
+import matplotlib.pyplot as plt
 import numpy as np
-from pycalphad import Database, equilibrium, variables as v
+import pandas as pd
 
 from blade.tools.blade_compositions import BladeCompositions
+from blade.tools.blade_manifest import BladeManifest
+from blade.analysis.blade_ranking import BLADERanking
+from blade.analysis.blade_result_writer import BLADEResultWriter
+from blade.analysis.blade_screening import BLADEScreening
 from blade.analysis.blade_visual import BLADEVisualizer
 from blade.analysis.blade_volume import BLADEVolume
 
@@ -50,6 +47,7 @@ re_element_range = [0, 0]
 allow_lower_order = True
 
 liquid = False
+use_manifest = False  # find POSCARs through the workspace manifest written by tdb_gen.py
 
 # Define phases
 phases = {}
@@ -126,12 +124,10 @@ for comp in composition_list:
     if not Path(file).exists():
         print(f"Directory not found, skipping: {file}")
         continue
-    os.chdir(file)
     elements = [el.upper() for el in comp]
     file_names = ["_".join(p) for p in itertools.permutations(elements)]
     for files in file_names:
-        if Path(f"{files}.tdb").is_file():
-            tdb = Database(f"{files}.tdb")
+        if (file / f"{files}.tdb").is_file():
             tdb_paths.append(f"{file}/{files}.tdb")
 
 
@@ -207,13 +203,14 @@ for comp in composition_list:
 
 
 vol = BLADEVolume()
+manifest = BladeManifest(path2 / "blade_manifest.sqlite") if use_manifest else None
 all_dfs = []
 for comp in composition_list:
     comp_dir = Path(path2) / "".join(comp)
     if not comp_dir.exists():
         print(f"Skipping (not found): {comp_dir}")
         continue
-    df = vol.scan_poscars(comp_dir)
+    df = vol.scan_poscars(comp_dir, manifest)
     if df.empty:
         print(f"No readable POSCARs found under: {comp_dir}")
         continue
@@ -229,243 +226,108 @@ out_csv = path2 / "poscar_phase_volumes.csv"
 df_all.to_csv(out_csv, index=False)
 print(f"Wrote: {out_csv}")
 
-from pathlib import Path
-import csv
-import itertools
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-
-from pycalphad import Database, equilibrium
-from pycalphad import variables as v
-
-
-def compute_row(tdb_path, T=2000.0, P=101325.0, x=None):
-    db = Database(str(tdb_path))
-    comps = sorted([str(e) for e in db.elements if str(e).upper() != "VA"])
-    phases = list(db.phases.keys())
-
-    row = {
-        "file": str(tdb_path),
-        "T_K": T,
-        "P_Pa": P,
-        "elements": ",".join(comps),
-    }
-
-    conds = {v.T: T, v.P: P}
-
-    if x is not None:
-        x_full = {c: float(x.get(c, 0.0)) for c in comps}
-        total = sum(x_full.values())
-        if not np.isclose(total, 1.0, atol=1e-8):
-            raise ValueError(f"Composition must sum to 1. Got {total} for {x_full}")
-
-        for c in comps:
-            row[f"x_{c}"] = x_full[c]
-
-        # set N-1 independent composition variables
-        for c in comps[:-1]:
-            conds[v.X(c)] = x_full[c]
-
-    # ask for NP too so eq phases can be extracted
-    eq = equilibrium(db, comps, phases, conds, output=["GM", "MU", "NP"])
-
-    try:
-        row["G_system"] = float(np.nanmin(eq["GM"].values))
-    except Exception:
-        row["G_system"] = np.nan
-
-    if "MU" in eq:
-        for c in comps:
-            try:
-                row[f"mu_{c}"] = float(np.nanmin(eq["MU"].sel(component=c).values))
-            except Exception:
-                row[f"mu_{c}"] = np.nan
-    else:
-        for c in comps:
-            row[f"mu_{c}"] = np.nan
-
-    try:
-        phase_axis = eq.coords["Phase"].values
-        npv = np.asarray(eq["NP"].values)
-
-        present = []
-        fracs = []
-        for i, ph in enumerate(phase_axis):
-            val = float(np.nanmax(npv[..., i]))
-            if np.isfinite(val) and val > 1e-8:
-                present.append(str(ph))
-                fracs.append(val)
-
-        row["eq_phases"] = ",".join(present)
-        row["eq_phase_fractions"] = ",".join(f"{f:.6g}" for f in fracs)
-    except Exception as e:
-        row["eq_phases"] = ""
-        row["eq_phase_fractions"] = ""
-        row["phase_error"] = str(e)
-
-    return row
-
-
-def write_csv(rows, out_csv):
-    outp = Path(out_csv)
-    outp.parent.mkdir(parents=True, exist_ok=True)
-
-    if not rows:
-        raise RuntimeError(f"No rows were generated for {outp}")
-
-    cols = sorted({k for r in rows for k in r.keys()})
-    if not cols:
-        raise RuntimeError(f"No columns found for {outp}")
-
-    with outp.open("w", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=cols)
-        w.writeheader()
-        w.writerows(rows)
-
-
-def composition_grid(elements, n_div=20):
-    n = len(elements)
-    for counts in itertools.product(range(n_div + 1), repeat=n):
-        if sum(counts) != n_div:
-            continue
-        yield {el: c / n_div for el, c in zip(elements, counts)}
-
-
-def metal_grid_with_fixed_boron(comps, boron_fraction=2/3, n_div=20):
-    boron_names = [c for c in comps if c.upper() == "B"]
-    if len(boron_names) != 1:
-        raise ValueError(f"Expected exactly one boron component in {comps}, found {boron_names}")
-
-    boron_name = boron_names[0]
-    metals = [c for c in comps if c.upper() != "B"]
-
-    if len(metals) == 0:
-        raise ValueError("No non-B elements found after fixing boron.")
-
-    metal_total = 1.0 - float(boron_fraction)
-    if metal_total < 0:
-        raise ValueError("boron_fraction must be <= 1")
-
-    for counts in itertools.product(range(n_div + 1), repeat=len(metals)):
-        if sum(counts) != n_div:
-            continue
-
-        x = {boron_name: float(boron_fraction)}
-        for m, c in zip(metals, counts):
-            x[m] = metal_total * c / n_div
-
-        yield x
-
-
 # -----------------------------
 # use a NEW variable name here
 # -----------------------------
-tdb_summary_csv = path2 / "tdb_summary.csv"
+tdb_summary_path = path2 / "tdb_summary.parquet"
 
 T_list = [1000.0, 1500.0, 2000.0, 2500.0, 3000.0]
 boron_fraction = 2.0 / 3.0
 n_div = 20
-
-rows = []
+screen_workers = None  # worker processes for equilibrium screening, None uses all cores
+screen_memory_budget = 2 * 1024**3  # bytes per equilibrium call in each worker
+adaptive_grid = False  # refine a coarse grid near phase boundaries and minima instead of the uniform n_div grid
+adaptive_n_div = (10, 100)  # starting and finest grid resolution
+adaptive_budget = 2000  # (T, composition) evaluations per TDB
+top_k = 10  # most stable compositions kept per temperature and per system while screening
 
 if not tdb_paths:
     raise RuntimeError("tdb_paths is empty. No TDB files were found to evaluate.")
 
-for p in tdb_paths:
-    db = Database(str(p))
-    comps = sorted([str(e) for e in db.elements if str(e).upper() != "VA"])
-
-    has_boron = any(c.upper() == "B" for c in comps)
-
-    # IMPORTANT: make this a list, not a generator
-    if has_boron:
-        x_list = list(
-            metal_grid_with_fixed_boron(
-                comps,
-                boron_fraction=boron_fraction,
-                n_div=n_div,
-            )
-        )
-    else:
-        x_list = list(
-            composition_grid(
-                comps,
-                n_div=n_div,
-            )
-        )
-
-    if not x_list:
-        print(f"No compositions generated for {p}")
-        continue
+# every component of every TDB gets an x_ and mu_ column in the fixed result schema
+all_components = sorted({c for p in tdb_paths for c in BLADEScreening.components(p)})
+ranking = BLADERanking(k=top_k)
 
-    for T in T_list:
-        for x in x_list:
+with BLADEResultWriter(tdb_summary_path, all_components) as writer:
+    if adaptive_grid:
+        # coarse grid refined near phase boundaries and GM minima, capped at adaptive_budget evaluations per TDB
+        for p in tdb_paths:
             try:
-                rows.append(compute_row(p, T=T, P=101325.0, x=x))
+                grid = BLADEScreening.refine_grid(
+                    p,
+                    T_list,
+                    n_div=adaptive_n_div[0],
+                    n_div_max=adaptive_n_div[1],
+                    budget=adaptive_budget,
+                    boron_fraction=boron_fraction,
+                    memory_budget=screen_memory_budget,
+                )
+                writer.write_grid(grid)
+                ranking.update_grid(grid)
+                print(f"{p}: {grid.attrs['evaluations']} evaluations up to n_div={grid.attrs['resolution']}")
             except Exception as e:
-                fail_row = {
-                    "file": str(p),
-                    "T_K": T,
-                    "P_Pa": 101325.0,
-                    "error": str(e),
-                }
-                for c in comps:
-                    fail_row[f"x_{c}"] = x.get(c, np.nan)
-                rows.append(fail_row)
-
-write_csv(rows, tdb_summary_csv)
-print(f"Wrote: {tdb_summary_csv}")
+                writer.write_rows(BLADEScreening.fail_row(p, T, 101325.0, {}, e) for T in T_list)
+    else:
+        # one task per (TDB, temperature) in worker processes, written in tdb_paths / T_list order as they finish
+        for rows in BLADEScreening.iter_screen_parallel(
+            tdb_paths,
+            T_list,
+            n_div=n_div,
+            boron_fraction=boron_fraction,
+            P=101325.0,
+            max_workers=screen_workers,
+            memory_budget=screen_memory_budget,
+        ):
+            writer.write_rows(rows)
+            ranking.update_rows(rows)
+
+if writer.rows_written == 0:
+    raise RuntimeError(f"No rows were generated for {tdb_summary_path}")
+
+print(f"Wrote: {tdb_summary_path} ({writer.rows_written} rows)")
+print(f"TDB cache: {BLADEScreening.cache_info()}")
 
 # ----------------------------
-# read and rank most stable rows
+# most stable rows, ranked while screening
 # ----------------------------
-df = pd.read_csv(tdb_summary_csv)
+temps = ranking.groups
+xcols = [f"x_{c}" for c in all_components]
 
-if df.empty:
-    raise RuntimeError(f"{tdb_summary_csv} was created but contains no data.")
-
-df = df.dropna(subset=["G_system"])
-
-if df.empty:
-    raise RuntimeError("No valid Gibbs energy rows were found after dropping NaNs.")
-
-temps = sorted(df["T_K"].unique())
-xcols = [c for c in df.columns if c.startswith("x_")]
+if not temps:
+    raise RuntimeError("No valid Gibbs energy rows were found in the screening results.")
 
 for T in temps:
     print("\n==============================")
-    print(f"TOP 10 MOST STABLE @ {T} K")
+    print(f"TOP {top_k} MOST STABLE @ {T} K")
     print("==============================")
 
-    sub = df[df["T_K"] == T].sort_values("G_system").head(10)
-
-    for _, row in sub.iterrows():
+    for row in ranking.top(T):
         comps_present = []
         for c in xcols:
-            val = row[c]
-            if not pd.isna(val) and abs(val) > 1e-12:
+            val = row.get(c)
+            if val is not None and not pd.isna(val) and abs(val) > 1e-12:
                 comps_present.append(f"{c}={val:.3f}")
 
         comp_string = ", ".join(comps_present)
         print(f"{comp_string}   |   G = {row['G_system']:.2f}")
 
+    # z-scores within each system, so that systems with different reference energies compare
+    print(f"--- normalized across {len(ranking.systems(T))} systems ---")
+    for row in ranking.top_normalized(T):
+        print(f"{Path(row['file']).name}   |   G = {row['G_system']:.2f}   |   z = {row['z_G_system']:.2f}")
+
 # ----------------------------
 # plot best compositions
 # ----------------------------
 data = {}
-temps = sorted(df["T_K"].unique())
 
-for T in temps:
-    sub = df[df["T_K"] == T].sort_values("G_system").head(10)
-
-    xcols = [c for c in df.columns if c.startswith("x_")]
-    if len(xcols) == 2:
-        comp_col = sorted(xcols)[1]
-    else:
-        comp_col = xcols[0]
+if len(xcols) == 2:
+    comp_col = sorted(xcols)[1]
+else:
+    comp_col = xcols[0]
 
-    data[T] = [(row[comp_col], row["G_system"]) for _, row in sub.iterrows()]
+for T in temps:
+    data[T] = [(row.get(comp_col), row["G_system"]) for row in ranking.top(T) if row.get(comp_col) is not None]
 
 plt.figure(figsize=(8, 6))
 markers = ['o', 's', '^', 'D', 'P']
@@ -0,0 +1,67 @@
+import argparse
+import time
+
+import numpy as np
+
+from blade.analysis.blade_screening import BLADEScreening
+
+# Compare per-point compute_row calls against one whole-grid evaluate_grid call per TDB
+parser = argparse.ArgumentParser(description="Benchmark whole-grid equilibrium screening")
+parser.add_argument("tdbs", nargs="+", help="TDB files to screen")
+parser.add_argument("--n-div", type=int, default=20)
+parser.add_argument("--boron-fraction", type=float, default=2.0 / 3.0)
+parser.add_argument(
+    "--sweep", action="store_true", help="also compare cold and warm-started temperature sweeps"
+)
+args = parser.parse_args()
+
+T_list = [1000.0, 1500.0, 2000.0, 2500.0, 3000.0]
+
+for p in args.tdbs:
+    comps = BLADEScreening.components(p)
+    if any(c.upper() == "B" for c in comps):
+        x_list = list(
+            BLADEScreening.metal_grid_with_fixed_boron(comps, args.boron_fraction, args.n_div)
+        )
+    else:
+        x_list = list(BLADEScreening.composition_grid(comps, args.n_div))
+
+    # warm the database and model cache so both paths compare equation solving only
+    BLADEScreening.compute_row(p, T=T_list[0], x=x_list[0])
+
+    start = time.perf_counter()
+    loop_rows = []
+    for T in T_list:
+        for x in x_list:
+            try:
+                loop_rows.append(BLADEScreening.compute_row(p, T=T, P=101325.0, x=x))
+            except Exception:
+                loop_rows.append({"G_system": np.nan})
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    grid = BLADEScreening.evaluate_grid(p, T_list, x_list, P=101325.0)
+    grid_rows = BLADEScreening.grid_rows(grid)
+    grid_time = time.perf_counter() - start
+
+    a = np.array([row["G_system"] for row in loop_rows], dtype=float)
+    b = np.array([row["G_system"] for row in grid_rows], dtype=float)
+    diff = np.nanmax(np.abs(a - b)) if np.isfinite(a - b).any() else np.nan
+
+    print(
+        f"{p}: {len(T_list)} T x {len(x_list)} compositions | loop {loop_time:.2f} s | "
+        f"grid {grid_time:.2f} s | speedup {loop_time / grid_time:.1f}x | max |dGM| {diff:.3g} J/mol"
+    )
+
+    if args.sweep:
+        # solver calls per temperature with every solve started from scratch vs from the previous T
+        report = BLADEScreening.compare_warm_start(p, T_list, x_list, P=101325.0)
+        for T, cold, warm in zip(
+            report["T_K"], report["cold_solves"], report["warm_solves"], strict=True
+        ):
+            print(f"  T = {T:.0f} K | cold {cold} solver calls | warm {warm} solver calls")
+        print(
+            f"  sweep total | cold {sum(report['cold_solves'])} solver calls, {report['cold_seconds']:.2f} s | "
+            f"warm {sum(report['warm_solves'])} solver calls, {report['warm_seconds']:.2f} s | "
+            f"max |dGM| {report['max_dGM']:.3g} J/mol"
+        )
@@ -1,3 +1,5 @@
+# The thread limits have to be set before torch and numpy are imported
+# ruff: noqa: E402
 import os
 os.environ["OMP_NUM_THREADS"] = "8"
 os.environ["MKL_NUM_THREADS"] = "8"
@@ -18,6 +20,7 @@ from pycalphad import variables as v
 from blade.tools.blade_compositions import BladeCompositions
 from blade.tools.blade_sqs import BladeSQS
 from blade.tools.blade_tdb_gen import BladeTDBGen
+from blade.analysis.blade_miscibility import BLADEMiscibility
 from blade.analysis.blade_visual import BLADEVisualizer
 
 
@@ -29,7 +32,14 @@ level = 5
 sqs_iter = 1000000
 sqs = True
 fit_tdb = True
+refit_only = False
+adaptive_levels = False  # add SQS levels one at a time until the fit converges
+joint_fit = False  # refit all binaries of a lattice in one solve and write a merged TDB
 skip_existing_tdb = False
+use_manifest = False
+screen = False
+screen_threshold = 0.0  # eV/atom, systems with a lower SQS mixing energy are fit
+plot_all_diagrams = False  # draw every binary phase diagram, not only systems with a miscibility gap
 
 # Define elements and composition settings
 transition_metals = ["Zr", "Hf", "Ta", "Cr", "Ti", "V", "Nb", "Mo", "W"]
@@ -77,8 +87,32 @@ tdb_params = {
     "phonon": False,
     "open_calphad": False,
     "terms": None,
+    "warm_start": True,
+    # share relaxed pure endmembers between systems through <path2>/endmembers (off by default)
+    "endmember_store": True,
+    # cheap pre-relaxation tiers run before the production calculator, e.g.
+    # [{"name": "fast", "model": "GRACE-1L-OAM", "fmax": 5e-2, "steps": 300}]
+    "relax_tiers": [],
+    # coarse stages with the production calculator before the final relax at fmax, e.g.
+    # [{"fmax": 1e-2, "cell_filter": "cell"}, {"fmax": 1e-2, "cell_filter": "full"}]
+    "relax_schedule": [],
+    # retry failed relaxations (True for the default escalation ladder) and fit without
+    # folders that still fail; retry_async runs each retry in a subprocess next to the main
+    # loop, which loads a second model on the same device
+    "retry": True,
+    "retry_async": False,
+    "partial_fit": False,
+    # "sqs2tdb" runs the ATAT fit in a subprocess, "native" fits in-process with BladeRKFit
+    # (experimental, not yet validated against sqs2tdb on real systems)
+    "fitter": "sqs2tdb",
 }
 
+# Fit-only variants, used when refit_only is True (energies must already be computed)
+tdb_param_variants = [
+    {"name": "bv1e-3", "bv": 1e-3},
+    {"name": "bv1e-2", "bv": 1e-2},
+]
+
 phases = {}
 
 phases["HEDB1"] = {
@@ -204,14 +238,43 @@ if fit_tdb:
         composition_list=composition_list,
         level=level,
         skip_existing=skip_existing_tdb,
+        use_manifest=use_manifest,
     )
 
-    tdb_gen.run_all_compositions(
-        sqsgen_levels=sqsgen_levels,
-        phase_dicts=phase_list,
-        default_supercell_size=(2, 2, 2),
-        params=tdb_params
-    )
+    if screen:
+        ranking = tdb_gen.screen_compositions(
+            sqsgen_levels=sqsgen_levels,
+            phase_dicts=phase_list,
+            params=tdb_params,
+        )
+        print(ranking)
+        tdb_gen.composition_list = tdb_gen.promoted_compositions(ranking, screen_threshold)
+        print("Promoted compositions: ", tdb_gen.composition_list)
+
+    if refit_only:
+        tdb_gen.refit_all_compositions(
+            sqsgen_levels=sqsgen_levels,
+            phase_dicts=phase_list,
+            params=tdb_params,
+            param_variants=tdb_param_variants,
+        )
+    elif joint_fit:
+        tdb_gen.fit_all_jointly(phase_dicts=phase_list, params=tdb_params)
+    elif adaptive_levels:
+        for comp in tdb_gen.composition_list:
+            tdb_gen.run_adaptive_workflow(
+                sqsgen_levels=sqsgen_levels,
+                elements=list(comp),
+                phase_dicts=phase_list,
+                params=tdb_params,
+            )
+    else:
+        tdb_gen.run_all_compositions(
+            sqsgen_levels=sqsgen_levels,
+            phase_dicts=phase_list,
+            default_supercell_size=(2, 2, 2),
+            params=tdb_params
+        )
 
 PHASE_DIAGRAM_SYSTEM_SIZE = 3
 
@@ -241,7 +304,8 @@ def plot(tdb, elements, phases, file, comp):
     plt.savefig(f"{file}_Phase_Diagram.png", dpi=300)
 
 
-# Generate TDB files and plot phase diagrams for every composition
+# Plot phase diagrams only for systems whose lattices show a miscibility gap
+detector = BLADEMiscibility(t_min=1, t_max=6000)
 for comp in composition_list:
     file = Path(path2) / "".join(comp)
     os.chdir(file)
@@ -250,6 +314,14 @@ for comp in composition_list:
     for files in file_names:
         if Path(f"{files}.tdb").is_file():
             tdb = Database(f"{files}.tdb")
+            if not plot_all_diagrams and len(elements) < PHASE_DIAGRAM_SYSTEM_SIZE:
+                checked = [ph for ph in list(phases) + (["LIQUID"] if liquid else []) if ph in tdb.phases]
+                gaps = [r for r in detector.detect(f"{files}.tdb", checked) if r["gap"]]
+                for r in gaps:
+                    print(f"{files} {r['phase']}: miscibility gap, Tc = {r['Tc']:.0f} K at x_{r['species'][0]} = {r['x_c']:.2f}")
+                if not gaps:
+                    print(f"{files}: no miscibility gap, skipping phase diagram")
+                    continue
             plot(tdb, elements, phases, files, comp)
 
 # Combine generated phase diagrams into one image
@@ -0,0 +1,195 @@
+"""
+This module defines the `BLADEMiscibility` class, a fast miscibility-gap and spinodal detector for binaries.
+
+Instead of mapping a full phase diagram, the Gibbs energy of each lattice is evaluated on a composition line
+for a whole temperature grid with one `calculate` call. A phase has a spinodal wherever GM(x) is concave;
+the highest temperature with a concave region is bracketed on the grid and refined by bisection, giving the
+critical temperature Tc and the composition of the top of the gap. Databases and models come from the
+`BLADEScreening` cache.
+"""
+
+import numpy as np
+from pycalphad import calculate
+from pycalphad import variables as v
+
+from blade.analysis.blade_screening import BLADEScreening
+
+
+class BLADEMiscibility:
+    """
+    Spinodal detection along the mixing sublattice of every phase of a binary TDB.
+
+    Args:
+        n_x (int): Composition points on the mixing sublattice, end members excluded.
+        n_t (int): Temperatures of the initial vectorized scan.
+        t_min (float): Lowest temperature checked for a gap in K.
+        t_max (float): Highest temperature checked for a gap in K.
+        tol (float): Bisection tolerance of Tc in K.
+        P (float): Pressure in Pa.
+    """
+
+    # species on the mixing sublattice of a binary
+    n_species = 2
+
+    # P follows pycalphad's state variable and the scan settings are all independent options
+    def __init__(self, n_x=199, n_t=60, t_min=1.0, t_max=6000.0, tol=1.0, P=101325.0):  # noqa: N803, PLR0913
+        self.n_x = int(n_x)
+        self.n_t = int(n_t)
+        self.t_min = float(t_min)
+        self.t_max = float(t_max)
+        self.tol = float(tol)
+        self.P = float(P)
+
+    @staticmethod
+    def composition_line(model, y):
+        """
+        Site fractions and overall mole fractions of a phase along its one binary mixing sublattice.
+
+        Every other sublattice must hold a single constituent. Returns None for phases that mix on
+        several sublattices, contain vacancies or do not mix at all.
+
+        Returns:
+            tuple | None: (points (len(y), n_dof), x of the first mixing species (len(y),), species pair).
+        """
+        constituents = [sorted(str(s) for s in sublattice) for sublattice in model.constituents]
+        mixing = [i for i, species in enumerate(constituents) if len(species) > 1]
+        if len(mixing) != 1 or len(constituents[mixing[0]]) != BLADEMiscibility.n_species:
+            return None
+        if any(species.upper() == "VA" for sublattice in constituents for species in sublattice):
+            return None
+
+        m = mixing[0]
+        pair = constituents[m]
+        ratios = [float(r) for r in model.site_ratios]
+
+        points = np.empty((len(y), len(model.site_fractions)))
+        for k, site_fraction in enumerate(model.site_fractions):
+            sublattice, species = site_fraction.sublattice_index, str(site_fraction.species.name)
+            if sublattice != m:
+                points[:, k] = 1.0
+            elif species == pair[0]:
+                points[:, k] = y
+            else:
+                points[:, k] = 1.0 - y
+
+        # overall fraction of pair[0], counting the spectator sublattices that hold the same element
+        atoms = sum(ratios)
+        fixed = sum(r for i, r in enumerate(ratios) if i != m and constituents[i][0] == pair[0])
+        x = (ratios[m] * y + fixed) / atoms
+        return points, x, pair
+
+    def curvature(self, tdb_path, phase, temperatures):
+        """
+        Second derivative of GM along the mixing sublattice, for every temperature at once.
+
+        Returns:
+            tuple | None: (d2G (n_T, n_x - 2), y (n_x,), x (n_x,), species pair), or None if the phase is not a
+                binary single-sublattice solution.
+        """
+        # components leave out VA, so phases with vacancies have no model to build
+        constituents = BLADEScreening.database(tdb_path).phases[phase].constituents
+        if any(str(s.name).upper() == "VA" for sublattice in constituents for s in sublattice):
+            return None
+
+        comps = BLADEScreening.components(tdb_path)
+        models = BLADEScreening.models(tdb_path, comps, [phase])
+
+        y = np.linspace(0.0, 1.0, self.n_x + 2)[1:-1]
+        line = BLADEMiscibility.composition_line(models[phase], y)
+        if line is None:
+            return None
+        points, x, pair = line
+
+        temperatures = np.atleast_1d(np.asarray(temperatures, dtype=float))
+        result = calculate(
+            BLADEScreening.database(tdb_path),
+            comps,
+            phase,
+            T=temperatures,
+            P=self.P,
+            N=1,
+            points={phase: points},
+            model=models,
+            phase_records=BLADEScreening.phase_records(
+                tdb_path, comps, [phase], {v.T: 0.0, v.P: 0.0}
+            ),
+            output="GM",
+        )
+        gm = np.asarray(result["GM"].values).reshape(len(temperatures), len(y))
+
+        h = y[1] - y[0]
+        d2 = (gm[:, :-2] - 2.0 * gm[:, 1:-1] + gm[:, 2:]) / h**2
+        return d2, y, x, pair
+
+    def concave(self, tdb_path, phase, temperatures):
+        d2 = self.curvature(tdb_path, phase, temperatures)[0]
+        return (d2 < 0).any(axis=1)
+
+    def detect_phase(self, tdb_path, phase):
+        """
+        Look for a miscibility gap in one phase.
+
+        Returns:
+            dict | None: phase, species pair, gap (bool), Tc in K (t_max if the gap is still open there)
+                and x_c, the fraction of the first species at the top of the gap; None for unsupported phases.
+        """
+        temperatures = np.linspace(self.t_min, self.t_max, self.n_t)
+        scan = self.curvature(tdb_path, phase, temperatures)
+        if scan is None:
+            return None
+        d2, _, x, pair = scan
+
+        concave = (d2 < 0).any(axis=1)
+        result = {
+            "phase": phase,
+            "species": pair,
+            "gap": bool(concave.any()),
+            "Tc": np.nan,
+            "x_c": np.nan,
+        }
+        if not concave.any():
+            return result
+
+        top = int(np.flatnonzero(concave)[-1])
+        if top == len(temperatures) - 1:
+            lo, hi = temperatures[top], temperatures[top]
+        else:
+            # bisect between the highest concave and the next convex temperature of the scan
+            lo, hi = temperatures[top], temperatures[top + 1]
+            while hi - lo > self.tol:
+                mid = 0.5 * (lo + hi)
+                if self.concave(tdb_path, phase, [mid])[0]:
+                    lo = mid
+                else:
+                    hi = mid
+
+        # the most concave composition just below Tc is the top of the gap
+        d2_c = self.curvature(tdb_path, phase, [lo])[0][0]
+        result["Tc"] = float(0.5 * (lo + hi))
+        result["x_c"] = float(x[1:-1][np.argmin(d2_c)])
+        return result
+
+    def detect(self, tdb_path, phases=None):
+        """
+        Look for miscibility gaps in the phases of a TDB, all phases by default.
+
+        Returns:
+            list[dict]: `detect_phase` results of the supported phases.
+        """
+        phases = (
+            phases
+            if phases is not None
+            else sorted(BLADEScreening.database(tdb_path).phases.keys())
+        )
+        results = []
+        for phase in phases:
+            result = self.detect_phase(tdb_path, phase)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def interesting(self, tdb_path, phases=None):
+        """
+        Whether any phase of a TDB has a miscibility gap, i.e. whether its full phase diagram is worth drawing.
+        """
+        return any(result["gap"] for result in self.detect(tdb_path, phases))
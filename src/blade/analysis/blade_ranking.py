@@ -0,0 +1,192 @@
+"""
+This module defines the `BLADERanking` class, a streaming top-k ranking of screening results.
+
+Rows are ranked as they arrive from the screening engine, so the most stable compositions per temperature
+and per system are available at any time during a sweep without a second pass over the results. Each
+(temperature, system) pair keeps a bounded heap of its `k` lowest energies and running Welford statistics
+of all its energies. Because a per-system z-score is monotone within the system, the `k` best z-scores
+across systems are always among the per-system heaps, which makes the normalized ranking streamable too.
+"""
+
+import heapq
+from itertools import count
+
+import numpy as np
+
+
+class BLADERanking:
+    """
+    Bounded-heap ranking of screening rows by ascending `key`.
+
+    Args:
+        k (int): Number of rows kept per temperature and per (temperature, system).
+        key (str): Column to rank by, lowest first.
+        group (str): Column the rankings are split by.
+        system (str): Column identifying a system.
+    """
+
+    # phases with a smaller molar amount are left out of eq_phases, as in `BLADEScreening.np_tol`
+    np_tol = 1e-8
+
+    def __init__(self, k=10, key="G_system", group="T_K", system="file"):
+        self.k = int(k)
+        self.key = key
+        self.group = group
+        self.system = system
+
+        self._top = {}
+        self._system_top = {}
+        self._stats = {}
+        self._order = count()
+
+    def __len__(self):
+        return sum(stats[0] for stats in self._stats.values())
+
+    def _push(self, heap, value, row):
+        # max-heap on the key through negation; the counter breaks ties without comparing rows
+        item = (-value, next(self._order), row)
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+        elif -heap[0][0] > value:
+            heapq.heapreplace(heap, item)
+
+    def _merge_stats(self, cell, n, mean, m2):
+        """
+        Combine running (count, mean, M2) of `cell` with a batch using Chan's parallel update.
+        """
+        n0, mean0, m20 = self._stats.get(cell, (0, 0.0, 0.0))
+        total = n0 + n
+        delta = mean - mean0
+        self._stats[cell] = (total, mean0 + delta * n / total, m20 + m2 + delta**2 * n0 * n / total)
+
+    def update(self, row):
+        """
+        Add one row; rows without a finite `key` are ignored.
+        """
+        try:
+            value = float(row.get(self.key))
+        except (TypeError, ValueError):
+            return
+        if not np.isfinite(value):
+            return
+
+        group = row.get(self.group)
+        cell = (group, row.get(self.system))
+
+        # Welford update of the running mean and sum of squared deviations
+        n, mean, m2 = self._stats.get(cell, (0, 0.0, 0.0))
+        n += 1
+        delta = value - mean
+        mean += delta / n
+        self._stats[cell] = (n, mean, m2 + delta * (value - mean))
+
+        self._push(self._top.setdefault(group, []), value, row)
+        self._push(self._system_top.setdefault(cell, []), value, row)
+
+    def update_rows(self, rows):
+        for row in rows:
+            self.update(row)
+
+    def update_batch(self, batch):
+        """
+        Add the rows of a pyarrow RecordBatch or Table, e.g. from `BLADEResultWriter.iter_batches`.
+        """
+        self.update_rows(batch.to_pylist())
+
+    def update_grid(self, grid):
+        """
+        Add an `evaluate_grid` Dataset, building row dicts only for the candidates that can enter a heap.
+        """
+        comps = [str(c) for c in grid.coords["component"].values]
+        system = grid.attrs["file"]
+        x = grid["X"].values
+        gm = grid["GM"].values
+        npv = grid["NP"].values
+        labels = grid["Phase"].values
+
+        for t, t_value in enumerate(grid.coords["T"].values):
+            temperature = float(t_value)
+            finite = np.flatnonzero(np.isfinite(gm[t]))
+            if not len(finite):
+                continue
+
+            values = gm[t, finite]
+            self._merge_stats(
+                (temperature, system),
+                len(values),
+                float(values.mean()),
+                float(((values - values.mean()) ** 2).sum()),
+            )
+
+            # only the k lowest energies of this grid can enter either heap
+            best = finite[np.argsort(values, kind="stable")[: self.k]]
+            for p in best:
+                present = (labels[t, p] != "") & np.isfinite(npv[t, p]) & (npv[t, p] > self.np_tol)
+                row = {
+                    self.system: system,
+                    self.group: temperature,
+                    "P_Pa": grid.attrs["P_Pa"],
+                    "elements": ",".join(comps),
+                    **{f"x_{c}": float(x[p, i]) for i, c in enumerate(comps)},
+                    self.key: float(gm[t, p]),
+                    "eq_phases": ",".join(str(ph) for ph in labels[t, p][present]),
+                    "eq_phase_fractions": ",".join(f"{f:.6g}" for f in npv[t, p][present]),
+                }
+                self._push(self._top.setdefault(temperature, []), row[self.key], row)
+                self._push(
+                    self._system_top.setdefault((temperature, system), []), row[self.key], row
+                )
+
+    @property
+    def groups(self):
+        return sorted(self._top)
+
+    def systems(self, group):
+        return sorted(str(s) for g, s in self._system_top if g == group)
+
+    def top(self, group):
+        """
+        The `k` rows with the lowest `key` at `group`, lowest first.
+        """
+        return [
+            row
+            for _, _, row in sorted(self._top.get(group, []), key=lambda item: (-item[0], item[1]))
+        ]
+
+    def top_per_system(self, group):
+        """
+        The `k` lowest rows of every system at `group`, as {system: rows}.
+        """
+        return {
+            s: [row for _, _, row in sorted(heap, key=lambda item: (-item[0], item[1]))]
+            for (g, s), heap in self._system_top.items()
+            if g == group
+        }
+
+    def stats(self, group, system):
+        """
+        Running (count, mean, standard deviation) of `key` for one system at `group`.
+        """
+        n, mean, m2 = self._stats.get((group, system), (0, np.nan, np.nan))
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        return n, mean, std
+
+    def top_normalized(self, group):
+        """
+        The `k` rows at `group` with the lowest z-score of `key` within their own system.
+
+        Each row gets a "z_<key>" entry computed with the statistics of everything seen so far. Systems
+        with fewer than two rows or no spread have no z-score and are left out.
+        """
+        scored = []
+        for (g, s), heap in self._system_top.items():
+            if g != group:
+                continue
+            _, mean, std = self.stats(g, s)
+            if not np.isfinite(std) or std <= 0:
+                continue
+            for value, order, row in heap:
+                scored.append(((-value - mean) / std, order, row))
+
+        best = heapq.nsmallest(self.k, scored, key=lambda item: (item[0], item[1]))
+        return [{**row, f"z_{self.key}": float(z)} for z, _, row in best]
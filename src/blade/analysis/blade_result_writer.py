@@ -0,0 +1,243 @@
+"""
+This module defines the `BLADEResultWriter` class, a streaming columnar store for screening results.
+
+Rows are buffered and written in row groups to Parquet or Arrow IPC with a fixed schema: one x and one mu
+column per component and list columns for the equilibrium phases and their fractions. Memory stays at one
+row group no matter how many rows are screened. Readers load only the columns (and, with a filter, only
+the rows) they need.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+class BLADEResultWriter:
+    """
+    Row-group writer of screening rows with a schema fixed by the component list.
+
+    Args:
+        path (str | Path): Output file; ".parquet" writes Parquet, ".arrow" / ".feather" / ".ipc" Arrow IPC.
+        components (list[str]): Every component that can appear in the rows.
+        row_group_size (int): Rows buffered before a row group is written.
+        compression (str | None): Parquet or IPC compression codec.
+    """
+
+    # phases with a smaller molar amount are left out of eq_phases, as in `BLADEScreening.np_tol`
+    np_tol = 1e-8
+
+    formats = {
+        ".parquet": "parquet",
+        ".pq": "parquet",
+        ".arrow": "ipc",
+        ".feather": "ipc",
+        ".ipc": "ipc",
+    }
+
+    def __init__(self, path, components, row_group_size=65536, compression="zstd"):
+        self.path = Path(path)
+        self.format = BLADEResultWriter.file_format(self.path)
+        self.components = sorted(set(components))
+        self.schema = BLADEResultWriter.make_schema(self.components)
+        self.row_group_size = int(row_group_size)
+        self.compression = compression
+        self.rows_written = 0
+
+        self._buffer = {name: [] for name in self.schema.names}
+        self._buffered = 0
+        self._writer = None
+
+    @staticmethod
+    def file_format(path):
+        suffix = Path(path).suffix.lower()
+        if suffix not in BLADEResultWriter.formats:
+            raise ValueError(
+                f"Unknown result format {suffix!r}, use one of {sorted(BLADEResultWriter.formats)}"
+            )
+        return BLADEResultWriter.formats[suffix]
+
+    @staticmethod
+    def make_schema(components):
+        """
+        Result schema for `components`: conditions, x_<c>, G_system, mu_<c>, phase lists and error.
+        """
+        fields = [
+            pa.field("file", pa.string()),
+            pa.field("T_K", pa.float64()),
+            pa.field("P_Pa", pa.float64()),
+            pa.field("elements", pa.string()),
+        ]
+        fields += [pa.field(f"x_{c}", pa.float64()) for c in components]
+        fields.append(pa.field("G_system", pa.float64()))
+        fields += [pa.field(f"mu_{c}", pa.float64()) for c in components]
+        fields += [
+            pa.field("eq_phases", pa.list_(pa.string())),
+            pa.field("eq_phase_fractions", pa.list_(pa.float64())),
+            pa.field("error", pa.string()),
+        ]
+        return pa.schema(fields)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.format == "parquet":
+            self._writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = pa.ipc.new_file(str(self.path), self.schema, options=options)
+
+    def write_table(self, table):
+        """
+        Write a table with this writer's schema directly, in row groups of at most `row_group_size`.
+        """
+        self.flush()
+        if self._writer is None:
+            self._open()
+
+        table = table.cast(self.schema)
+        if self.format == "parquet":
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_table(table, max_chunksize=self.row_group_size)
+        self.rows_written += table.num_rows
+
+    def flush(self):
+        if not self._buffered:
+            return
+
+        table = pa.Table.from_pydict(self._buffer, schema=self.schema)
+        self._buffer = {name: [] for name in self.schema.names}
+        self._buffered = 0
+        self.write_table(table)
+
+    @staticmethod
+    def split(value, cast=str):
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return [cast(item) for item in value]
+        if value is None or (isinstance(value, float) and np.isnan(value)) or value == "":
+            return []
+        return [cast(item) for item in str(value).split(",")]
+
+    def write_rows(self, rows):
+        """
+        Buffer `compute_row` / `grid_rows` / `fail_row` style dicts, writing a row group whenever it fills.
+
+        Keys outside the schema raise a ValueError; components that are missing from a row are null.
+        """
+        for row in rows:
+            extra = set(row) - set(self.schema.names) - {"phase_error"}
+            if extra:
+                raise ValueError(f"Row has columns outside the result schema: {sorted(extra)}")
+
+            for name in self.schema.names:
+                if name == "eq_phases":
+                    value = BLADEResultWriter.split(row.get(name))
+                elif name == "eq_phase_fractions":
+                    value = BLADEResultWriter.split(row.get(name), float)
+                elif name == "error":
+                    value = row.get("error", row.get("phase_error"))
+                else:
+                    value = row.get(name)
+                self._buffer[name].append(value)
+
+            self._buffered += 1
+            if self._buffered >= self.row_group_size:
+                self.flush()
+
+    def write_grid(self, grid):
+        """
+        Write an `evaluate_grid` Dataset without building per-row dicts.
+        """
+        comps = [str(c) for c in grid.coords["component"].values]
+        missing = set(comps) - set(self.components)
+        if missing:
+            raise ValueError(f"Grid has components outside the result schema: {sorted(missing)}")
+
+        temperatures = grid.coords["T"].values
+        x = grid["X"].values
+        n_t, n_points = len(temperatures), x.shape[0]
+        n = n_t * n_points
+
+        columns = {
+            "file": pa.array([grid.attrs["file"]] * n, pa.string()),
+            "T_K": np.repeat(temperatures.astype(float), n_points),
+            "P_Pa": np.full(n, float(grid.attrs["P_Pa"])),
+            "elements": pa.array([",".join(comps)] * n, pa.string()),
+            "G_system": grid["GM"].values.reshape(n),
+        }
+
+        mu = grid["MU"].values.reshape(n, len(comps))
+        for c in self.components:
+            if c in comps:
+                k = comps.index(c)
+                columns[f"x_{c}"] = np.tile(x[:, k], n_t)
+                columns[f"mu_{c}"] = mu[:, k]
+            else:
+                columns[f"x_{c}"] = pa.nulls(n, pa.float64())
+                columns[f"mu_{c}"] = pa.nulls(n, pa.float64())
+
+        # phases with a positive fraction, flattened into list columns through their offsets
+        npv = grid["NP"].values.reshape(n, -1)
+        labels = grid["Phase"].values.reshape(n, -1)
+        present = (labels != "") & np.isfinite(npv) & (npv > self.np_tol)
+        offsets = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(present.sum(axis=1), out=offsets[1:])
+        columns["eq_phases"] = pa.ListArray.from_arrays(
+            offsets, pa.array(labels[present].astype(str))
+        )
+        columns["eq_phase_fractions"] = pa.ListArray.from_arrays(
+            offsets, pa.array(npv[present], pa.float64())
+        )
+        columns["error"] = pa.nulls(n, pa.string())
+
+        self.write_table(
+            pa.table({name: columns[name] for name in self.schema.names}, schema=self.schema)
+        )
+
+    def close(self):
+        self.flush()
+        if self._writer is None:
+            # an empty result file still carries the schema
+            self._open()
+        self._writer.close()
+
+    @staticmethod
+    def dataset(path):
+        return ds.dataset(str(path), format=BLADEResultWriter.file_format(path))
+
+    @staticmethod
+    def columns(path):
+        return BLADEResultWriter.dataset(path).schema.names
+
+    @staticmethod
+    def read(path, columns=None, filter=None):
+        """
+        Read selected columns of a result file as a DataFrame.
+
+        Args:
+            path (str | Path): Parquet or Arrow IPC result file.
+            columns (list[str] | None): Columns to load, all by default.
+            filter (pyarrow.dataset.Expression | None): Row filter, e.g. `ds.field("T_K") == 1000.0`;
+                Parquet row groups whose statistics exclude it are skipped.
+
+        Returns:
+            pd.DataFrame: The selected rows and columns.
+        """
+        return BLADEResultWriter.dataset(path).to_table(columns=columns, filter=filter).to_pandas()
+
+    @staticmethod
+    def iter_batches(path, columns=None, filter=None, batch_size=65536):
+        """
+        Yield the selected columns of a result file as record batches, without loading the whole file.
+        """
+        yield from BLADEResultWriter.dataset(path).to_batches(
+            columns=columns, filter=filter, batch_size=batch_size
+        )
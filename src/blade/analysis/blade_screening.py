@@ -0,0 +1,1086 @@
+"""
+This module defines the `BLADEScreening` class, equilibrium screening of generated TDB files.
+
+Parsed databases are kept in a process-wide cache keyed by path, modification time and size, with
+least-recently-used eviction. The pycalphad phase models and compiled phase records of each database are
+cached alongside, so repeated evaluations of the same system skip both parsing and model construction.
+Whole composition x temperature grids are evaluated with few `equilibrium` calls, split to fit a memory
+budget and optionally streamed to disk chunk by chunk, and many TDB files can be screened in parallel
+worker processes that each keep their own warm caches. Temperature sweeps can warm-start every solve from the
+equilibrium of the previous temperature.
+"""
+
+# T and P follow pycalphad's state variables, and the classmethods pass the full set of screening options
+# through to each other, so the naming and argument-count rules do not apply to this module
+# ruff: noqa: N803, N806, PLR0913
+
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+from pycalphad import Database, calculate, equilibrium
+from pycalphad import variables as v
+from pycalphad.codegen.phase_record_factory import PhaseRecordFactory
+from pycalphad.core.solver import Solver
+from pycalphad.core.utils import instantiate_models
+
+from blade.analysis.blade_simplex import BLADESimplex
+
+
+class BLADEScreening:
+    """
+    Cached pycalphad evaluation of TDB files.
+
+    The caches are class attributes shared by every instance in the process. A database is reloaded
+    automatically when its file changes on disk.
+    """
+
+    max_databases = 32
+    # phases with a smaller molar amount are treated as absent
+    np_tol = 1e-8
+
+    _databases = OrderedDict()
+    _models = {}
+    _phase_records = {}
+    _samples = {}
+    _lock = threading.RLock()
+    _hits = 0
+    _misses = 0
+
+    @staticmethod
+    def database_key(tdb_path):
+        path = Path(tdb_path).resolve()
+        stat = path.stat()
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    @classmethod
+    def database(cls, tdb_path):
+        """
+        Return the parsed `Database` for `tdb_path`, parsing it only on first use or after it changed.
+        """
+        key = cls.database_key(tdb_path)
+
+        with cls._lock:
+            if key in cls._databases:
+                cls._databases.move_to_end(key)
+                cls._hits += 1
+                return cls._databases[key]
+
+        db = Database(str(tdb_path))
+
+        with cls._lock:
+            cls._misses += 1
+            # drop stale versions of the same file before inserting the new one
+            for stale in [k for k in cls._databases if k[0] == key[0]]:
+                cls._evict(stale)
+
+            cls._databases[key] = db
+            while len(cls._databases) > cls.max_databases:
+                cls._evict(next(iter(cls._databases)))
+
+        return db
+
+    @classmethod
+    def _evict(cls, key):
+        cls._databases.pop(key, None)
+        for cache in (cls._models, cls._phase_records, cls._samples):
+            for k in [k for k in cache if k[0] == key]:
+                del cache[k]
+
+    @classmethod
+    def models(cls, tdb_path, comps, phases):
+        """
+        Return the cached pycalphad `Model` of every phase for the given components.
+        """
+        db = cls.database(tdb_path)
+        key = (cls.database_key(tdb_path), tuple(comps), tuple(phases))
+
+        with cls._lock:
+            if key not in cls._models:
+                cls._models[key] = instantiate_models(db, list(comps), list(phases))
+            return cls._models[key]
+
+    @classmethod
+    def phase_records(cls, tdb_path, comps, phases, conditions):
+        """
+        Return the cached `PhaseRecordFactory` for the given components, phases and condition variables.
+
+        Compiled phase callables live on the factory, so reusing it skips recompilation.
+        """
+        models = cls.models(tdb_path, comps, phases)
+        # equilibrium always adds the system size N to the state variables
+        conditions = {v.N: 1.0, **conditions}
+        key = (
+            cls.database_key(tdb_path),
+            tuple(comps),
+            tuple(phases),
+            tuple(sorted(str(k) for k in conditions)),
+        )
+
+        with cls._lock:
+            if key not in cls._phase_records:
+                cls._phase_records[key] = PhaseRecordFactory(
+                    cls.database(tdb_path), list(comps), conditions, models
+                )
+            return cls._phase_records[key]
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._databases.clear()
+            cls._models.clear()
+            cls._phase_records.clear()
+            cls._samples.clear()
+            cls._hits = 0
+            cls._misses = 0
+
+    @classmethod
+    def cache_info(cls):
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "databases": len(cls._databases),
+                "models": len(cls._models),
+                "phase_records": len(cls._phase_records),
+            }
+
+    @classmethod
+    def components(cls, tdb_path):
+        db = cls.database(tdb_path)
+        return sorted([str(e) for e in db.elements if str(e).upper() not in ("VA", "/-")])
+
+    @classmethod
+    def equilibrium(
+        cls, tdb_path, comps, phases, conditions, output=None, calc_opts=None, solver=None
+    ):
+        """
+        Run `pycalphad.equilibrium` with the cached database, models and phase records.
+        """
+        return equilibrium(
+            cls.database(tdb_path),
+            comps,
+            phases,
+            conditions,
+            output=output,
+            model=cls.models(tdb_path, comps, phases),
+            phase_records=cls.phase_records(tdb_path, comps, phases, conditions),
+            calc_opts=calc_opts,
+            solver=solver,
+        )
+
+    @classmethod
+    def compute_row(cls, tdb_path, T=2000.0, P=101325.0, x=None):  # noqa: PLR0912 (branches of the prop_finder compute_row it replaces)
+        """
+        Evaluate the equilibrium of one (T, composition) point of a TDB file.
+
+        Returns:
+            dict: Conditions, composition, system Gibbs energy, chemical potentials and the equilibrium phases
+                with their fractions.
+        """
+        comps = cls.components(tdb_path)
+        phases = list(cls.database(tdb_path).phases.keys())
+
+        row = {
+            "file": str(tdb_path),
+            "T_K": T,
+            "P_Pa": P,
+            "elements": ",".join(comps),
+        }
+
+        conds = {v.T: T, v.P: P}
+
+        if x is not None:
+            x_full = {c: float(x.get(c, 0.0)) for c in comps}
+            total = sum(x_full.values())
+            if not np.isclose(total, 1.0, atol=1e-8):
+                raise ValueError(f"Composition must sum to 1. Got {total} for {x_full}")
+
+            for c in comps:
+                row[f"x_{c}"] = x_full[c]
+
+            # set N-1 independent composition variables
+            for c in comps[:-1]:
+                conds[v.X(c)] = x_full[c]
+
+        # GM, MU and NP are always part of the result; asking for NP as an extra output fails in pycalphad
+        eq = cls.equilibrium(tdb_path, comps, phases, conds)
+
+        try:
+            row["G_system"] = float(np.nanmin(eq["GM"].values))
+        except Exception:
+            row["G_system"] = np.nan
+
+        if "MU" in eq:
+            for c in comps:
+                try:
+                    row[f"mu_{c}"] = float(np.nanmin(eq["MU"].sel(component=c).values))
+                except Exception:
+                    row[f"mu_{c}"] = np.nan
+        else:
+            for c in comps:
+                row[f"mu_{c}"] = np.nan
+
+        try:
+            # Phase and NP are indexed by vertex, one entry per coexisting phase
+            phase_axis = np.asarray(eq["Phase"].values).ravel()
+            npv = np.asarray(eq["NP"].values, dtype=float).ravel()
+
+            present = []
+            fracs = []
+            for ph, val in zip(phase_axis, npv, strict=True):
+                if str(ph) and np.isfinite(val) and val > BLADEScreening.np_tol:
+                    present.append(str(ph))
+                    fracs.append(float(val))
+
+            row["eq_phases"] = ",".join(present)
+            row["eq_phase_fractions"] = ",".join(f"{f:.6g}" for f in fracs)
+        except Exception as e:
+            row["eq_phases"] = ""
+            row["eq_phase_fractions"] = ""
+            row["phase_error"] = str(e)
+
+        return row
+
+    @staticmethod
+    def composition_grid(elements, n_div=20):
+        return iter(BLADESimplex(elements, n_div))
+
+    @staticmethod
+    def metal_grid_with_fixed_boron(comps, boron_fraction=2 / 3, n_div=20):
+        boron_names = [c for c in comps if c.upper() == "B"]
+        if len(boron_names) != 1:
+            raise ValueError(
+                f"Expected exactly one boron component in {comps}, found {boron_names}"
+            )
+
+        boron_name = boron_names[0]
+        metals = [c for c in comps if c.upper() != "B"]
+
+        if len(metals) == 0:
+            raise ValueError("No non-B elements found after fixing boron.")
+
+        if 1.0 - float(boron_fraction) < 0:
+            raise ValueError("boron_fraction must be <= 1")
+
+        return iter(BLADESimplex(metals, n_div, fixed={boron_name: float(boron_fraction)}))
+
+    @classmethod
+    def grid_points(cls, tdb_path, compositions):
+        """
+        Convert compositions to an (n_points, n_components) mole fraction array in `components` order.
+        """
+        comps = cls.components(tdb_path)
+        x = np.array(
+            [[float(point.get(c, 0.0)) for c in comps] for point in compositions], dtype=float
+        )
+        x = x.reshape(-1, len(comps))
+        bad = ~np.isclose(x.sum(axis=1), 1.0, atol=1e-8)
+        if bad.any():
+            raise ValueError(
+                f"Composition must sum to 1. Got {x[bad][0].sum()} for point {int(np.argmax(bad))}"
+            )
+        return x
+
+    @classmethod
+    def memory_model(cls, tdb_path, comps, phases, pdens=50):
+        """
+        Estimate the memory of an `equilibrium` call from the phases, internal DOF and components.
+
+        Returns:
+            tuple: (bytes per sampled temperature, bytes per solved condition point).
+        """
+        models = cls.models(tdb_path, comps, phases)
+        dofs = [len(model.site_fractions) for model in models.values()]
+        max_dof = max(dofs) if dofs else 1
+        n_comps = len(comps)
+        name_len = max([len(ph) for ph in phases] + [6])
+
+        # energy surface sample shared by all conditions at one temperature
+        n_samples = sum(pdens * max(dof, 1) for dof in dofs)
+        per_temperature = 8 * n_samples * (max_dof + n_comps + 2)
+
+        # NP, GM, MU, X, Y, Phase and points of the starting point, ~3x for hull temporaries and the Dataset copy
+        n_vertex = n_comps + 1
+        per_condition = 8 * (1 + n_comps + n_vertex * (1 + n_comps + max_dof)) + n_vertex * (
+            4 * name_len + 4
+        )
+        return per_temperature, 3 * per_condition
+
+    @staticmethod
+    def plan_point_chunks(x, max_conditions, waste=2.0):
+        """
+        Split grid points into chunks whose Cartesian condition grid stays small.
+
+        Points are ordered lexicographically and added to a chunk while the product of the distinct values
+        of each independent mole fraction stays within `max_conditions` and within `waste` times the number
+        of points in the chunk.
+
+        Returns:
+            list[np.ndarray]: Point indices per chunk.
+        """
+        independent = x[:, :-1]
+        if independent.shape[1] == 0:
+            return [np.arange(len(x))]
+
+        order = np.lexsort(independent.T[::-1])
+        chunks = []
+        current, values = [], [set() for _ in range(independent.shape[1])]
+
+        for k in order:
+            trial = [vals | {independent[k, i]} for i, vals in enumerate(values)]
+            size = int(np.prod([len(vals) for vals in trial]))
+            if current and (size > max_conditions or size > waste * (len(current) + 1)):
+                chunks.append(np.array(current))
+                current, trial = [], [{independent[k, i]} for i in range(independent.shape[1])]
+            current.append(k)
+            values = trial
+
+        if current:
+            chunks.append(np.array(current))
+        return chunks
+
+    @classmethod
+    def plan_chunks(
+        cls, tdb_path, temperatures, x, phases=None, memory_budget=None, t_chunk=None, waste=2.0
+    ):
+        """
+        Split a (temperature, point) grid into `equilibrium` calls.
+
+        The points of each call span a Cartesian condition grid of at most `waste` times their number; with
+        `memory_budget` (bytes) every call also fits in the budget.
+
+        Returns:
+            list[tuple]: (temperature indices, point indices) per call.
+        """
+        comps = cls.components(tdb_path)
+        phases = list(phases) if phases is not None else list(cls.database(tdb_path).phases.keys())
+        n_t = len(temperatures)
+
+        if memory_budget is None:
+            # no memory ceiling, but still keep each Cartesian condition grid close to its requested points
+            t_size = t_chunk or n_t
+            t_chunks = [np.arange(i, min(i + t_size, n_t)) for i in range(0, n_t, t_size)]
+            point_chunks = cls.plan_point_chunks(
+                x, max(1, int(np.ceil(waste * len(x)))), waste=waste
+            )
+            return [(t, points) for t in t_chunks for points in point_chunks]
+
+        per_temperature, per_condition = cls.memory_model(tdb_path, comps, phases)
+
+        # as many temperatures per call as leave room for at least one line of points
+        t_size = t_chunk or n_t
+        while t_size > 1 and t_size * (per_temperature + per_condition) > memory_budget / 2:
+            t_size = (t_size + 1) // 2
+
+        max_conditions = max(
+            1, int((memory_budget - t_size * per_temperature) // (t_size * per_condition))
+        )
+        point_chunks = cls.plan_point_chunks(x, max_conditions, waste=waste)
+
+        t_chunks = [np.arange(i, min(i + t_size, n_t)) for i in range(0, n_t, t_size)]
+        return [(t, points) for t in t_chunks for points in point_chunks]
+
+    @classmethod
+    def iter_grid_chunks(
+        cls,
+        tdb_path,
+        temperatures,
+        compositions,
+        P=101325.0,
+        phases=None,
+        t_chunk=None,
+        memory_budget=None,
+    ):
+        """
+        Evaluate a grid chunk by chunk, yielding each chunk as soon as it is solved.
+
+        Each chunk's requested compositions are mapped onto the Cartesian grid of the distinct values of
+        each independent mole fraction, which pycalphad solves in one call; Cartesian points that were not
+        requested are discarded.
+
+        Yields:
+            dict: T_index, point_index and the GM, MU, NP and Phase arrays of the chunk.
+        """
+        comps = cls.components(tdb_path)
+        phases = list(phases) if phases is not None else list(cls.database(tdb_path).phases.keys())
+        independent = comps[:-1]
+        x = cls.grid_points(tdb_path, compositions)
+        temperatures = np.asarray(temperatures, dtype=float).ravel()
+
+        chunks = cls.plan_chunks(tdb_path, temperatures, x, phases, memory_budget, t_chunk)
+        for t_index, point_index in chunks:
+            block = x[point_index]
+            axes = [np.unique(block[:, i]) for i in range(len(independent))]
+            index = tuple(np.searchsorted(axis, block[:, i]) for i, axis in enumerate(axes))
+
+            conds = {v.T: temperatures[t_index], v.P: P}
+            conds.update({v.X(c): axis for c, axis in zip(independent, axes, strict=True)})
+            eq = cls.equilibrium(tdb_path, comps, phases, conds)
+
+            # drop the N and P axes, then pick the requested points out of the Cartesian grid
+            select = (slice(None),) + index
+            values = {
+                name: np.asarray(eq[name].values)[0, 0][select]
+                for name in ("GM", "MU", "NP", "Phase")
+            }
+            if not independent:
+                values = {
+                    name: np.repeat(arr[:, None], len(point_index), axis=1)
+                    for name, arr in values.items()
+                }
+
+            values["Phase"] = values["Phase"].astype(str)
+            yield {"T_index": t_index, "point_index": point_index, **values}
+
+    @classmethod
+    def evaluate_grid(
+        cls,
+        tdb_path,
+        temperatures,
+        compositions,
+        P=101325.0,
+        phases=None,
+        t_chunk=None,
+        memory_budget=None,
+    ):
+        """
+        Evaluate every (temperature, composition) pair of a TDB with whole-grid `equilibrium` calls.
+
+        Compositions are split into chunks whose Cartesian condition grid holds at most twice their number of
+        points, so a simplex grid is not solved over the whole box of mole fractions; each chunk is solved for
+        `t_chunk` temperatures per call (all temperatures at once by default). With `memory_budget` (bytes)
+        the chunks are also kept within the budget, see `plan_chunks`.
+
+        Args:
+            tdb_path (str | Path): TDB file.
+            temperatures (list[float]): Temperatures in K.
+            compositions (list[dict]): Mole fractions per component, each summing to 1.
+            P (float): Pressure in Pa.
+            phases (list[str] | None): Phases to consider, all phases of the database by default.
+            t_chunk (int | None): Temperatures per `equilibrium` call.
+            memory_budget (int | None): Memory ceiling per call in bytes.
+
+        Returns:
+            xr.Dataset: GM (T, point), MU (T, point, component), NP and Phase (T, point, vertex) and the
+                requested mole fractions X (point, component).
+        """
+        comps = cls.components(tdb_path)
+        x = cls.grid_points(tdb_path, compositions)
+        temperatures = np.asarray(temperatures, dtype=float).ravel()
+        n_t, n_points, n_comps = len(temperatures), len(x), len(comps)
+
+        gm = np.full((n_t, n_points), np.nan)
+        mu = np.full((n_t, n_points, n_comps), np.nan)
+        npv = np.full((n_t, n_points, n_comps + 1), np.nan)
+        labels = np.full((n_t, n_points, n_comps + 1), "", dtype=object)
+
+        chunks = cls.iter_grid_chunks(
+            tdb_path, temperatures, compositions, P, phases, t_chunk, memory_budget
+        )
+        for chunk in chunks:
+            cell = np.ix_(chunk["T_index"], chunk["point_index"])
+            gm[cell] = chunk["GM"]
+            mu[cell] = chunk["MU"]
+            npv[cell] = chunk["NP"]
+            labels[cell] = chunk["Phase"]
+
+        return cls.grid_dataset(tdb_path, temperatures, x, comps, P, gm, mu, npv, labels)
+
+    @staticmethod
+    def grid_dataset(tdb_path, temperatures, x, comps, P, gm, mu, npv, labels):
+        return xr.Dataset(
+            {
+                "GM": (("T", "point"), gm),
+                "MU": (("T", "point", "component"), mu),
+                "NP": (("T", "point", "vertex"), npv),
+                "Phase": (("T", "point", "vertex"), np.asarray(labels).astype(str)),
+                "X": (("point", "component"), x),
+            },
+            coords={"T": temperatures, "point": np.arange(len(x)), "component": comps},
+            attrs={"file": str(tdb_path), "P_Pa": float(P)},
+        )
+
+    @classmethod
+    def stream_grid(
+        cls,
+        tdb_path,
+        temperatures,
+        compositions,
+        output_dir,
+        P=101325.0,
+        phases=None,
+        memory_budget=2 * 1024**3,
+    ):
+        """
+        Evaluate a grid at a fixed memory ceiling, writing each chunk to `output_dir` as it finishes.
+
+        Every chunk is saved as `chunk_<n>.npz` with its temperature and point indices, so arbitrarily
+        large grids never need to be held in memory. Use `load_grid` to assemble the chunks.
+
+        Returns:
+            list[Path]: The chunk files in the order they were written.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        comps = cls.components(tdb_path)
+        x = cls.grid_points(tdb_path, compositions)
+        temperatures = np.asarray(temperatures, dtype=float).ravel()
+        np.savez(
+            output_dir / "grid.npz",
+            tdb_path=str(tdb_path),
+            P=float(P),
+            T=temperatures,
+            X=x,
+            component=np.array(comps),
+        )
+
+        paths = []
+        chunks = cls.iter_grid_chunks(
+            tdb_path, temperatures, compositions, P, phases, None, memory_budget
+        )
+        for n, chunk in enumerate(chunks):
+            path = output_dir / f"chunk_{n:06d}.npz"
+            np.savez(path, **chunk)
+            paths.append(path)
+
+        return paths
+
+    @classmethod
+    def load_grid(cls, output_dir):
+        """
+        Assemble the chunks written by `stream_grid` into an `evaluate_grid` style Dataset.
+        """
+        output_dir = Path(output_dir)
+        meta = np.load(output_dir / "grid.npz")
+        temperatures, x = meta["T"], meta["X"]
+        comps = [str(c) for c in meta["component"]]
+        n_t, n_points, n_comps = len(temperatures), len(x), len(comps)
+
+        gm = np.full((n_t, n_points), np.nan)
+        mu = np.full((n_t, n_points, n_comps), np.nan)
+        npv = np.full((n_t, n_points, n_comps + 1), np.nan)
+        labels = np.full((n_t, n_points, n_comps + 1), "", dtype=object)
+
+        for path in sorted(output_dir.glob("chunk_*.npz")):
+            chunk = np.load(path)
+            cell = np.ix_(chunk["T_index"], chunk["point_index"])
+            gm[cell] = chunk["GM"]
+            mu[cell] = chunk["MU"]
+            npv[cell] = chunk["NP"]
+            labels[cell] = chunk["Phase"]
+
+        return cls.grid_dataset(
+            str(meta["tdb_path"]), temperatures, x, comps, float(meta["P"]), gm, mu, npv, labels
+        )
+
+    @staticmethod
+    def phase_sets(npv, labels):
+        """
+        Stable phase set per leading index, as frozensets of phase names with a positive fraction.
+        """
+        present = (labels != "") & np.isfinite(npv) & (npv > BLADEScreening.np_tol)
+        return [
+            frozenset(str(ph) for ph in row[mask])
+            for row, mask in zip(labels, present, strict=True)
+        ]
+
+    @classmethod
+    def refine_grid(  # noqa: PLR0915 (one local search loop, kept together for readability)
+        cls,
+        tdb_path,
+        temperatures,
+        n_div=10,
+        n_div_max=100,
+        budget=5000,
+        gm_threshold=1000.0,
+        boron_fraction=2 / 3,
+        P=101325.0,
+        memory_budget=None,
+    ):
+        """
+        Screen a TDB on a composition grid refined only where it matters.
+
+        Screening starts on the `n_div` simplex lattice. In every round, a point is flagged when its stable
+        phase set differs from a neighbour at the current spacing at any temperature, or when its GM is
+        within `gm_threshold` (J/mol) of the lowest GM found at that temperature. All lattice points at half
+        the spacing around flagged points are then evaluated, until the spacing reaches the `n_div_max`
+        resolution (rounded up to `n_div` times a power of two) or `budget` (T, composition) evaluations are
+        used. Phase-boundary candidates are evaluated first when the budget runs short. Boron is held at
+        `boron_fraction` if the database contains B.
+
+        Returns:
+            xr.Dataset: As `evaluate_grid` for every evaluated point, in lattice order, with the number of
+                evaluations and the final resolution in the attributes.
+        """
+        comps = cls.components(tdb_path)
+        boron = [c for c in comps if c.upper() == "B"]
+        fixed = {boron[0]: float(boron_fraction)} if boron else {}
+        free = [c for c in comps if c not in fixed]
+
+        levels = max(0, int(np.ceil(np.log2(max(n_div_max, n_div) / n_div))))
+        resolution = n_div * 2**levels
+        lattice = BLADESimplex(free, resolution, fixed=fixed)
+
+        temperatures = np.asarray(temperatures, dtype=float).ravel()
+        n_t = len(temperatures)
+        n_free = len(free)
+        directions = [
+            tuple((k == i) - (k == j) for k in range(n_free))
+            for i in range(n_free)
+            for j in range(n_free)
+            if i != j
+        ]
+
+        results = {}
+        phases = {}
+        evaluations = 0
+
+        def composition(counts):
+            x = {el: value for el, value in fixed.items()}
+            x.update({el: float(f) for el, f in zip(free, lattice.fractions(counts), strict=True)})
+            return {c: x[c] for c in comps}
+
+        def evaluate(candidates):
+            nonlocal evaluations
+            room = max(0, (budget - evaluations) // n_t)
+            points = [p for _, p in sorted(candidates) if p not in results][:room]
+            if not points:
+                return []
+
+            grid = cls.evaluate_grid(
+                tdb_path,
+                temperatures,
+                [composition(p) for p in points],
+                P=P,
+                memory_budget=memory_budget,
+            )
+            for k, p in enumerate(points):
+                results[p] = {name: grid[name].values[:, k] for name in ("GM", "MU", "NP", "Phase")}
+                phases[p] = cls.phase_sets(results[p]["NP"], results[p]["Phase"])
+
+            evaluations += len(points) * n_t
+            return points
+
+        def neighbour(p, d, step):
+            q = tuple(a + step * b for a, b in zip(p, d, strict=True))
+            return q if min(q) >= 0 else None
+
+        step = resolution // n_div
+        coarse = BLADESimplex(free, n_div).iter_counts()
+        evaluate([(0.0, tuple(c * step for c in counts)) for counts in coarse])
+
+        while step > 1 and evaluations < budget:
+            gm = np.array([results[p]["GM"] for p in results])
+            floor = np.nanmin(gm, axis=0) if len(gm) else np.full(n_t, np.nan)
+
+            candidates = {}
+            half = step // 2
+            for p in results:
+                boundary = any(
+                    q in results and phases[q][t] != phases[p][t]
+                    for d in directions
+                    for q in [neighbour(p, d, step)]
+                    for t in range(n_t)
+                )
+                gap = (
+                    np.nanmin(results[p]["GM"] - floor)
+                    if np.isfinite(results[p]["GM"]).any()
+                    else np.inf
+                )
+                if not boundary and not gap <= gm_threshold:
+                    continue
+
+                score = 0.0 if boundary else 1.0 + float(gap)
+                for d in directions:
+                    q = neighbour(p, d, half)
+                    if q is not None and q not in results:
+                        candidates[q] = min(score, candidates.get(q, np.inf))
+
+            step = half
+            if not evaluate([(score, q) for q, score in candidates.items()]):
+                continue
+
+        points = sorted(results)
+        grid = cls.grid_dataset(
+            tdb_path,
+            temperatures,
+            cls.grid_points(tdb_path, [composition(p) for p in points]),
+            comps,
+            P,
+            np.array([results[p]["GM"] for p in points]).T,
+            np.array([results[p]["MU"] for p in points]).transpose(1, 0, 2),
+            np.array([results[p]["NP"] for p in points]).transpose(1, 0, 2),
+            np.array([results[p]["Phase"] for p in points]).transpose(1, 0, 2),
+        )
+        grid.attrs.update({"evaluations": evaluations, "resolution": resolution})
+        return grid
+
+    @classmethod
+    def sample_points(cls, tdb_path, comps, phase, pdens):
+        """
+        Cached internal-DOF sample of one phase, the site fraction points `calculate` would use at `pdens`.
+        """
+        key = (cls.database_key(tdb_path), tuple(comps), phase, int(pdens))
+
+        with cls._lock:
+            if key in cls._samples:
+                return cls._samples[key]
+
+        models = cls.models(tdb_path, comps, [phase])
+        result = calculate(
+            cls.database(tdb_path),
+            comps,
+            phase,
+            T=300.0,
+            P=101325.0,
+            N=1,
+            pdens=pdens,
+            model=models,
+        )
+        n_dof = len(models[phase].site_fractions)
+        points = np.asarray(result["Y"].values).reshape(-1, result["Y"].shape[-1])[:, :n_dof]
+
+        with cls._lock:
+            cls._samples[key] = points[np.isfinite(points).all(axis=1)]
+            return cls._samples[key]
+
+    @classmethod
+    def seed_points(cls, tdb_path, comps, phases, seeds, pdens):
+        """
+        Sample points per phase with the site fractions in `seeds` ({phase: (n, dof) array}) added.
+        """
+        points = {}
+        for phase in phases:
+            sample = cls.sample_points(tdb_path, comps, phase, pdens)
+            if phase in seeds:
+                sample = np.unique(np.vstack([seeds[phase], sample]).round(12), axis=0)
+            points[phase] = sample
+        return points
+
+    @classmethod
+    def sweep_temperatures(
+        cls,
+        tdb_path,
+        temperatures,
+        compositions,
+        P=101325.0,
+        phases=None,
+        warm_start=False,
+        pdens=60,
+        warm_pdens=20,
+    ):
+        """
+        Evaluate a composition grid temperature by temperature, in increasing order.
+
+        With `warm_start`, the energy surface of every temperature after the first is sampled at `warm_pdens`
+        and extended with the site fractions of every phase that was stable at the previous temperature, so
+        the starting point of each solve is the previous phase set and constitution. Without it, every
+        temperature is sampled from scratch at `pdens`. The pycalphad solver still needs its minimum number
+        of iterations per point, so on the test databases a warm start saves little beyond sampling; it is
+        off by default.
+
+        Returns:
+            xr.Dataset: As `evaluate_grid`, with sorted temperatures, plus the solver calls and wall time
+                per temperature and their totals in the attributes.
+        """
+        comps = cls.components(tdb_path)
+        phases = list(phases) if phases is not None else list(cls.database(tdb_path).phases.keys())
+        models = cls.models(tdb_path, comps, phases)
+        independent = comps[:-1]
+        x = cls.grid_points(tdb_path, compositions)
+        temperatures = np.sort(np.asarray(temperatures, dtype=float).ravel())
+        n_t, n_points, n_comps = len(temperatures), len(x), len(comps)
+
+        axes = [np.unique(x[:, i]) for i in range(len(independent))]
+        index = tuple(np.searchsorted(axis, x[:, i]) for i, axis in enumerate(axes))
+
+        gm = np.full((n_t, n_points), np.nan)
+        mu = np.full((n_t, n_points, n_comps), np.nan)
+        npv = np.full((n_t, n_points, n_comps + 1), np.nan)
+        labels = np.full((n_t, n_points, n_comps + 1), "", dtype=object)
+        solves = np.zeros(n_t, dtype=int)
+        seconds = np.zeros(n_t)
+
+        seeds = {}
+        for t, temperature in enumerate(temperatures):
+            conds = {v.T: temperature, v.P: P}
+            conds.update({v.X(c): axis for c, axis in zip(independent, axes, strict=True)})
+
+            if warm_start and seeds:
+                calc_opts = {
+                    "pdens": warm_pdens,
+                    "points": cls.seed_points(tdb_path, comps, phases, seeds, warm_pdens),
+                }
+            else:
+                calc_opts = {"pdens": pdens}
+
+            solver = _CountingSolver()
+            start = time.perf_counter()
+            eq = cls.equilibrium(tdb_path, comps, phases, conds, calc_opts=calc_opts, solver=solver)
+            seconds[t] = time.perf_counter() - start
+            solves[t] = solver.solves
+
+            # drop the N, P and T axes, then pick the requested points out of the Cartesian grid
+            values = {}
+            for name in ("GM", "MU", "NP", "Phase", "Y"):
+                arr = np.asarray(eq[name].values)[0, 0, 0]
+                values[name] = (
+                    arr[index] if independent else np.broadcast_to(arr, (n_points,) + arr.shape)
+                )
+
+            gm[t] = values["GM"]
+            mu[t] = values["MU"]
+            npv[t] = values["NP"]
+            labels[t] = values["Phase"].astype(str)
+
+            present = (labels[t] != "") & np.isfinite(npv[t]) & (npv[t] > cls.np_tol)
+            seeds = {}
+            for phase in set(labels[t][present]):
+                y = values["Y"][present & (labels[t] == phase)][
+                    :, : len(models[phase].site_fractions)
+                ]
+                seeds[phase] = y[np.isfinite(y).all(axis=1)]
+
+        grid = cls.grid_dataset(tdb_path, temperatures, x, comps, P, gm, mu, npv, labels)
+        grid["solves"] = ("T", solves)
+        grid["seconds"] = ("T", seconds)
+        grid.attrs.update(
+            {
+                "warm_start": int(warm_start),
+                "solves": int(solves.sum()),
+                "seconds": float(seconds.sum()),
+            }
+        )
+        return grid
+
+    @classmethod
+    def compare_warm_start(
+        cls, tdb_path, temperatures, compositions, P=101325.0, phases=None, **kwargs
+    ):
+        """
+        Run `sweep_temperatures` cold and warm and report solver calls, time and the largest GM change.
+        """
+        cold = cls.sweep_temperatures(
+            tdb_path, temperatures, compositions, P, phases, warm_start=False, **kwargs
+        )
+        warm = cls.sweep_temperatures(
+            tdb_path, temperatures, compositions, P, phases, warm_start=True, **kwargs
+        )
+
+        diff = np.abs(warm["GM"].values - cold["GM"].values)
+        return {
+            "file": str(tdb_path),
+            "T_K": cold.coords["T"].values.tolist(),
+            "cold_solves": cold["solves"].values.tolist(),
+            "warm_solves": warm["solves"].values.tolist(),
+            "cold_seconds": cold.attrs["seconds"],
+            "warm_seconds": warm.attrs["seconds"],
+            "max_dGM": float(np.nanmax(diff)) if np.isfinite(diff).any() else np.nan,
+        }
+
+    @staticmethod
+    def grid_rows(grid):
+        """
+        Flatten an `evaluate_grid` result into rows with the columns of `compute_row`.
+        """
+        comps = [str(c) for c in grid.coords["component"].values]
+        temperatures = grid.coords["T"].values
+        gm = grid["GM"].values
+        mu = grid["MU"].values
+        npv = grid["NP"].values
+        labels = grid["Phase"].values
+        x = grid["X"].values
+
+        rows = []
+        for t, temperature in enumerate(temperatures):
+            for p in range(x.shape[0]):
+                row = {
+                    "file": grid.attrs["file"],
+                    "T_K": float(temperature),
+                    "P_Pa": grid.attrs["P_Pa"],
+                    "elements": ",".join(comps),
+                }
+                for c, comp in enumerate(comps):
+                    row[f"x_{comp}"] = float(x[p, c])
+
+                row["G_system"] = float(gm[t, p])
+                for c, comp in enumerate(comps):
+                    row[f"mu_{comp}"] = float(mu[t, p, c])
+
+                present = (
+                    (labels[t, p] != "")
+                    & np.isfinite(npv[t, p])
+                    & (npv[t, p] > BLADEScreening.np_tol)
+                )
+                row["eq_phases"] = ",".join(str(ph) for ph in labels[t, p][present])
+                row["eq_phase_fractions"] = ",".join(f"{f:.6g}" for f in npv[t, p][present])
+                rows.append(row)
+
+        return rows
+
+    @classmethod
+    def compositions_for(cls, tdb_path, n_div=20, boron_fraction=2 / 3):
+        """
+        Composition grid of a TDB: metals on a simplex with fixed boron if the database contains B,
+        otherwise all components on a simplex.
+        """
+        comps = cls.components(tdb_path)
+        if any(c.upper() == "B" for c in comps):
+            return list(
+                cls.metal_grid_with_fixed_boron(comps, boron_fraction=boron_fraction, n_div=n_div)
+            )
+        return list(cls.composition_grid(comps, n_div=n_div))
+
+    @staticmethod
+    def fail_row(tdb_path, T, P, x, error):
+        row = {
+            "file": str(tdb_path),
+            "T_K": T,
+            "P_Pa": P,
+            "error": str(error),
+        }
+        for c, value in x.items():
+            row[f"x_{c}"] = value
+        return row
+
+    @classmethod
+    def screen_tdb(cls, tdb_path, temperatures, compositions, P=101325.0, memory_budget=None):
+        """
+        Screen one TDB over a temperature list and composition grid.
+
+        The whole grid is tried first, split into calls of at most `memory_budget` bytes if given. If that
+        fails, points are evaluated one by one and each failing point is recorded with `fail_row`.
+
+        Returns:
+            list[dict]: One row per (T, composition), temperatures outermost.
+        """
+        try:
+            grid = cls.evaluate_grid(
+                tdb_path, temperatures, compositions, P=P, memory_budget=memory_budget
+            )
+            return cls.grid_rows(grid)
+        except Exception as e:
+            print(f"Grid evaluation failed for {tdb_path}, evaluating point by point: {e}")
+
+        rows = []
+        for T in temperatures:
+            for x in compositions:
+                try:
+                    rows.append(cls.compute_row(tdb_path, T=T, P=P, x=x))
+                except Exception as e:
+                    rows.append(cls.fail_row(tdb_path, T, P, x, e))
+        return rows
+
+    @classmethod
+    def iter_screen_parallel(
+        cls,
+        tdb_paths,
+        temperatures,
+        n_div=20,
+        boron_fraction=2 / 3,
+        P=101325.0,
+        t_chunk=1,
+        max_workers=None,
+        mp_context=None,
+        memory_budget=None,
+    ):
+        """
+        Screen many TDB files in worker processes, yielding the rows of each task as it is collected.
+
+        Every (TDB, chunk of `t_chunk` temperatures) pair is one task. Workers are reused, so each keeps
+        its parsed databases and models warm between tasks of the same file. Tasks are yielded in the order
+        of `tdb_paths` and `temperatures` regardless of completion order, so rows can be written out as they
+        arrive. A task that raises, including a crashed worker, is yielded as one `fail_row` per point, and a
+        TDB whose composition grid cannot be built as one `fail_row` per temperature.
+
+        Args:
+            memory_budget (int | None): Memory ceiling per `equilibrium` call in bytes, per worker.
+            mp_context: Multiprocessing context; "fork" where available so that scripts without a
+                `__main__` guard are not re-executed in the workers.
+
+        Yields:
+            list[dict]: Screening rows of one task.
+        """
+        temperatures = list(temperatures)
+        chunks = [temperatures[i : i + t_chunk] for i in range(0, len(temperatures), t_chunk)]
+
+        # a TDB whose grid cannot be built keeps its place in the order as one fail_row per temperature
+        tasks = []
+        for tdb_path in tdb_paths:
+            try:
+                compositions = cls.compositions_for(
+                    tdb_path, n_div=n_div, boron_fraction=boron_fraction
+                )
+                error = None if compositions else ValueError("No compositions generated")
+            except Exception as e:
+                compositions, error = [], e
+
+            if error is not None:
+                print(f"Could not build the composition grid of {tdb_path}: {error}")
+                tasks.extend((str(tdb_path), chunk, compositions, error) for chunk in chunks)
+                continue
+
+            tasks.extend((str(tdb_path), chunk, compositions, None) for chunk in chunks)
+
+        if mp_context is None and "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+            futures = [
+                None
+                if error is not None
+                else executor.submit(_screen_task, tdb_path, chunk, compositions, P, memory_budget)
+                for tdb_path, chunk, compositions, error in tasks
+            ]
+
+            for (tdb_path, chunk, compositions, error), future in zip(tasks, futures, strict=True):
+                if error is not None:
+                    yield [cls.fail_row(tdb_path, T, P, {}, error) for T in chunk]
+                    continue
+
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    rows = [cls.fail_row(tdb_path, T, P, x, e) for T in chunk for x in compositions]
+                yield rows
+
+    @classmethod
+    def screen_parallel(cls, tdb_paths, temperatures, **kwargs):
+        """
+        Screen many TDB files in worker processes, see `iter_screen_parallel` for the arguments.
+
+        Returns:
+            list[dict]: Screening rows in deterministic order.
+        """
+        return [
+            row
+            for rows in cls.iter_screen_parallel(tdb_paths, temperatures, **kwargs)
+            for row in rows
+        ]
+
+
+def _screen_task(tdb_path, temperatures, compositions, P, memory_budget=None):
+    return BLADEScreening.screen_tdb(
+        tdb_path, temperatures, compositions, P=P, memory_budget=memory_budget
+    )
+
+
+class _CountingSolver(Solver):
+    """
+    pycalphad `Solver` that counts its calls.
+    """
+
+    def __init__(self, verbose=False, remove_metastable=True, **options):
+        super().__init__(verbose=verbose, remove_metastable=remove_metastable, **options)
+        self.solves = 0
+
+    def solve(self, composition_sets, conditions):
+        self.solves += 1
+        return super().solve(composition_sets, conditions)
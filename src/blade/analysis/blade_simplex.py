@@ -0,0 +1,182 @@
+"""
+This module defines the `BLADESimplex` class, a direct generator of simplex-lattice composition grids.
+
+Grid points are enumerated with stars and bars, so only valid compositions are ever visited, in the same
+lexicographic order as filtering `itertools.product(range(n_div + 1), repeat=n)`. Points can be produced
+lazily or as a preallocated NumPy array, components can be held at a fixed fraction (e.g. boron at 2/3),
+and every point has a rank so that grids can be sharded across workers.
+"""
+
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+
+class BLADESimplex:
+    """
+    Simplex lattice of compositions with `n_div` divisions.
+
+    Args:
+        components (list[str]): Components that vary on the lattice.
+        n_div (int): Number of divisions; free fractions are multiples of 1/n_div of the free total.
+        fixed (dict | None): Components held at a fixed mole fraction, e.g. {"B": 2/3}.
+    """
+
+    def __init__(self, components, n_div=20, fixed=None):
+        self.components = list(components)
+        self.n_div = int(n_div)
+        self.fixed = dict(fixed or {})
+
+        if not self.components:
+            raise ValueError("At least one free component is required")
+
+        self.free_total = 1.0 - sum(float(x) for x in self.fixed.values())
+        if self.free_total < 0:
+            raise ValueError("Fixed fractions must sum to <= 1")
+
+    def __len__(self):
+        return BLADESimplex.count(self.n_div, len(self.components))
+
+    @staticmethod
+    def count(n_div, n_parts):
+        """
+        Number of ways to split `n_div` into `n_parts` non-negative parts.
+        """
+        if n_parts == 0:
+            return 1 if n_div == 0 else 0
+        return comb(n_div + n_parts - 1, n_parts - 1)
+
+    def rank(self, counts):
+        """
+        Position of a counts tuple in lexicographic order.
+        """
+        counts = [int(c) for c in counts]
+        if len(counts) != len(self.components) or sum(counts) != self.n_div or min(counts) < 0:
+            raise ValueError(f"{counts} is not a point of this simplex")
+
+        k = len(counts)
+        remaining = self.n_div
+        r = 0
+        for i in range(k - 1):
+            # every point with a smaller count at position i comes first
+            for c in range(counts[i]):
+                r += BLADESimplex.count(remaining - c, k - i - 1)
+            remaining -= counts[i]
+        return r
+
+    def unrank(self, r):
+        """
+        Counts tuple at position `r` in lexicographic order.
+        """
+        if not 0 <= r < len(self):
+            raise IndexError(f"rank {r} out of range for {len(self)} points")
+
+        k = len(self.components)
+        remaining = self.n_div
+        counts = []
+        for i in range(k - 1):
+            c = 0
+            while True:
+                block = BLADESimplex.count(remaining - c, k - i - 1)
+                if r < block:
+                    break
+                r -= block
+                c += 1
+            counts.append(c)
+            remaining -= c
+        counts.append(remaining)
+        return tuple(counts)
+
+    @staticmethod
+    def successor(counts):
+        """
+        Next counts tuple in lexicographic order, or None after the last point.
+        """
+        counts = list(counts)
+        tail = 0
+        for i in range(len(counts) - 2, -1, -1):
+            tail += counts[i + 1]
+            if tail > 0:
+                counts[i] += 1
+                for j in range(i + 1, len(counts) - 1):
+                    counts[j] = 0
+                counts[-1] = tail - 1
+                return tuple(counts)
+        return None
+
+    def iter_counts(self, start=0, stop=None):
+        """
+        Lazily yield the counts tuples with ranks in [start, stop).
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return
+
+        counts = self.unrank(start)
+        for _ in range(start, stop):
+            yield counts
+            counts = BLADESimplex.successor(counts)
+
+    def shard(self, index, n_shards):
+        """
+        Rank range [start, stop) of shard `index` out of `n_shards` contiguous, near-equal shards.
+        """
+        size = len(self)
+        return index * size // n_shards, (index + 1) * size // n_shards
+
+    def counts_array(self):
+        """
+        All counts tuples as a preallocated (len(self), n_components) integer array.
+        """
+        k = len(self.components)
+        size = len(self)
+        if k == 1:
+            return np.full((size, 1), self.n_div, dtype=np.int64)
+
+        # bar positions among n_div stars and k - 1 bars, in lexicographic order
+        bars = np.fromiter(
+            (b for combo in combinations(range(self.n_div + k - 1), k - 1) for b in combo),
+            dtype=np.int64,
+            count=size * (k - 1),
+        ).reshape(size, k - 1)
+
+        edges = np.empty((size, k + 1), dtype=np.int64)
+        edges[:, 0] = -1
+        edges[:, 1:k] = bars
+        edges[:, k] = self.n_div + k - 1
+        return np.diff(edges, axis=1) - 1
+
+    def fractions(self, counts):
+        if self.fixed:
+            return self.free_total * np.asarray(counts) / self.n_div
+        return np.asarray(counts) / self.n_div
+
+    def array(self):
+        """
+        All points as a preallocated (len(self), n_fixed + n_components) mole fraction array, columns in
+        `columns` order.
+        """
+        counts = self.counts_array()
+        out = np.empty((len(counts), len(self.fixed) + len(self.components)))
+        for i, value in enumerate(self.fixed.values()):
+            out[:, i] = float(value)
+        out[:, len(self.fixed) :] = self.fractions(counts)
+        return out
+
+    @property
+    def columns(self):
+        return list(self.fixed) + self.components
+
+    def __iter__(self):
+        return self.iter_points()
+
+    def iter_points(self, start=0, stop=None):
+        """
+        Lazily yield {component: fraction} dicts with ranks in [start, stop), fixed components first.
+        """
+        for counts in self.iter_counts(start, stop):
+            x = {el: float(value) for el, value in self.fixed.items()}
+            for el, c in zip(self.components, counts, strict=True):
+                x[el] = self.free_total * c / self.n_div if self.fixed else c / self.n_div
+            yield x
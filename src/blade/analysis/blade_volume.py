@@ -85,46 +85,59 @@ class BLADEVolume:
         return a, b, c, alpha, beta, gamma
 
 
-    def scan_poscars(self, comp_dir: Path):
+    def find_poscars(self, comp_dir: Path, manifest=None):
+        if manifest is not None:
+            # query the workspace manifest instead of walking the tree
+            found = []
+            for poscar_path in manifest.find_files(comp_dir, "POSCAR"):
+                rel = poscar_path.relative_to(Path(manifest.key(comp_dir)))
+                if len(rel.parts) > 1:
+                    found.append((rel.parts[0], poscar_path))
+            return sorted(found)
+
+        found = []
+        for phase_dir in sorted(p for p in comp_dir.iterdir() if p.is_dir()):
+            for poscar_path in sorted(phase_dir.rglob("POSCAR")):
+                found.append((phase_dir.name, poscar_path))
+        return found
+
+    def scan_poscars(self, comp_dir: Path, manifest=None):
         rows = []
         comp_name = comp_dir.name
         print(f"Checking for POSCARs in: {comp_dir}")
 
-        for phase_dir in sorted(p for p in comp_dir.iterdir() if p.is_dir()):
-            phase_name = phase_dir.name
-
-            for poscar_path in sorted(phase_dir.rglob("POSCAR")):
-                print(f"  Found POSCAR: {poscar_path}")
-
-                try:
-                    lattice, natoms, counts_map = self.poscar_lattice_and_counts(poscar_path)
-                except Exception as e:
-                    print(f"  Read failed: {poscar_path} -> {e}")
-                    continue
-
-                sqs_level, a_fracs = self.parse_sqs_meta(poscar_path)
-                vol = float(abs(np.linalg.det(lattice)))
-                vpa = vol / natoms if natoms else None
-                a, b, c, alpha, beta, gamma = self.cellpar_from_lattice(lattice)
-
-                rows.append(
-                    {
-                        "composition_folder": comp_name,
-                        "phase_folder": phase_name,
-                        "sqs_level": sqs_level,
-                        "sqs_a_fracs_json": json.dumps(a_fracs, sort_keys=True),
-                        "poscar_path": str(poscar_path),
-                        "volume_A3": vol,
-                        "natoms": natoms,
-                        "volume_per_atom_A3": vpa,
-                        "a_A": a,
-                        "b_A": b,
-                        "c_A": c,
-                        "alpha_deg": alpha,
-                        "beta_deg": beta,
-                        "gamma_deg": gamma,
-                        "poscar_counts_json": json.dumps(counts_map, sort_keys=True),
-                    }
-                )
+        for phase_name, poscar_path in self.find_poscars(comp_dir, manifest):
+            print(f"  Found POSCAR: {poscar_path}")
+
+            try:
+                lattice, natoms, counts_map = self.poscar_lattice_and_counts(poscar_path)
+            except Exception as e:
+                print(f"  Read failed: {poscar_path} -> {e}")
+                continue
+
+            sqs_level, a_fracs = self.parse_sqs_meta(poscar_path)
+            vol = float(abs(np.linalg.det(lattice)))
+            vpa = vol / natoms if natoms else None
+            a, b, c, alpha, beta, gamma = self.cellpar_from_lattice(lattice)
+
+            rows.append(
+                {
+                    "composition_folder": comp_name,
+                    "phase_folder": phase_name,
+                    "sqs_level": sqs_level,
+                    "sqs_a_fracs_json": json.dumps(a_fracs, sort_keys=True),
+                    "poscar_path": str(poscar_path),
+                    "volume_A3": vol,
+                    "natoms": natoms,
+                    "volume_per_atom_A3": vpa,
+                    "a_A": a,
+                    "b_A": b,
+                    "c_A": c,
+                    "alpha_deg": alpha,
+                    "beta_deg": beta,
+                    "gamma_deg": gamma,
+                    "poscar_counts_json": json.dumps(counts_map, sort_keys=True),
+                }
+            )
 
         return pd.DataFrame(rows)
@@ -0,0 +1,146 @@
+"""
+This module defines the `BladeAtatIO` class, shared reading and writing of ATAT `str.out` files.
+
+Both the SQS generation (`blade_sqs.py`) and the TDB workflow (`blade_tdb_gen.py`) read and write ATAT
+structure files. `BladeAtatIO` parses them with a single NumPy conversion of all numeric fields, writes them
+with one formatting call for the whole coordinate block, and performs periodic wrapping and supercell
+transforms as whole-array operations.
+"""
+
+from pathlib import Path
+
+import numpy as np
+from pymatgen.core import Structure
+
+
+class BladeAtatIO:
+    """
+    Vectorized ATAT `str.out` I/O.
+
+    The supported layout is three lines of coordinate system vectors, three lines of supercell vectors and
+    one line `x y z species` per atom, with atom positions in the coordinate system of the first block.
+    """
+
+    # coordinate system and supercell lines, and fields per atom line
+    header_lines = 6
+    atom_fields = 4
+
+    @staticmethod
+    def read_str(path):
+        """
+        Read an ATAT `str.out` file.
+
+        Args:
+            path (str | Path): File to read.
+
+        Returns:
+            tuple: (coord_sys (3, 3), supercell (3, 3), coords (N, 3), species list[str]).
+        """
+        lines = [line for line in Path(path).read_text().splitlines() if line.strip()]
+        n_header, n_fields = BladeAtatIO.header_lines, BladeAtatIO.atom_fields
+        if len(lines) <= n_header:
+            raise ValueError(f"{path} does not look like a valid ATAT str.out file")
+
+        header = np.array(" ".join(lines[:n_header]).split(), dtype=float).reshape(n_header, 3)
+
+        tokens = " ".join(lines[n_header:]).split()
+        if len(tokens) != n_fields * (len(lines) - n_header):
+            tokens = [
+                x
+                for line in lines[n_header:]
+                if len(line.split()) >= n_fields
+                for x in line.split()[:n_fields]
+            ]
+
+        species = tokens[3::n_fields]
+        del tokens[3::n_fields]
+        coords = np.array(tokens, dtype=float).reshape(-1, 3)
+        return header[:3], header[3:], coords, species
+
+    @staticmethod
+    def format_str(coord_sys, supercell, coords, species):
+        """
+        Format a structure as the text of an ATAT `str.out` file.
+
+        Returns:
+            str: File contents with six decimals per coordinate.
+        """
+        header = np.vstack([np.asarray(coord_sys, dtype=float), np.asarray(supercell, dtype=float)])
+        coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+
+        text = ("%.6f %.6f %.6f\n" * 6) % tuple(header.ravel())
+
+        if len(coords):
+            block = np.empty((len(coords), 4), dtype=object)
+            block[:, :3] = coords
+            block[:, 3] = list(species)
+            text += ("%.6f %.6f %.6f %s\n" * len(coords)) % tuple(block.ravel())
+
+        return text
+
+    @staticmethod
+    def write_str(path, coord_sys, supercell, coords, species):
+        """
+        Write an ATAT `str.out` file.
+
+        Args:
+            path (str | Path): Output file.
+            coord_sys (array-like): 3x3 coordinate system vectors.
+            supercell (array-like): 3x3 supercell vectors.
+            coords (array-like): (N, 3) atom positions in the coordinate system.
+            species (list[str]): N species labels.
+        """
+        Path(path).write_text(BladeAtatIO.format_str(coord_sys, supercell, coords, species))
+
+    @staticmethod
+    def wrap_near_reference(frac, ref_frac):
+        """
+        Shift fractional coordinates by lattice vectors so that each lies closest to its reference.
+        """
+        frac = np.asarray(frac, dtype=float)
+        return frac - np.round(frac - np.asarray(ref_frac, dtype=float))
+
+    @staticmethod
+    def to_supercell_fractional(coords, supercell):
+        """
+        Convert positions to fractional coordinates of the supercell (coords @ inv(supercell)).
+        """
+        return np.linalg.solve(
+            np.asarray(supercell, dtype=float).T, np.asarray(coords, dtype=float).T
+        ).T
+
+    @staticmethod
+    def from_supercell_fractional(frac, supercell):
+        """
+        Convert supercell fractional coordinates back to positions in the coordinate system.
+        """
+        return np.asarray(frac, dtype=float) @ np.asarray(supercell, dtype=float)
+
+    @staticmethod
+    def write_relaxed_str_out_from_template(template_str, contcar, output_str):
+        """
+        Write a relaxed `str.out` with the template's cell and the relaxed atom positions.
+
+        The relaxed fractional coordinates are unwrapped to the periodic image nearest the template sites,
+        so that ATAT maps every atom back onto its ideal lattice site.
+
+        Args:
+            template_str (str | Path): Ideal `str_template.out`.
+            contcar (str | Path): Relaxed structure.
+            output_str (str | Path): Output `str.out`.
+        """
+        coord_sys, supercell, template_coords, template_species = BladeAtatIO.read_str(template_str)
+        relaxed = Structure.from_file(contcar)
+
+        relaxed_species = [site.species_string for site in relaxed]
+        if len(relaxed_species) != len(template_species):
+            raise ValueError("Template str.out and CONTCAR have different numbers of atoms")
+
+        if relaxed_species != template_species:
+            raise ValueError("Species order in CONTCAR does not match template str.out")
+
+        template_frac = BladeAtatIO.to_supercell_fractional(template_coords, supercell)
+        relaxed_frac = BladeAtatIO.wrap_near_reference(relaxed.frac_coords, template_frac)
+
+        new_coords = BladeAtatIO.from_supercell_fractional(relaxed_frac, supercell)
+        BladeAtatIO.write_str(output_str, coord_sys, supercell, new_coords, template_species)
@@ -0,0 +1,154 @@
+"""
+This module defines the `BladeCalculatorFactory` class, a lazy process-wide cache of GRACE calculators.
+
+Constructing a GRACE calculator loads the machine-learned potential, which is slow and, for
+`device="cuda"`, requires a GPU. The factory defers the import and construction until a calculator is
+first needed, keeps one instance per (model, device, dtype), and falls back to the CPU when the requested
+device is not available. The device each calculator actually runs on is recorded, so that cached results
+are keyed by it rather than by the requested one.
+"""
+
+import threading
+
+
+class BladeCalculatorFactory:
+    """
+    Lazily construct and cache calculators shared by all compositions of a workflow.
+
+    Calculators are created on first request and reused for every later request with the same
+    (model, device, dtype) key within the process. An optional tag keeps independent instances apart.
+    """
+
+    _cache = {}
+    _devices = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def gpu_available():
+        """
+        Check whether TensorFlow, which GRACE runs on, sees a GPU.
+
+        Returns:
+            bool | None: Whether a GPU is visible, or None if TensorFlow is not installed, in which case the
+                check is left to the calculator constructor.
+        """
+        try:
+            import tensorflow as tf  # noqa: PLC0415 (optional, only needed for the GPU check)
+        except ImportError:
+            return None
+
+        return bool(tf.config.list_physical_devices("GPU"))
+
+    @staticmethod
+    def is_gpu(device):
+        return str(device).startswith(("cuda", "gpu"))
+
+    @staticmethod
+    def _build(model, device, dtype):
+        from materialsframework.calculators import GraceCalculator  # noqa: PLC0415 (lazy import)
+
+        kwargs = {"device": device}
+        if model is not None:
+            kwargs["model"] = model
+        if dtype is not None:
+            kwargs["dtype"] = dtype
+        return GraceCalculator(**kwargs)
+
+    @classmethod
+    def get(cls, device="cuda", model=None, dtype=None, tag=None):
+        """
+        Return the cached calculator for (model, device, dtype), creating it on first use.
+
+        Args:
+            device (str): Requested device, e.g. "cuda" or "cpu".
+            model (str, optional): Model name passed to the calculator. None uses the calculator default.
+            dtype (str, optional): Floating-point precision passed to the calculator.
+            tag (str, optional): Keeps a separate instance for the same settings.
+
+        Returns:
+            GraceCalculator: The shared calculator instance. If the requested device is unavailable or
+                the calculator cannot be built on it, a CPU calculator is returned instead.
+        """
+        key = (model, device, dtype, tag)
+
+        with cls._lock:
+            if key in cls._cache:
+                return cls._cache[key]
+
+            calculator = None
+            used = device
+            if cls.is_gpu(device) and cls.gpu_available() is False:
+                print(f"Device {device} is not available, falling back to cpu")
+            else:
+                try:
+                    calculator = cls._build(model, device, dtype)
+                except Exception as exc:
+                    if device == "cpu":
+                        raise
+                    print(f"Could not create calculator on {device} ({exc}), falling back to cpu")
+
+            if calculator is None:
+                used = "cpu"
+                cpu_key = (model, "cpu", dtype, tag)
+                if cpu_key not in cls._cache:
+                    cls._cache[cpu_key] = cls._build(model, "cpu", dtype)
+                    cls._devices[cpu_key] = "cpu"
+                calculator = cls._cache[cpu_key]
+
+            cls._cache[key] = calculator
+            cls._devices[key] = used
+            return calculator
+
+    @classmethod
+    def device_of(cls, params):
+        """
+        Return the device the calculator of a TDB workflow `params` dict runs on.
+
+        Once the calculator has been built this is the device it actually uses, "cpu" after a fallback.
+        Before that, a GPU device is reported as "cpu" when TensorFlow sees no GPU.
+
+        Args:
+            params (dict): Workflow parameters. `params["calculator"]` may be a device string or an
+                already constructed calculator.
+
+        Returns:
+            str: Device name, "cuda" if it cannot be determined.
+        """
+        calculator = params.get("calculator", "cuda")
+        if not isinstance(calculator, str):
+            return str(getattr(calculator, "device", "cuda"))
+
+        key = (params.get("model"), calculator, params.get("dtype"), None)
+        with cls._lock:
+            if key in cls._devices:
+                return cls._devices[key]
+
+        if cls.is_gpu(calculator) and cls.gpu_available() is False:
+            return "cpu"
+        return calculator
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Return the calculator configured in a TDB workflow `params` dict.
+
+        Args:
+            params (dict): Workflow parameters. `calculator` is a device string (or a calculator instance,
+                returned unchanged); optional `model` and `dtype` select the potential.
+
+        Returns:
+            GraceCalculator: The shared calculator instance.
+        """
+        calculator = params.get("calculator", "cuda")
+        if not isinstance(calculator, str):
+            return calculator
+        return cls.get(device=calculator, model=params.get("model"), dtype=params.get("dtype"))
+
+    @classmethod
+    def clear(cls):
+        """
+        Drop all cached calculators.
+        """
+        with cls._lock:
+            cls._cache.clear()
+            cls._devices.clear()
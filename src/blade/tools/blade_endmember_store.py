@@ -0,0 +1,162 @@
+"""
+This module defines the `BladeEndmemberStore` class, a project-wide cache of relaxed pure endmembers.
+
+Pure endmembers such as `sqs_lev=0_a_Cr=1` appear in every chemical system that contains the element.
+The store keeps one relaxed copy per element, lattice, supercell size and calculator settings so that the
+TDB workflow can materialize it into each workdir instead of relaxing it again.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from blade.tools.blade_calculator import BladeCalculatorFactory
+
+
+class BladeEndmemberStore:
+    """
+    Project-wide store of relaxed pure-endmember folders.
+
+    Entries are laid out as `<root>/<lattice>/<element>_<nx>x<ny>x<nz>_<settings hash>/` and contain the
+    same files as a relaxed case folder (POSCAR, CONTCAR, energy, str.out, force.out, stress.out, ...).
+    """
+
+    required = ["POSCAR", "energy", "CONTCAR", "str.out", "force.out", "stress.out"]
+
+    def __init__(self, root, params):
+        """
+        Initializes the `BladeEndmemberStore` object.
+
+        Args:
+            root (str | Path): Directory holding the store, shared by all chemical systems of a project.
+            params (dict): TDB workflow parameters. Only the settings that change a relaxed endmember
+                (`fmax`, `calculator`, `model`/`dtype` if present, `relax_tiers` and `relax_schedule`) are used
+                to key the entries.
+        """
+        self.root = Path(root)
+        self.settings = BladeEndmemberStore.calculator_settings(params)
+        self.settings_hash = hashlib.sha1(
+            json.dumps(self.settings, sort_keys=True).encode()
+        ).hexdigest()[:10]
+
+    @staticmethod
+    def calculator_settings(params):
+        """
+        Extract the calculator settings that determine an endmember's relaxed energy.
+
+        Args:
+            params (dict): TDB workflow parameters.
+
+        Returns:
+            dict: JSON-serializable calculator settings.
+        """
+        return {
+            "fmax": params.get("fmax"),
+            "calculator": BladeCalculatorFactory.device_of(params),
+            "model": params.get("model"),
+            "dtype": params.get("dtype"),
+            "relax_tiers": params.get("relax_tiers") or [],
+            "relax_schedule": params.get("relax_schedule") or [],
+        }
+
+    def entry_dir(self, element, lattice, supercell_size):
+        """
+        Return the store folder for one endmember.
+
+        Args:
+            element (str): Element symbol.
+            lattice (str): Lattice name, e.g. "FCC_A1".
+            supercell_size (tuple[int, int, int]): Supercell used for the SQS.
+
+        Returns:
+            Path: Folder of the entry (it may not exist yet).
+        """
+        sc = "x".join(str(int(n)) for n in supercell_size)
+        return self.root / lattice / f"{element}_{sc}_{self.settings_hash}"
+
+    def has(self, element, lattice, supercell_size):
+        """
+        Check whether a complete relaxed endmember is stored.
+
+        Returns:
+            bool: True if every required output file is present.
+        """
+        entry = self.entry_dir(element, lattice, supercell_size)
+        return all((entry / name).exists() for name in BladeEndmemberStore.required)
+
+    def materialize(self, element, lattice, supercell_size, folder):
+        """
+        Copy a stored endmember into a case folder.
+
+        Args:
+            element (str): Element symbol.
+            lattice (str): Lattice name.
+            supercell_size (tuple[int, int, int]): Supercell used for the SQS.
+            folder (Path): Destination case folder inside a workdir.
+
+        Returns:
+            bool: True if the endmember was found and copied.
+        """
+        if not self.has(element, lattice, supercell_size):
+            return False
+
+        entry = self.entry_dir(element, lattice, supercell_size)
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+
+        for path in entry.iterdir():
+            if path.is_file() and path.name != "settings.json":
+                shutil.copy2(path, folder / path.name)
+
+        return True
+
+    def publish(self, element, lattice, supercell_size, folder):
+        """
+        Add a freshly relaxed endmember folder to the store.
+
+        Args:
+            element (str): Element symbol.
+            lattice (str): Lattice name.
+            supercell_size (tuple[int, int, int]): Supercell used for the SQS.
+            folder (Path): Relaxed case folder inside a workdir.
+
+        Returns:
+            bool: True if the folder was complete and has been stored.
+        """
+        folder = Path(folder)
+        if not all((folder / name).exists() for name in BladeEndmemberStore.required):
+            return False
+
+        entry = self.entry_dir(element, lattice, supercell_size)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        # the entry is assembled next to its final place and renamed in, so readers never see a partial entry
+        staging = Path(tempfile.mkdtemp(prefix=f".{entry.name}.", dir=entry.parent))
+        try:
+            for path in folder.iterdir():
+                if path.is_file():
+                    shutil.copy2(path, staging / path.name)
+            (staging / "settings.json").write_text(
+                json.dumps(self.settings, indent=2, sort_keys=True)
+            )
+
+            if entry.exists():
+                stale = Path(
+                    tempfile.mkdtemp(prefix=f".{entry.name}.", suffix=".old", dir=entry.parent)
+                )
+                os.replace(entry, stale / entry.name)
+                shutil.rmtree(stale, ignore_errors=True)
+
+            try:
+                os.replace(staging, entry)
+            except OSError:
+                # another process published the same entry in between
+                if not self.has(element, lattice, supercell_size):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return True
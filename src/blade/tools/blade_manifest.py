@@ -0,0 +1,383 @@
+"""
+This module defines the `BladeManifest` class, a per-project SQLite record of the BLADE workspace.
+
+The TDB workflow repeatedly checks the same case folders and files for existence, which on network
+filesystems turns into a large amount of metadata traffic. The manifest records every case folder, its
+stage status and timings, and the size and mtime of every file (plus a checksum when asked for), and is
+updated transactionally as stages complete. Workflow functions query it instead of walking the filesystem;
+a lookup that misses falls back to the disk, so files written by tools that do not record themselves are
+still found, and `exists` stats the path so files deleted after they were recorded are not reported. `rebuild` reconciles it with the files actually on disk:
+
+    python -m blade.tools.blade_manifest rebuild /path/to/BLADE [--checksum]
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class BladeManifest:
+    """
+    SQLite manifest of case folders and files below a BLADE project root.
+
+    Paths are stored as absolute strings. A case folder is any directory holding a POSCAR; its stage is
+    one of "copied" (POSCAR only), "relaxed" (energy and CONTCAR present) or "complete" (all outputs needed
+    by the fit present), unless a stage is recorded explicitly.
+    """
+
+    required = ["POSCAR", "energy", "CONTCAR", "str.out", "force.out", "stress.out"]
+
+    def __init__(self, db_path):
+        """
+        Initializes the `BladeManifest` object, creating the database if needed.
+
+        Args:
+            db_path (str | Path): Location of the SQLite database file.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cases (
+                    folder TEXT PRIMARY KEY,
+                    parent TEXT,
+                    name TEXT,
+                    stage TEXT,
+                    status TEXT,
+                    wall_time REAL,
+                    updated REAL
+                )
+                """
+            )
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    folder TEXT,
+                    name TEXT,
+                    size INTEGER,
+                    mtime REAL,
+                    sha256 TEXT
+                )
+                """
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS files_folder ON files(folder)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS files_name ON files(name)")
+
+    @staticmethod
+    def key(path):
+        return os.path.abspath(os.fspath(path))
+
+    @staticmethod
+    def checksum(path, chunk_size=1 << 20):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def infer_stage(names):
+        names = set(names)
+        if all(name in names for name in BladeManifest.required):
+            return "complete"
+        if "energy" in names and "CONTCAR" in names:
+            return "relaxed"
+        return "copied"
+
+    def is_empty(self):
+        """
+        Returns:
+            bool: True if no file has been recorded yet.
+        """
+        row = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        return row[0] == 0
+
+    def _file_rows(self, folder, paths, checksum=False):
+        rows = []
+        for path in paths:
+            st = path.stat()
+            rows.append(
+                (
+                    BladeManifest.key(path),
+                    folder,
+                    path.name,
+                    st.st_size,
+                    st.st_mtime,
+                    BladeManifest.checksum(path) if checksum else None,
+                )
+            )
+        return rows
+
+    def record_file(self, path, checksum=False):
+        """
+        Record a single file, e.g. a top-level POSCAR_* used for multiplicity inference.
+
+        Args:
+            path (str | Path): File to record.
+            checksum (bool): Also store the sha256 of the file, which reads it in full.
+        """
+        path = Path(path)
+        folder = BladeManifest.key(path.parent)
+        rows = self._file_rows(folder, [path], checksum)
+
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def record_folder(self, folder, stage=None, status="ok", wall_time=None, checksum=False):
+        """
+        Re-scan one case folder and replace its entries in a single transaction.
+
+        Args:
+            folder (str | Path): Case folder to record.
+            stage (str, optional): Stage that just completed. Inferred from the files if None.
+            status (str): Status of the stage, e.g. "ok" or "failed".
+            wall_time (float, optional): Wall time of the stage in seconds.
+            checksum (bool): Also store the sha256 of every file, which reads them in full.
+        """
+        folder = Path(folder)
+        key = BladeManifest.key(folder)
+        paths = [p for p in folder.iterdir() if p.is_file()] if folder.is_dir() else []
+        rows = self._file_rows(key, paths, checksum)
+
+        if stage is None:
+            stage = BladeManifest.infer_stage(p.name for p in paths)
+
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM files WHERE folder = ?", (key,))
+            self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    BladeManifest.key(folder.parent),
+                    folder.name,
+                    stage,
+                    status,
+                    wall_time,
+                    time.time(),
+                ),
+            )
+
+    def forget(self, path):
+        """
+        Remove every recorded file and case folder at or below `path`, e.g. before a folder is re-copied.
+        """
+        key = BladeManifest.key(path)
+        prefix = key.rstrip(os.sep) + os.sep
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM files WHERE path = ? OR substr(path, 1, ?) = ?",
+                (key, len(prefix), prefix),
+            )
+            self.conn.execute(
+                "DELETE FROM cases WHERE folder = ? OR substr(folder, 1, ?) = ?",
+                (key, len(prefix), prefix),
+            )
+
+    def exists(self, path):
+        """
+        Returns:
+            bool: True if `path` exists on disk. A recorded file is only trusted while its size and mtime
+                still match the record; files that changed are re-recorded, unrecorded ones are recorded so
+                later queries are answered by the manifest, and entries of paths that are gone are dropped.
+        """
+        key = BladeManifest.key(path)
+        row = self.conn.execute("SELECT size, mtime FROM files WHERE path = ?", (key,)).fetchone()
+        path = Path(path)
+
+        try:
+            st = path.stat()
+        except OSError:
+            if row or self.case(path) is not None:
+                self.forget(path)
+            return False
+
+        if path.is_file():
+            if row is None or (row[0], row[1]) != (st.st_size, st.st_mtime):
+                self.record_file(path)
+            return True
+        if self.case(path) is None and (path / "POSCAR").is_file():
+            self.record_folder(path)
+        return True
+
+    def dir_exists(self, path):
+        """
+        Returns:
+            bool: True if any recorded file lies below `path`, or, when none is recorded, if `path` is a
+                directory on disk.
+        """
+        key = BladeManifest.key(path).rstrip(os.sep) + os.sep
+        row = self.conn.execute(
+            "SELECT 1 FROM files WHERE substr(path, 1, ?) = ? LIMIT 1",
+            (len(key), key),
+        ).fetchone()
+        return row is not None or Path(path).is_dir()
+
+    def missing_files(self, folder, names):
+        """
+        Return the names from `names` that are neither recorded in `folder` nor present on disk.
+
+        If an unrecorded file is found on disk, the folder is re-recorded.
+        """
+        key = BladeManifest.key(folder)
+        present = {
+            row[0] for row in self.conn.execute("SELECT name FROM files WHERE folder = ?", (key,))
+        }
+        missing = [name for name in names if name not in present]
+        if not missing:
+            return missing
+
+        on_disk = [name for name in missing if (Path(folder) / name).is_file()]
+        if on_disk:
+            self.record_folder(folder)
+        return [name for name in missing if name not in on_disk]
+
+    def list_files(self, folder):
+        """
+        Return the sorted names of the recorded files in `folder`.
+        """
+        key = BladeManifest.key(folder)
+        return sorted(
+            row[0] for row in self.conn.execute("SELECT name FROM files WHERE folder = ?", (key,))
+        )
+
+    def find_files(self, root, name):
+        """
+        Return all recorded files called `name` below `root`, sorted by path.
+        """
+        key = BladeManifest.key(root).rstrip(os.sep) + os.sep
+        rows = self.conn.execute(
+            "SELECT path FROM files WHERE name = ? AND substr(path, 1, ?) = ? ORDER BY path",
+            (name, len(key), key),
+        )
+        return [Path(row[0]) for row in rows]
+
+    def case(self, folder):
+        """
+        Return the recorded stage information of a case folder.
+
+        Returns:
+            dict | None: Keys `stage`, `status`, `wall_time` and `updated`, or None if not recorded.
+        """
+        row = self.conn.execute(
+            "SELECT stage, status, wall_time, updated FROM cases WHERE folder = ?",
+            (BladeManifest.key(folder),),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(["stage", "status", "wall_time", "updated"], row, strict=True))
+
+    def rebuild(self, root, checksum=False):
+        """
+        Reconcile the manifest with the files below `root`.
+
+        Every directory below `root` is walked once; entries of files that no longer exist are removed, and
+        case folders (directories with a POSCAR) are re-recorded keeping their previous status and timing.
+        Only size and mtime are read unless `checksum` is set.
+
+        Args:
+            root (str | Path): Project root to scan.
+            checksum (bool): Also store the sha256 of every file, which reads them in full.
+
+        Returns:
+            int: Number of files recorded.
+        """
+        root_key = BladeManifest.key(root).rstrip(os.sep) + os.sep
+        previous = {
+            row[0]: (row[1], row[2])
+            for row in self.conn.execute(
+                "SELECT folder, status, wall_time FROM cases WHERE substr(folder, 1, ?) = ?",
+                (len(root_key), root_key),
+            )
+        }
+
+        file_rows = []
+        case_rows = []
+        now = time.time()
+
+        db_key = BladeManifest.key(self.db_path)
+
+        for dirpath, _dirnames, names in os.walk(root):
+            filenames = [
+                name
+                for name in names
+                if not BladeManifest.key(Path(dirpath) / name).startswith(db_key)
+            ]
+            if not filenames:
+                continue
+
+            folder = BladeManifest.key(dirpath)
+            paths = [Path(dirpath) / name for name in filenames]
+            file_rows.extend(self._file_rows(folder, paths, checksum))
+
+            if "POSCAR" in filenames:
+                status, wall_time = previous.get(folder, ("ok", None))
+                case_rows.append(
+                    (
+                        folder,
+                        BladeManifest.key(Path(dirpath).parent),
+                        Path(dirpath).name,
+                        BladeManifest.infer_stage(filenames),
+                        status,
+                        wall_time,
+                        now,
+                    )
+                )
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM files WHERE substr(path, 1, ?) = ?", (len(root_key), root_key)
+            )
+            self.conn.execute(
+                "DELETE FROM cases WHERE substr(folder, 1, ?) = ?", (len(root_key), root_key)
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", file_rows
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?, ?, ?, ?)", case_rows
+            )
+
+        return len(file_rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the BLADE workspace manifest.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = sub.add_parser("rebuild", help="reconcile the manifest with the files on disk")
+    rebuild.add_argument("root", type=Path, help="BLADE project root")
+    rebuild.add_argument(
+        "--db",
+        type=Path,
+        default=None,
+        help="database path (default: <root>/blade_manifest.sqlite)",
+    )
+    rebuild.add_argument(
+        "--checksum", action="store_true", help="also store the sha256 of every file"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        manifest = BladeManifest(args.db or args.root / "blade_manifest.sqlite")
+        n_files = manifest.rebuild(args.root, checksum=args.checksum)
+        manifest.close()
+        print(f"Recorded {n_files} files below {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+This module defines the `BladeRelax` class, which runs ASE pre-relaxation stages on SQS case folders.
+
+The production relaxation of every SQS case is done by `Sqs2tdb`. `BladeRelax` runs cheaper stages in front
+of it, for example a fast model or a loose force tolerance, and writes the resulting geometry back to the
+folder POSCAR so the production relaxation starts close to the minimum. Step counts, energies and wall times
+of every stage are written to `relax_log.json` in the case folder.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from ase.constraints import FixAtoms
+from ase.filters import FrechetCellFilter
+from ase.io import read
+from ase.optimize import BFGS, FIRE, LBFGS
+from pymatgen.io.ase import AseAtomsAdaptor
+from pymatgen.io.vasp import Poscar
+
+from blade.tools.blade_calculator import BladeCalculatorFactory
+
+
+class BladeRelax:
+    """
+    ASE relaxation stages run before the production `Sqs2tdb` relaxation.
+
+    A stage is a dict with the keys:
+      - `name`: label used in the log
+      - `calculator`: ASE calculator used for the stage
+      - `fmax`: force tolerance in eV/Å
+      - `steps`: maximum number of optimizer steps (default 500)
+      - `optimizer`: "FIRE", "BFGS" or "LBFGS" (default "FIRE")
+      - `cell_filter`: "full" (cell and positions), "cell" (cell only) or "none" (positions only)
+      - `maxstep`: optional optimizer step size in Å
+    """
+
+    optimizers = {"FIRE": FIRE, "BFGS": BFGS, "LBFGS": LBFGS}
+
+    @staticmethod
+    def tiers_from_params(params):
+        """
+        Build the pre-relaxation tiers configured in `params["relax_tiers"]`.
+
+        Each tier may name its own `model`, `device` and `dtype`; missing entries fall back to the
+        production calculator settings.
+
+        Args:
+            params (dict): TDB workflow parameters.
+
+        Returns:
+            list[dict]: Stages ready for `relax_folder`.
+        """
+        stages = []
+
+        for i, tier in enumerate(params.get("relax_tiers") or []):
+            calculator = BladeCalculatorFactory.get(
+                device=tier.get("device", BladeCalculatorFactory.device_of(params)),
+                model=tier.get("model", params.get("model")),
+                dtype=tier.get("dtype", params.get("dtype")),
+            )
+            stages.append(
+                {
+                    "name": tier.get("name", f"tier{i}"),
+                    "calculator": calculator,
+                    "model": tier.get("model", params.get("model")),
+                    "fmax": tier.get("fmax", 5e-2),
+                    "steps": tier.get("steps", 500),
+                    "optimizer": tier.get("optimizer", "FIRE"),
+                    "cell_filter": tier.get("cell_filter", "full"),
+                    "maxstep": tier.get("maxstep"),
+                }
+            )
+
+        return stages
+
+    @staticmethod
+    def schedule_from_params(params):
+        """
+        Build the staged convergence schedule configured in `params["relax_schedule"]`.
+
+        The schedule is a ladder of coarse stages, e.g. cell-only, then cell and positions at
+        fmax=1e-2, all run with the production calculator. The final stage at `params["fmax"]` is the
+        production `Sqs2tdb` relaxation itself.
+
+        Args:
+            params (dict): TDB workflow parameters.
+
+        Returns:
+            list[dict]: Stages ready for `relax_folder`.
+        """
+        schedule = params.get("relax_schedule") or []
+        if not schedule:
+            return []
+
+        calculator = BladeCalculatorFactory.from_params(params)
+        stages = []
+
+        for i, entry in enumerate(schedule):
+            stages.append(
+                {
+                    "name": entry.get("name", f"stage{i}"),
+                    "calculator": calculator,
+                    "model": params.get("model"),
+                    "fmax": entry["fmax"],
+                    "steps": entry.get("steps", 500),
+                    "optimizer": entry.get("optimizer", "FIRE"),
+                    "cell_filter": entry.get("cell_filter", "full"),
+                    "maxstep": entry.get("maxstep"),
+                }
+            )
+
+        return stages
+
+    @staticmethod
+    def filtered(atoms, cell_filter):
+        if cell_filter == "none":
+            return atoms
+        if cell_filter == "full":
+            return FrechetCellFilter(atoms)
+        if cell_filter == "cell":
+            atoms.set_constraint(FixAtoms(indices=list(range(len(atoms)))))
+            return FrechetCellFilter(atoms)
+        raise ValueError(f"Unknown cell_filter {cell_filter!r}, expected 'full', 'cell' or 'none'")
+
+    @staticmethod
+    def run_stage(atoms, stage):
+        """
+        Relax `atoms` in place with one stage.
+
+        Args:
+            atoms (ase.Atoms): Structure to relax.
+            stage (dict): Stage settings, see the class docstring.
+
+        Returns:
+            dict: Log entry with `name`, `fmax`, `optimizer`, `cell_filter`, `steps`, `converged`,
+                `energy` (eV) and `wall_time` (s).
+        """
+        optimizer_name = stage.get("optimizer", "FIRE")
+        if optimizer_name not in BladeRelax.optimizers:
+            raise ValueError(f"Unknown optimizer {optimizer_name!r}")
+
+        cell_filter = stage.get("cell_filter", "full")
+        atoms.calc = stage["calculator"]
+        target = BladeRelax.filtered(atoms, cell_filter)
+
+        kwargs = {"logfile": None}
+        if stage.get("maxstep") is not None:
+            kwargs["maxstep"] = stage["maxstep"]
+        optimizer = BladeRelax.optimizers[optimizer_name](target, **kwargs)
+
+        start = time.perf_counter()
+        converged = optimizer.run(fmax=stage["fmax"], steps=stage.get("steps", 500))
+        wall_time = time.perf_counter() - start
+
+        energy = float(atoms.get_potential_energy())
+        atoms.set_constraint()
+
+        return {
+            "name": stage.get("name"),
+            "model": stage.get("model"),
+            "fmax": stage["fmax"],
+            "optimizer": optimizer_name,
+            "cell_filter": cell_filter,
+            "steps": int(optimizer.nsteps),
+            "converged": bool(converged),
+            "energy": energy,
+            "wall_time": wall_time,
+        }
+
+    @staticmethod
+    def relax_folder(folder, stages):
+        """
+        Run `stages` on `folder/POSCAR` and write the relaxed geometry back to it.
+
+        The original POSCAR is kept as POSCAR.ideal the first time a folder is touched, and the species
+        order is preserved so that the str.out template still matches.
+
+        Args:
+            folder (str | Path): Case folder with a POSCAR.
+            stages (list[dict]): Stages to run in order.
+
+        Returns:
+            list[dict]: One log entry per stage.
+        """
+        folder = Path(folder)
+        ideal = folder / "POSCAR.ideal"
+        if not ideal.exists():
+            ideal.write_text((folder / "POSCAR").read_text())
+
+        atoms = read(folder / "POSCAR", format="vasp")
+        entries = []
+
+        for stage in stages:
+            entries.append(BladeRelax.run_stage(atoms, stage))
+
+        # pymatgen keeps the per-atom species labels that the label rewrite of the TDB workflow relies on
+        atoms.calc = None
+        Poscar(AseAtomsAdaptor.get_structure(atoms)).write_file(folder / "POSCAR")
+        return entries
+
+    @staticmethod
+    @contextmanager
+    def count_evaluations(calculator):
+        """
+        Count the energy/force evaluations made through `calculator` inside the context.
+
+        Yields:
+            dict: `{"evaluations": n}`, updated while the context is active.
+        """
+        counter = {"evaluations": 0}
+        calculate = getattr(calculator, "calculate", None)
+
+        if calculate is None:
+            yield counter
+            return
+
+        patched_instance = "calculate" in vars(calculator)
+
+        def counted(*args, **kwargs):
+            counter["evaluations"] += 1
+            return calculate(*args, **kwargs)
+
+        calculator.calculate = counted
+        try:
+            yield counter
+        finally:
+            if patched_instance:
+                calculator.calculate = calculate
+            else:
+                del calculator.calculate
+
+    @staticmethod
+    def read_energy(folder):
+        try:
+            return float((Path(folder) / "energy").read_text().split()[0])
+        except (OSError, ValueError, IndexError):
+            return None
+
+    @staticmethod
+    def compare_final_energies(folders, reference_folders, tol=1e-3):
+        """
+        Compare final energies per atom with reference relaxations, e.g. single-stage runs.
+
+        Args:
+            folders (list[Path]): Case folders relaxed with a schedule or tiers.
+            reference_folders (list[Path]): Matching case folders relaxed in a single stage.
+            tol (float): Accepted absolute difference in eV/atom.
+
+        Returns:
+            list[dict]: One row per folder pair with both energies, the difference per atom, whether it
+                is within `tol`, and the total pre-stage steps read from `relax_log.json`.
+        """
+        rows = []
+
+        for case, reference in zip(folders, reference_folders, strict=True):
+            folder = Path(case)
+            energy = BladeRelax.read_energy(folder)
+            reference_energy = BladeRelax.read_energy(reference)
+            n_atoms = len(read(folder / "CONTCAR", format="vasp"))
+
+            diff = None
+            if energy is not None and reference_energy is not None:
+                diff = (energy - reference_energy) / n_atoms
+
+            steps = None
+            log_path = folder / "relax_log.json"
+            if log_path.exists():
+                steps = sum(entry.get("steps") or 0 for entry in json.loads(log_path.read_text()))
+
+            rows.append(
+                {
+                    "folder": str(folder),
+                    "reference": str(reference),
+                    "energy": energy,
+                    "reference_energy": reference_energy,
+                    "diff_per_atom": diff,
+                    "within_tol": diff is not None and abs(diff) <= tol,
+                    "pre_stage_steps": steps,
+                }
+            )
+
+        return rows
+
+    @staticmethod
+    def write_log(folder, entries):
+        (Path(folder) / "relax_log.json").write_text(json.dumps(entries, indent=2))
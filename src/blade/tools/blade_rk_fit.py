@@ -0,0 +1,603 @@
+"""
+This module defines the `BladeRKFit` class, an in-process Redlich-Kister fitter for relaxed SQS energies.
+
+It is an alternative to running `sqs2tdb -fit` / `sqs2tdb -tdb` in a subprocess. The relaxed energies of all
+SQS folders of a system are read into arrays, the interaction parameters of every lattice are solved by
+weighted least squares with a ridge term controlled by `bv`, and the database is written directly as a TDB
+file. Many systems can be fit in one call; systems whose design matrices have the same shape are solved
+together as one batched linear solve, and all binaries of a lattice can be fit jointly with shared
+endmembers in one sparse solve.
+
+The fitter is experimental: it has only been checked on synthetic energies, not yet against `sqs2tdb` fits
+of real systems. `BladeTDBGen.compare_tdb` lists the parameter differences between the two.
+"""
+
+import re
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from blade.tools.blade_atat_io import BladeAtatIO
+
+
+class BladeRKFit:
+    """
+    Weighted least-squares Redlich-Kister fitter.
+
+    Energies are fitted per formula unit of each lattice, where a formula unit holds `mult` mixing sites
+    (from `mult.in`) and the corresponding number of atoms of any fixed sublattice (e.g. B in HEDB1). The
+    endmember (G) parameters are the absolute relaxed energies of the pure folders in J/mol, so all lattices
+    of a system share the same energy zero. Binary interactions use the Redlich-Kister expansion and
+    ternary interactions the Muggianu extension, with orders taken from `terms.in`. Parameters are
+    temperature independent.
+
+    Args:
+        bv (float): Ridge strength relative to the mean diagonal of the weighted normal matrix.
+        t_min (float): Lower temperature bound written to the TDB.
+        t_max (float): Upper temperature bound written to the TDB.
+        weights (str): "uniform" weights every SQS equally, "sites" weights by number of mixing sites.
+    """
+
+    EV_TO_J_PER_MOL = 96485.33212
+    DEFAULT_TERMS = {1: 0, 2: 1}
+    BINARY = 2
+    TERNARY = 3
+
+    def __init__(self, bv=1e-3, t_min=298.15, t_max=10000.0, weights="uniform"):
+        self.bv = bv
+        self.t_min = t_min
+        self.t_max = t_max
+        self.weights = weights
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(
+            bv=params.get("bv", 1e-3),
+            t_min=params.get("t_min", 298.15),
+            t_max=params.get("t_max", 10000.0),
+            weights=params.get("rk_weights", "uniform"),
+        )
+
+    @staticmethod
+    def read_terms(path):
+        """
+        Read the maximum interaction order per number of interacting species from the mixing sublattice
+        of a `terms.in` file (e.g. "2,1" allows binary L0 and L1).
+        """
+        path = Path(path)
+        if not path.exists():
+            return dict(BladeRKFit.DEFAULT_TERMS)
+
+        terms = {}
+        for raw in path.read_text().splitlines():
+            line = raw.strip()
+            if not line:
+                continue
+            n_species, order = (int(x) for x in line.split(":")[0].split(","))
+            terms[n_species] = max(order, terms.get(n_species, 0))
+        return terms
+
+    @staticmethod
+    def read_mult(path):
+        path = Path(path)
+        if not path.exists():
+            return 1
+        match = re.search(r"=\s*(\d+)", path.read_text())
+        return int(match.group(1)) if match else 1
+
+    @staticmethod
+    def read_energy(path):
+        return float(Path(path).read_text().split()[0])
+
+    @staticmethod
+    def read_lattice(lattice_dir, elements, exclude=()):
+        """
+        Read the relaxed energies of every SQS folder of a lattice.
+
+        Folders are included when they contain `energy` and `str.out`, are not hidden with a `__skip__`
+        prefix and are not listed in `exclude`.
+
+        Returns:
+            dict: lattice, mult, folders, fractions (n, n_elements) of the mixing sublattice, energies (n,)
+                in J/mol of formula units, sites (n,) mixing sites per cell, and fixed, mapping each fixed
+                species to its number of atoms per formula unit.
+        """
+        lattice_dir = Path(lattice_dir)
+        exclude = {Path(folder).resolve() for folder in exclude}
+        mult = BladeRKFit.read_mult(lattice_dir / "mult.in")
+        index = {el: i for i, el in enumerate(elements)}
+
+        folders, counts, energies, fixed = [], [], [], {}
+        for folder in sorted(p for p in lattice_dir.iterdir() if p.is_dir()):
+            if folder.name.startswith("__skip__") or folder.resolve() in exclude:
+                continue
+            if not (folder / "energy").exists() or not (folder / "str.out").exists():
+                continue
+
+            _, _, _, species = BladeAtatIO.read_str(folder / "str.out")
+            labels, n = np.unique(species, return_counts=True)
+
+            row = np.zeros(len(elements))
+            spectators = {}
+            for label, count in zip(labels, n, strict=True):
+                if label in index:
+                    row[index[label]] = count
+                else:
+                    spectators[str(label)] = count
+
+            if row.sum() == 0:
+                continue
+
+            for label, count in spectators.items():
+                fixed.setdefault(label, []).append(count * mult / row.sum())
+
+            folders.append(folder)
+            counts.append(row)
+            energies.append(BladeRKFit.read_energy(folder / "energy"))
+
+        counts = np.array(counts, dtype=float).reshape(-1, len(elements))
+        sites = counts.sum(axis=1)
+        n_formula = sites / mult
+
+        return {
+            "lattice": lattice_dir.name,
+            "mult": mult,
+            "folders": folders,
+            "fractions": counts / sites[:, None] if len(sites) else counts,
+            "energies": np.array(energies) * BladeRKFit.EV_TO_J_PER_MOL / n_formula
+            if len(sites)
+            else np.array([]),
+            "sites": sites,
+            "fixed": {sp: float(np.mean(n)) for sp, n in fixed.items()},
+        }
+
+    @staticmethod
+    def interactions(n_elements, terms):
+        """
+        List the excess parameters as (species indices, order) pairs.
+
+        Binary pairs get orders 0..k for "2,k". Ternary triples get a single order 0 parameter for "3,0" and
+        the three composition-dependent parameters 0, 1, 2 otherwise.
+        """
+        result = []
+        for n_species in range(2, n_elements + 1):
+            if n_species not in terms or n_species > BladeRKFit.TERNARY:
+                continue
+            max_order = terms[n_species]
+            for subset in combinations(range(n_elements), n_species):
+                if n_species == BladeRKFit.BINARY:
+                    orders = range(max_order + 1)
+                else:
+                    orders = [0] if max_order == 0 else [0, 1, 2]
+                result.extend((subset, order) for order in orders)
+        return result
+
+    @staticmethod
+    def design_matrix(fractions, interactions):
+        """
+        Evaluate every excess term at every composition at once.
+
+        Returns:
+            np.ndarray: (n_structures, n_interactions) matrix.
+        """
+        x = np.asarray(fractions, dtype=float)
+        columns = np.zeros((len(x), len(interactions)))
+
+        binary = [
+            k for k, (subset, _) in enumerate(interactions) if len(subset) == BladeRKFit.BINARY
+        ]
+        if binary:
+            i = np.array([interactions[k][0][0] for k in binary])
+            j = np.array([interactions[k][0][1] for k in binary])
+            order = np.array([interactions[k][1] for k in binary])
+            columns[:, binary] = x[:, i] * x[:, j] * (x[:, i] - x[:, j]) ** order
+
+        ternary = [
+            k for k, (subset, _) in enumerate(interactions) if len(subset) == BladeRKFit.TERNARY
+        ]
+        if ternary:
+            idx = np.array([interactions[k][0] for k in ternary])
+            order = np.array([interactions[k][1] for k in ternary])
+            product = x[:, idx[:, 0]] * x[:, idx[:, 1]] * x[:, idx[:, 2]]
+            rest = (1.0 - x[:, idx].sum(axis=2)) / 3.0
+            single = np.array(
+                [
+                    sum(1 for s, _ in interactions if tuple(s) == tuple(triple)) == 1
+                    for triple in idx
+                ]
+            )
+            factor = np.where(single, 1.0, x[:, idx[np.arange(len(idx)), order]] + rest)
+            columns[:, ternary] = product * factor
+
+        return columns
+
+    @staticmethod
+    def pure_index(fractions, tol=1e-12):
+        """
+        Return the element index of every pure row and -1 for mixed rows.
+        """
+        fractions = np.asarray(fractions)
+        pure = (fractions > 1.0 - tol).any(axis=1)
+        return np.where(pure, fractions.argmax(axis=1), -1)
+
+    def problem(self, data, terms):
+        """
+        Build the weighted least-squares problem of one lattice.
+
+        Endmembers with a pure folder are fixed to their energy and subtracted from the mixed energies.
+        Elements without a pure folder get a free linear (G) column instead.
+
+        Returns:
+            dict: matrix, target, weight, columns (labels of the unknowns) and the fixed endmembers.
+        """
+        fractions = data["fractions"]
+        energies = data["energies"]
+        n_elements = fractions.shape[1]
+
+        pure = BladeRKFit.pure_index(fractions)
+        endmembers = {}
+        for el in range(n_elements):
+            rows = pure == el
+            if rows.any():
+                endmembers[el] = float(energies[rows].min())
+
+        free = [el for el in range(n_elements) if el not in endmembers]
+        interactions = BladeRKFit.interactions(n_elements, terms)
+
+        mixed = pure < 0
+        x = fractions[mixed]
+        reference = np.zeros(n_elements)
+        for el, value in endmembers.items():
+            reference[el] = value
+
+        matrix = np.hstack([x[:, free], BladeRKFit.design_matrix(x, interactions)])
+        target = energies[mixed] - x @ reference
+
+        if self.weights == "sites":
+            weight = data["sites"][mixed] / data["sites"][mixed].mean()
+        else:
+            weight = np.ones(len(target))
+
+        return {
+            "matrix": matrix,
+            "target": target,
+            "weight": weight,
+            "columns": [("G", (el,), 0) for el in free]
+            + [("L", subset, order) for subset, order in interactions],
+            "endmembers": endmembers,
+        }
+
+    def solve(self, matrices, targets, weights):
+        """
+        Solve a batch of same-shape ridge least-squares problems with one linear solve.
+
+        Args:
+            matrices (np.ndarray): (B, n, m) design matrices.
+            targets (np.ndarray): (B, n) targets.
+            weights (np.ndarray): (B, n) row weights.
+
+        Returns:
+            tuple: (B, m) parameters and (B,) weighted RMS residuals.
+        """
+        aw = matrices * weights[:, :, None]
+        normal = np.einsum("bnm,bnk->bmk", aw, matrices)
+        rhs = np.einsum("bnm,bn->bm", aw, targets)
+
+        m = normal.shape[-1]
+        scale = np.trace(normal, axis1=1, axis2=2) / max(m, 1)
+        normal = normal + self.bv * scale[:, None, None] * np.eye(m)
+
+        try:
+            parameters = np.linalg.solve(normal, rhs[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            parameters = (np.linalg.pinv(normal) @ rhs[:, :, None])[:, :, 0]
+
+        residual = np.einsum("bnm,bm->bn", matrices, parameters) - targets
+        rms = np.sqrt((weights * residual**2).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-300))
+        return parameters, rms
+
+    def fit_problems(self, problems):
+        """
+        Solve many problems, batching those whose design matrices have the same shape.
+
+        Returns:
+            list: (parameters, rms) per problem, in input order.
+        """
+        groups = {}
+        for k, problem in enumerate(problems):
+            groups.setdefault(problem["matrix"].shape, []).append(k)
+
+        results = [None] * len(problems)
+        for (n, m), members in groups.items():
+            if n == 0 or m == 0:
+                for k in members:
+                    results[k] = (np.zeros(m), float("nan"))
+                continue
+
+            parameters, rms = self.solve(
+                np.stack([problems[k]["matrix"] for k in members]),
+                np.stack([problems[k]["target"] for k in members]),
+                np.stack([problems[k]["weight"] for k in members]),
+            )
+            for k, p, r in zip(members, parameters, rms, strict=True):
+                results[k] = (p, float(r))
+
+        return results
+
+    @staticmethod
+    def collect(problem, parameters, elements):
+        """
+        Combine fixed endmembers and fitted unknowns into named G and L parameters.
+        """
+        names = [el.upper() for el in elements]
+        result = {"G": {}, "L": {}}
+        for el, value in problem["endmembers"].items():
+            result["G"][names[el]] = value
+        for (kind, subset, order), value in zip(problem["columns"], parameters, strict=True):
+            key = tuple(names[i] for i in subset)
+            if kind == "G":
+                result["G"][key[0]] = float(value)
+            else:
+                result["L"][(key, order)] = float(value)
+        return result
+
+    def fit_systems(self, systems):
+        """
+        Fit many systems in one call.
+
+        Args:
+            systems (list[dict]): Each with "workdir", "elements", "lattices" and optionally "exclude"
+                (folders to leave out).
+
+        Returns:
+            list[dict]: Per system the elements and, per lattice, the read data, named parameters and RMS
+                residual in J/mol of formula units.
+        """
+        problems, owners, fits = [], [], []
+
+        for k, system in enumerate(systems):
+            workdir = Path(system["workdir"])
+            elements = list(system["elements"])
+            fits.append({"elements": elements, "lattices": {}})
+
+            for lattice in system["lattices"]:
+                lattice_dir = workdir / lattice
+                data = BladeRKFit.read_lattice(lattice_dir, elements, system.get("exclude", ()))
+                if len(data["energies"]) == 0:
+                    print(f"No relaxed SQS energies found in {lattice_dir}")
+                    continue
+
+                terms = BladeRKFit.read_terms(lattice_dir / "terms.in")
+                problems.append(self.problem(data, terms))
+                owners.append((k, lattice, data))
+
+        for problem, (k, lattice, data), (parameters, rms) in zip(
+            problems, owners, self.fit_problems(problems), strict=True
+        ):
+            fit = BladeRKFit.collect(problem, parameters, fits[k]["elements"])
+            fit.update({"data": data, "rms": rms, "n_fit": len(problem["target"])})
+            fits[k]["lattices"][lattice] = fit
+
+        return fits
+
+    @staticmethod
+    def format_value(value):
+        return f"{value:+.6f}"
+
+    def write_tdb(self, path, fit):
+        """
+        Write the fitted parameters of one system as a TDB file.
+        """
+        elements = [el.upper() for el in fit["elements"]]
+        fixed = sorted(
+            {sp.upper() for lat in fit["lattices"].values() for sp in lat["data"]["fixed"]}
+        )
+        t_range = f"{self.t_min:g}"
+        t_end = f"{self.t_max:g} N !"
+
+        lines = [
+            "$ Redlich-Kister fit of relaxed SQS energies (J/mol of formula units)",
+            "ELEMENT /- ELECTRON_GAS 0 0 0 !",
+            "ELEMENT VA VACUUM 0 0 0 !",
+        ]
+        lines += [f"ELEMENT {el} BLANK 0 0 0 !" for el in sorted(set(elements) | set(fixed))]
+        lines.append("TYPE_DEFINITION % SEQ * !")
+
+        for lattice, lat in fit["lattices"].items():
+            phase = lattice.upper()
+            spectators = sorted(lat["data"]["fixed"].items())
+            ratios = [lat["data"]["mult"]] + [n for _, n in spectators]
+            tail = "".join(f":{sp.upper()}" for sp, _ in spectators)
+
+            lines.append("")
+            lines.append(f"PHASE {phase} % {len(ratios)} {' '.join(f'{r:g}' for r in ratios)} !")
+            lines.append(f"CONSTITUENT {phase} :{','.join(elements)}{tail}: !")
+
+            for el, value in sorted(lat["G"].items()):
+                lines.append(
+                    f"PARAMETER G({phase},{el}{tail};0) {t_range} {self.format_value(value)}; {t_end}"
+                )
+
+            for (species, order), value in sorted(lat["L"].items()):
+                lines.append(
+                    f"PARAMETER L({phase},{','.join(species)}{tail};{order}) {t_range} "
+                    f"{self.format_value(value)}; {t_end}"
+                )
+
+        path = Path(path)
+        path.write_text("\n".join(lines) + "\n")
+        return path
+
+    def fit_system(self, workdir, elements, lattices, tdb_path, exclude=()):
+        """
+        Fit one system and write its TDB.
+
+        Returns:
+            Path | None: The written TDB, or None if no lattice had energies to fit.
+        """
+        fit = self.fit_systems(
+            [{"workdir": workdir, "elements": elements, "lattices": lattices, "exclude": exclude}]
+        )[0]
+        if not fit["lattices"]:
+            return None
+
+        for lattice, lat in fit["lattices"].items():
+            print(f"{lattice}: {lat['n_fit']} SQS fitted, RMS residual {lat['rms']:.1f} J/mol")
+
+        return self.write_tdb(tdb_path, fit)
+
+    def solve_joint(self, blocks):
+        """
+        Solve the binaries of one lattice as a single block-sparse least-squares problem.
+
+        The unknowns are one G per element, shared by every system containing it, and the L parameters of
+        each system. Every structure, pure or mixed, contributes one row touching only the two G columns and
+        the L columns of its own system. The ridge term acts on the L columns only.
+
+        Args:
+            blocks (list[tuple]): (elements, data, max_order) per binary system.
+
+        Returns:
+            tuple: (G dict, list of per-block L dicts, list of per-block RMS residuals).
+        """
+        names = sorted({el.upper() for elements, _, _ in blocks for el in elements})
+        g_index = {el: i for i, el in enumerate(names)}
+
+        rows, cols, vals, targets, weights, owner = [], [], [], [], [], []
+        l_offsets = []
+        n_rows = 0
+        n_cols = len(names)
+
+        for b, (elements, data, max_order) in enumerate(blocks):
+            x = data["fractions"]
+            n = len(x)
+            interactions = [((0, 1), order) for order in range(max_order + 1)]
+            design = BladeRKFit.design_matrix(x, interactions)
+
+            row_ids = np.arange(n_rows, n_rows + n)
+            for i, el in enumerate(elements):
+                rows.append(row_ids)
+                cols.append(np.full(n, g_index[el.upper()]))
+                vals.append(x[:, i])
+
+            l_offsets.append(n_cols)
+            rows.append(np.repeat(row_ids, len(interactions)))
+            cols.append(np.tile(np.arange(n_cols, n_cols + len(interactions)), n))
+            vals.append(design.ravel())
+
+            targets.append(data["energies"])
+            if self.weights == "sites":
+                weights.append(data["sites"] / data["sites"].mean())
+            else:
+                weights.append(np.ones(n))
+            owner.append(np.full(n, b))
+
+            n_rows += n
+            n_cols += len(interactions)
+
+        matrix = sparse.csr_matrix(
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_rows, n_cols),
+        )
+        target = np.concatenate(targets)
+        weight = np.concatenate(weights)
+        owner = np.concatenate(owner)
+
+        aw = sparse.diags(weight) @ matrix
+        normal = (matrix.T @ aw).tocsc()
+        rhs = aw.T @ target
+
+        diagonal = normal.diagonal()
+        ridge = np.zeros(n_cols)
+        if n_cols > len(names):
+            ridge[len(names) :] = self.bv * diagonal[len(names) :].mean()
+        parameters = spsolve(normal + sparse.diags(ridge), rhs)
+
+        residual = matrix @ parameters - target
+        g = {el: float(parameters[i]) for i, el in enumerate(names)}
+        l_values, rms = [], []
+        for b, (elements, _, max_order) in enumerate(blocks):
+            species = tuple(el.upper() for el in elements)
+            start = l_offsets[b]
+            l_values.append(
+                {
+                    (species, order): float(parameters[start + order])
+                    for order in range(max_order + 1)
+                }
+            )
+            mask = owner == b
+            rms.append(
+                float(np.sqrt((weight[mask] * residual[mask] ** 2).sum() / weight[mask].sum()))
+            )
+
+        return g, l_values, rms
+
+    def fit_joint(self, systems, lattices):
+        """
+        Fit every binary system of every lattice with one solve per lattice.
+
+        Args:
+            systems (list[dict]): Binary systems, each with "workdir", "elements" and optionally "exclude".
+            lattices (list[str]): Lattices to fit.
+
+        Returns:
+            tuple: (per-system fits in the layout of `fit_systems`, merged fit over all elements).
+        """
+        fits = [{"elements": list(system["elements"]), "lattices": {}} for system in systems]
+        merged = {
+            "elements": sorted({el for system in systems for el in system["elements"]}),
+            "lattices": {},
+        }
+
+        for lattice in lattices:
+            blocks, members = [], []
+            for k, system in enumerate(systems):
+                lattice_dir = Path(system["workdir"]) / lattice
+                if len(system["elements"]) != BladeRKFit.BINARY or not lattice_dir.is_dir():
+                    continue
+
+                # sorted species keep the sign of odd-order L consistent across systems in the merged TDB
+                elements = sorted(system["elements"], key=str.upper)
+                data = BladeRKFit.read_lattice(lattice_dir, elements, system.get("exclude", ()))
+                if len(data["energies"]) == 0:
+                    continue
+
+                max_order = BladeRKFit.read_terms(lattice_dir / "terms.in").get(2, 0)
+                blocks.append((elements, data, max_order))
+                members.append(k)
+
+            if not blocks:
+                continue
+
+            # the merged phase has one set of site ratios, so every system must share it
+            ratios = {
+                (
+                    round(float(data["mult"]), 6),
+                    tuple((sp.upper(), round(n, 6)) for sp, n in sorted(data["fixed"].items())),
+                )
+                for _, data, _ in blocks
+            }
+            if len(ratios) > 1:
+                raise ValueError(f"{lattice}: site ratios differ between systems: {sorted(ratios)}")
+
+            g, l_values, rms = self.solve_joint(blocks)
+            print(f"{lattice}: {len(blocks)} systems fitted in one solve")
+
+            merged["lattices"][lattice] = {"G": g, "L": {}, "data": blocks[0][1]}
+            for k, (elements, data, _), l_block, r in zip(
+                members, blocks, l_values, rms, strict=True
+            ):
+                species = [el.upper() for el in elements]
+                fits[k]["lattices"][lattice] = {
+                    "G": {el: g[el] for el in species},
+                    "L": l_block,
+                    "data": data,
+                    "rms": r,
+                    "n_fit": len(data["energies"]),
+                }
+                merged["lattices"][lattice]["L"].update(l_block)
+
+        return fits, merged
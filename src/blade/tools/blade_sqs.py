@@ -12,6 +12,8 @@ from pymatgen.io.vasp import Poscar
 from sqsgenerator import optimize, parse_config, to_pymatgen
 from sqsgenerator.core import LogLevel
 
+from blade.tools.blade_atat_io import BladeAtatIO
+
 class BladeSQS:
     """
     Generate SQS inputs and run ATAT mcsqs for a given phase prototype.
@@ -202,13 +204,7 @@ class BladeSQS:
 
     @staticmethod
     def write_atat_str(path, coord_sys, supercell, coords, species):
-        with Path(path).open("w") as f:
-            for row in coord_sys:
-                f.write(" ".join(f"{x:.6f}" for x in row) + "\n")
-            for row in supercell:
-                f.write(" ".join(f"{x:.6f}" for x in row) + "\n")
-            for xyz, sp in zip(coords, species):
-                f.write(" ".join(f"{x:.6f}" for x in xyz) + f" {sp}\n")
+        BladeAtatIO.write_str(path, coord_sys, supercell, coords, species)
 
     @staticmethod
     def build_initial_template_str_from_poscar(poscar_path, output_path):
@@ -3,25 +3,48 @@
 """
 
 from pathlib import Path
+import csv
+import hashlib
+import io
+import json
 import shutil
 import os
 import subprocess
 import sys
-from itertools import permutations
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import permutations, product
 from math import prod
 
 import numpy as np
-from materialsframework.calculators import GraceCalculator as Calculator
+import pandas as pd
+from ase.io import read
 from materialsframework.tools.sqs2tdb import Sqs2tdb
+from pycalphad import Database
+from pycalphad import variables as v
 from pymatgen.core import Structure
 from pymatgen.io.vasp import Poscar
 
+from blade.tools.blade_atat_io import BladeAtatIO
+from blade.tools.blade_calculator import BladeCalculatorFactory
+from blade.tools.blade_endmember_store import BladeEndmemberStore
+from blade.tools.blade_manifest import BladeManifest
+from blade.tools.blade_relax import BladeRelax
+from blade.tools.blade_rk_fit import BladeRKFit
+
 
 class BladeTDBGen:
     """
 
     """
-    def __init__(self, phases, liquid, paths, composition_list, level, skip_existing=False):
+    # mole fractions at or below this are absent elements, as in `is_pure_endmember`
+    frac_tol = 1e-12
+    # comment, scale, three lattice vectors, species, counts and coordinate mode precede the sites
+    poscar_header_lines = 8
+    # x y z and the site label of a labelled POSCAR line
+    poscar_site_fields = 4
+
+    def __init__(self, phases, liquid, paths, composition_list, level, skip_existing=False, use_manifest=False):  # noqa: PLR0913 (workflow options)
         """
 
         """
@@ -32,6 +55,22 @@ class BladeTDBGen:
         self.composition_list = composition_list
         self.level = level
         self.skip_existing = skip_existing
+        self.relaxation_report = {}
+        self.excluded_cases = {}
+        self.manifest = None
+
+        if use_manifest:
+            self.manifest = BladeManifest(self.path2 / "blade_manifest.sqlite")
+            if self.manifest.is_empty():
+                self.manifest.rebuild(self.path2)
+
+    @staticmethod
+    def path_exists(path, manifest=None, is_dir=False):
+        if manifest is None:
+            return path.exists()
+        if is_dir:
+            return manifest.dir_exists(path)
+        return manifest.exists(path)
 
     @staticmethod
     def normalize_fractions(fractions, n_elements):
@@ -115,6 +154,7 @@ class BladeTDBGen:
         elements,
         workdir,
         default_supercell_size=(2, 2, 2),
+        manifest=None,
     ):
         phase_multiplicities = {}
 
@@ -130,7 +170,7 @@ class BladeTDBGen:
                     phase["generator_name"],
                 )
 
-                if not poscar_path.exists():
+                if not BladeTDBGen.path_exists(poscar_path, manifest):
                     continue
 
                 structure = Poscar.from_file(poscar_path).structure
@@ -194,99 +234,601 @@ class BladeTDBGen:
 
     @staticmethod
     def parse_atat_str(path):
-        lines = [line.rstrip() for line in Path(path).read_text().splitlines() if line.strip()]
-        if len(lines) < 7:
-            raise ValueError(f"{path} does not look like a valid ATAT str.out file")
-
-        coord_sys = np.array([[float(x) for x in lines[i].split()] for i in range(3)], dtype=float)
-        supercell = np.array([[float(x) for x in lines[i].split()] for i in range(3, 6)], dtype=float)
-
-        species = []
-        coords = []
-        for line in lines[6:]:
-            parts = line.split()
-            if len(parts) < 4:
-                continue
-            coords.append([float(parts[0]), float(parts[1]), float(parts[2])])
-            species.append(parts[3])
-
-        coords = np.array(coords, dtype=float)
-        return coord_sys, supercell, coords, species
+        return BladeAtatIO.read_str(path)
 
     @staticmethod
     def write_atat_str(path, coord_sys, supercell, coords, species):
-        with Path(path).open("w") as f:
-            for row in coord_sys:
-                f.write(" ".join(f"{x:.6f}" for x in row) + "\n")
-            for row in supercell:
-                f.write(" ".join(f"{x:.6f}" for x in row) + "\n")
-            for xyz, sp in zip(coords, species):
-                f.write(" ".join(f"{x:.6f}" for x in xyz) + f" {sp}\n")
+        BladeAtatIO.write_str(path, coord_sys, supercell, coords, species)
 
     @staticmethod
     def wrap_frac_near_reference(frac, ref_frac):
-        return frac - np.round(frac - ref_frac)
+        return BladeAtatIO.wrap_near_reference(frac, ref_frac)
 
     @staticmethod
     def write_relaxed_str_out_from_template(template_str, contcar, output_str):
-        coord_sys, supercell, template_coords, template_species = BladeTDBGen.parse_atat_str(template_str)
-        relaxed = Structure.from_file(contcar)
+        BladeAtatIO.write_relaxed_str_out_from_template(template_str, contcar, output_str)
 
-        relaxed_species = [site.species_string for site in relaxed]
-        if len(relaxed_species) != len(template_species):
-            raise ValueError("Template str.out and CONTCAR have different numbers of atoms")
+    @staticmethod
+    def fraction_distance(fractions_a, fractions_b):
+        return float(np.linalg.norm(np.asarray(fractions_a, dtype=float) - np.asarray(fractions_b, dtype=float)))
 
-        if relaxed_species != template_species:
-            raise ValueError("Species order in CONTCAR does not match template str.out")
+    @staticmethod
+    def composition_path(cases):
+        """
+        Order cases so that each composition follows its nearest predecessor.
 
-        supercell_inv = np.linalg.inv(supercell)
-        template_frac = template_coords @ supercell_inv
+        The walk starts at the first pure endmember (or the first case) and greedily visits the
+        closest remaining composition, so every relaxation can be seeded from a nearby finished one.
+        """
+        remaining = list(cases)
+        if not remaining:
+            return []
 
-        relaxed_frac = np.array(relaxed.frac_coords, dtype=float)
-        relaxed_frac_unwrapped = np.array(
-            [BladeTDBGen.wrap_frac_near_reference(f, r) for f, r in zip(relaxed_frac, template_frac)],
-            dtype=float,
+        start = next(
+            (case for case in remaining if BladeTDBGen.is_pure_endmember(case["fractions"])),
+            remaining[0],
         )
+        path = [start]
+        remaining.remove(start)
+
+        while remaining:
+            last = path[-1]["fractions"]
+            nearest = min(
+                remaining,
+                key=lambda case: BladeTDBGen.fraction_distance(case["fractions"], last),
+            )
+            path.append(nearest)
+            remaining.remove(nearest)
 
-        new_coords = relaxed_frac_unwrapped @ supercell
-        BladeTDBGen.write_atat_str(output_str, coord_sys, supercell, new_coords, template_species)
+        return path
 
     @staticmethod
-    def calculate_all_structures(s2t, cases, elements, phases, workdir):
-        for case in cases:
-            level = case["level"]
-            fractions = case["fractions"]
-            comp_name = BladeTDBGen.folder_name(elements, fractions, level)
+    def match_sites(frac_a, frac_b, tol=1e-3):
+        """
+        Return the index into `frac_b` for every site in `frac_a`, or None if the site lattices differ.
+        """
+        frac_a = np.asarray(frac_a, dtype=float)
+        frac_b = np.asarray(frac_b, dtype=float)
+        if frac_a.shape != frac_b.shape:
+            return None
 
-            for phase in phases:
-                folder = workdir / phase["lattice"] / comp_name
+        diff = frac_a[:, None, :] - frac_b[None, :, :]
+        diff -= np.round(diff)
+        dist = np.linalg.norm(diff, axis=-1)
+
+        order = np.argmin(dist, axis=1)
+        if np.any(dist[np.arange(len(order)), order] > tol):
+            return None
+        if len(np.unique(order)) != len(order):
+            return None
+        return order
+
+    @staticmethod
+    def write_warm_start_poscar(folder, source_folder, tol=1e-3):
+        """
+        Seed `folder/POSCAR` from the relaxed cell of `source_folder`.
+
+        The ideal SQS is kept as POSCAR.ideal. The relaxed cell deformation of the source is always
+        transferred; site displacements are transferred only when both SQS share the same site lattice.
+        Returns the warm-start mode, or None if the source cannot be used.
+        """
+        ideal_path = folder / "POSCAR.ideal"
+        if not ideal_path.exists():
+            shutil.copy2(folder / "POSCAR", ideal_path)
+
+        source_ideal_path = source_folder / "POSCAR.ideal"
+        if not source_ideal_path.exists():
+            source_ideal_path = source_folder / "POSCAR"
+
+        structure = Structure.from_file(ideal_path)
+        source_ideal = Structure.from_file(source_ideal_path)
+        source_relaxed = Structure.from_file(source_folder / "CONTCAR")
+
+        if len(source_ideal) != len(structure) or len(source_relaxed) != len(source_ideal):
+            return None
+
+        # ideal @ deformation = relaxed, applied to this structure's ideal cell
+        deformation = np.linalg.solve(source_ideal.lattice.matrix, source_relaxed.lattice.matrix)
+        lattice = np.array(structure.lattice.matrix, dtype=float) @ deformation
+        frac = np.array(structure.frac_coords, dtype=float)
+        mode = "cell"
+
+        order = BladeTDBGen.match_sites(frac, source_ideal.frac_coords, tol=tol)
+        if order is not None:
+            displacement = source_relaxed.frac_coords[order] - source_ideal.frac_coords[order]
+            displacement -= np.round(displacement)
+            frac = frac + displacement
+            mode = "cell+sites"
+
+        warm = Structure(
+            lattice=lattice,
+            species=[site.species_string for site in structure],
+            coords=frac,
+            coords_are_cartesian=False,
+        )
+        Poscar(warm).write_file(folder / "POSCAR")
+        return mode
+
+    @staticmethod
+    def calculate_all_structures(  # noqa: PLR0912, PLR0913, PLR0915 (one relax loop with all its options)
+        s2t,
+        cases,
+        elements,
+        phases,
+        workdir,
+        warm_start=False,
+        skip_folders=None,
+        manifest=None,
+        pre_stages=None,
+        retry=None,
+        retry_async=False,
+    ):
+        skip_folders = set(skip_folders or ())
+        stats = {"computed": 0, "reused": 0, "failed": 0, "recovered": 0, "failures": []}
 
-                if not (folder / "POSCAR").exists():
+        # ATAT folders are relative to the process cwd, so retries never run on a thread of this process:
+        # either one at a time after the main pass, or with `retry_async` in a subprocess per folder
+        retries = []
+        running = []
+
+        for phase in phases:
+            lattice_dir = workdir / phase["lattice"]
+            ordered_cases = BladeTDBGen.composition_path(cases) if warm_start else cases
+            finished = []
+            run_log = []
+
+            for case in ordered_cases:
+                level = case["level"]
+                fractions = case["fractions"]
+                comp_name = BladeTDBGen.folder_name(elements, fractions, level)
+                folder = lattice_dir / comp_name
+
+                if not BladeTDBGen.path_exists(folder / "POSCAR", manifest):
                     print(f"Skipping missing POSCAR in {folder}")
                     continue
 
+                if folder in skip_folders:
+                    print(f"Reusing existing results in {folder}")
+                    stats["reused"] += 1
+                    if BladeTDBGen.path_exists(folder / "CONTCAR", manifest):
+                        finished.append((fractions, folder))
+                    continue
+
+                log_entry = {"folder": comp_name, "fractions": list(fractions), "source": None, "mode": "ideal"}
+                run_log.append(log_entry)
+                error = None
+
                 try:
+                    if warm_start and finished:
+                        source_fractions, source_folder = min(
+                            finished,
+                            key=lambda item: BladeTDBGen.fraction_distance(item[0], fractions),
+                        )
+                        mode = BladeTDBGen.write_warm_start_poscar(folder, source_folder)
+                        if mode is not None:
+                            log_entry["source"] = source_folder.name
+                            log_entry["mode"] = mode
+                            print(f"Warm start for {folder} from {source_folder.name} ({mode})")
+
+                    relax_log = []
+                    if pre_stages:
+                        print(f"\nPre-relaxing {folder}")
+                        relax_log = BladeRelax.relax_folder(folder, pre_stages)
+
                     print(f"\nCalculating {folder}")
-                    s2t._calculate(folder)
+                    start = time.perf_counter()
+                    with BladeRelax.count_evaluations(getattr(s2t, "calculator", None)) as counter:
+                        s2t._calculate(folder)
+                    wall_time = time.perf_counter() - start
+
+                    if pre_stages:
+                        relax_log.append(
+                            {
+                                "name": "production",
+                                "fmax": getattr(s2t, "fmax", None),
+                                "evaluations": counter["evaluations"],
+                                "energy": BladeRelax.read_energy(folder),
+                                "wall_time": wall_time,
+                            }
+                        )
+                        BladeRelax.write_log(folder, relax_log)
 
-                    template_str = folder / "str_template.out"
                     contcar = folder / "CONTCAR"
-                    str_out = folder / "str.out"
+                    BladeTDBGen.write_str_out(folder)
 
-                    if template_str.exists() and contcar.exists():
-                        BladeTDBGen.write_relaxed_str_out_from_template(template_str, contcar, str_out)
-                        print(f"Wrote str.out in {folder}")
+                    if contcar.exists():
+                        finished.append((fractions, folder))
+                        stats["computed"] += 1
                     else:
-                        print(f"Missing template or CONTCAR in {folder}")
+                        error = "no CONTCAR written"
+
+                    if manifest is not None:
+                        manifest.record_folder(
+                            folder,
+                            stage="relaxed",
+                            status="ok" if contcar.exists() else "failed",
+                            wall_time=wall_time,
+                        )
 
                     print("Files now in folder:")
-                    print(sorted(p.name for p in folder.iterdir()))
+                    if manifest is not None:
+                        print(manifest.list_files(folder))
+                    else:
+                        print(sorted(p.name for p in folder.iterdir()))
 
                 except Exception as exc:
+                    error = str(exc)
+                    log_entry["error"] = error
                     print(f"Failed calculation for {folder}: {exc}")
+                    if manifest is not None:
+                        manifest.record_folder(folder, stage="relaxed", status="failed")
+
+                if error is None:
+                    continue
+
+                if retry and retry_async:
+                    print(f"Retrying {folder} in a subprocess")
+                    running.append((folder, error, BladeTDBGen.start_retry_process(folder, s2t, retry)))
+                elif retry:
+                    print(f"Scheduling retries for {folder}")
+                    retries.append((folder, error))
+                else:
+                    stats["failed"] += 1
+                    stats["failures"].append({"folder": str(folder), "attempts": 1, "status": "failed", "error": error})
+
+            if warm_start and lattice_dir.exists():
+                (lattice_dir / "relax_path.json").write_text(json.dumps(run_log, indent=2))
+
+        finished = [
+            (folder, first_error, BladeTDBGen.retry_result(folder, process))
+            for folder, first_error, process in running
+        ]
+        finished += [
+            (folder, first_error, BladeTDBGen.retry_folder(folder, s2t, retry)) for folder, first_error in retries
+        ]
+
+        for folder, first_error, outcome in finished:
+            outcome["first_error"] = first_error
+            stats["failures"].append(outcome)
+
+            if outcome["status"] == "recovered":
+                stats["computed"] += 1
+                stats["recovered"] += 1
+            else:
+                stats["failed"] += 1
+
+            if manifest is not None:
+                manifest.record_folder(
+                    folder,
+                    stage="relaxed",
+                    status="ok" if outcome["status"] == "recovered" else "failed",
+                )
+
+        failures_path = workdir / "failures.csv"
+        if stats["failures"]:
+            BladeTDBGen.write_failure_summary(stats["failures"], failures_path)
+        elif failures_path.exists():
+            failures_path.unlink()
+
+        return stats
+
+    @staticmethod
+    def write_str_out(folder):
+        template_str = folder / "str_template.out"
+        contcar = folder / "CONTCAR"
+        str_out = folder / "str.out"
+
+        if template_str.exists() and contcar.exists():
+            BladeTDBGen.write_relaxed_str_out_from_template(template_str, contcar, str_out)
+            print(f"Wrote str.out in {folder}")
+            return True
+
+        print(f"Missing template or CONTCAR in {folder}")
+        return False
+
+    @staticmethod
+    def retry_ladder(params):
+        """
+        Return the retry escalation ladder configured in `params["retry"]`.
+
+        `params["retry"]` may be True for the default ladder or a list of rungs. Each rung may set
+        `optimizer`, `pre_fmax`, `maxstep` and `steps` for an ASE pre-relaxation ahead of the production
+        relaxation, and `device` to move the retry to another device.
+        """
+        retry = params.get("retry")
+        if not retry:
+            return None
+        if retry is True:
+            retry = [
+                {"optimizer": "BFGS"},
+                {"pre_fmax": 1e-1},
+                {"optimizer": "FIRE", "maxstep": 0.05},
+                {"device": "cpu"},
+            ]
+
+        calculator = {
+            "device": BladeCalculatorFactory.device_of(params),
+            "model": params.get("model"),
+            "dtype": params.get("dtype"),
+        }
+        return [{**calculator, **rung} for rung in retry]
+
+    @staticmethod
+    def start_retry_process(folder, s2t, ladder):
+        """
+        Start `retry_folder` for one folder in a subprocess with the folder as its working directory.
+
+        The subprocess loads its own calculator, so a rung on the main device needs room for a second model.
+        Output goes to `retry.log` and the failure-summary row to `retry.json` in the folder.
+        """
+        folder = Path(folder).resolve()
+        retry_cmd = (
+            "import json, sys; "
+            "from pathlib import Path; "
+            "from types import SimpleNamespace; "
+            "from blade.tools.blade_tdb_gen import BladeTDBGen; "
+            "s2t = SimpleNamespace(fmax=float(sys.argv[1]), verbose=sys.argv[2] == 'True'); "
+            "outcome = BladeTDBGen.retry_folder(Path.cwd(), s2t, json.loads(sys.argv[3])); "
+            "Path('retry.json').write_text(json.dumps(outcome))"
+        )
+        (folder / "retry.json").unlink(missing_ok=True)
+
+        # the child sees the same import path even though it starts in the case folder
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(path for path in sys.path if path)}
+
+        with (folder / "retry.log").open("w") as log:
+            return subprocess.Popen(
+                [
+                    sys.executable,
+                    "-c",
+                    retry_cmd,
+                    str(getattr(s2t, "fmax", 1e-4)),
+                    str(getattr(s2t, "verbose", True)),
+                    json.dumps(ladder),
+                ],
+                cwd=folder,
+                env=env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+
+    @staticmethod
+    def retry_result(folder, process):
+        process.wait()
+        result_path = Path(folder) / "retry.json"
+        if not result_path.exists():
+            error = f"retry process exited with code {process.returncode}, see retry.log"
+            return {"folder": str(folder), "status": "failed", "attempts": 0, "rung": None, "error": error}
+
+        outcome = json.loads(result_path.read_text())
+        outcome["folder"] = str(folder)
+        return outcome
+
+    @staticmethod
+    def retry_folder(folder, s2t, ladder):
+        """
+        Retry one failed relaxation, escalating through `ladder` until one rung succeeds.
+
+        Every attempt restarts from the ideal SQS. In-process retries run one at a time after the main
+        relaxation loop and share the cached calculator of their rung's settings; `start_retry_process`
+        runs the same ladder in a subprocess next to the main loop.
+
+        Returns:
+            dict: Failure-summary row with `folder`, `status` ("recovered" or "failed"), `attempts`, the
+                successful `rung` and the last `error`.
+        """
+        error = None
+        fmax = getattr(s2t, "fmax", 1e-4)
+        verbose = getattr(s2t, "verbose", True)
+
+        for attempt, rung in enumerate(ladder, start=1):
+            try:
+                if (folder / "POSCAR.ideal").exists():
+                    shutil.copy2(folder / "POSCAR.ideal", folder / "POSCAR")
+                for name in ["CONTCAR", "energy"]:
+                    if (folder / name).exists():
+                        (folder / name).unlink()
+
+                calculator = BladeCalculatorFactory.get(
+                    device=rung.get("device", "cuda"),
+                    model=rung.get("model"),
+                    dtype=rung.get("dtype"),
+                )
+
+                if any(key in rung for key in ["optimizer", "pre_fmax", "maxstep"]):
+                    BladeRelax.relax_folder(
+                        folder,
+                        [
+                            {
+                                "name": f"retry{attempt}",
+                                "calculator": calculator,
+                                "fmax": rung.get("pre_fmax", 5e-2),
+                                "steps": rung.get("steps", 500),
+                                "optimizer": rung.get("optimizer", "FIRE"),
+                                "maxstep": rung.get("maxstep"),
+                            }
+                        ],
+                    )
+
+                print(f"Retry {attempt} for {folder}: {rung}")
+                Sqs2tdb(fmax=fmax, verbose=verbose, calculator=calculator)._calculate(folder)
+
+                if (folder / "CONTCAR").exists() and BladeTDBGen.write_str_out(folder):
+                    return {"folder": str(folder), "status": "recovered", "attempts": attempt, "rung": rung, "error": None}
+
+                error = "no CONTCAR written"
+            except Exception as exc:
+                error = str(exc)
+                print(f"Retry {attempt} failed for {folder}: {exc}")
+
+        return {"folder": str(folder), "status": "failed", "attempts": len(ladder), "rung": None, "error": error}
+
+    @staticmethod
+    def write_failure_summary(failures, path):
+        print("\nFailure summary:")
+        print(f"{'status':<10} {'attempts':>8}  folder")
+        for row in failures:
+            print(f"{row['status']:<10} {row['attempts']:>8}  {row['folder']}")
+
+        columns = ["folder", "status", "attempts", "rung", "first_error", "error"]
+        with Path(path).open("w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            for row in failures:
+                writer.writerow({key: row.get(key, "") for key in columns})
+
+    @staticmethod
+    def endmember_element(elements, fractions, tol=1e-12):
+        for el, frac in zip(elements, fractions, strict=True):
+            if abs(frac) > tol:
+                return el
+        return None
+
+    @staticmethod
+    def materialize_endmembers(  # noqa: PLR0913 (fit_tdb inputs)
+        store,
+        cases,
+        elements,
+        phases,
+        workdir,
+        default_supercell_size=(2, 2, 2),
+        manifest=None,
+    ):
+        reused = set()
+
+        for case in cases:
+            if not BladeTDBGen.is_pure_endmember(case["fractions"]):
+                continue
+
+            element = BladeTDBGen.endmember_element(elements, case["fractions"])
+            comp_name = BladeTDBGen.folder_name(elements, case["fractions"], case["level"])
+
+            for phase in phases:
+                folder = workdir / phase["lattice"] / comp_name
+                supercell_size = BladeTDBGen.get_phase_supercell_size(phase, default_supercell_size)
+
+                if not BladeTDBGen.path_exists(folder / "POSCAR", manifest):
+                    continue
+
+                if store.materialize(element, phase["lattice"], supercell_size, folder):
+                    print(f"Materialized stored endmember {element} {phase['lattice']} into {folder}")
+                    reused.add(folder)
+
+        return reused
+
+    @staticmethod
+    def publish_endmembers(store, cases, elements, phases, workdir, default_supercell_size=(2, 2, 2)):  # noqa: PLR0913 (fit_tdb inputs)
+        for case in cases:
+            if not BladeTDBGen.is_pure_endmember(case["fractions"]):
+                continue
+
+            element = BladeTDBGen.endmember_element(elements, case["fractions"])
+            comp_name = BladeTDBGen.folder_name(elements, case["fractions"], case["level"])
+
+            for phase in phases:
+                folder = workdir / phase["lattice"] / comp_name
+                supercell_size = BladeTDBGen.get_phase_supercell_size(phase, default_supercell_size)
+
+                if store.has(element, phase["lattice"], supercell_size):
+                    continue
+
+                if store.publish(element, phase["lattice"], supercell_size, folder):
+                    print(f"Stored endmember {element} {phase['lattice']} from {folder}")
+
+    def reuse_subsystem_cases(self, cases, elements, phases, workdir, params):
+        """
+        Copy relaxed lower-order cases, e.g. the binary cases of a ternary, from their own workdirs.
+
+        A sub-system case is only reused when the provenance of its system records it and was written with
+        the same calculation settings. Folders that already hold the same files are not copied again.
+
+        Returns:
+            set[Path]: Case folders of this system that hold reused results.
+        """
+        required = ["POSCAR", "energy", "CONTCAR", "str.out", "force.out", "stress.out"]
+        # compared in their JSON form, as read back from the provenance files
+        settings = json.loads(json.dumps(BladeTDBGen.calculation_settings(params), default=str))
+        reused = set()
+        sub_provenance = {}
+
+        for case in cases:
+            fractions = case["fractions"]
+            nonzero = [i for i, frac in enumerate(fractions) if abs(frac) > BladeTDBGen.frac_tol]
+
+            # endmembers are handled by the endmember store; full-order cases have no sub-system
+            if len(nonzero) <= 1 or len(nonzero) == len(elements):
+                continue
+
+            sub_elements = [elements[i] for i in nonzero]
+            sub_fractions = [fractions[i] for i in nonzero]
+            sub_workdir = self.get_composition_dir(sub_elements)
+
+            key = "-".join(sub_elements)
+            if key not in sub_provenance:
+                path = self.get_provenance_path(sub_elements)
+                sub_provenance[key] = json.loads(path.read_text()) if path.exists() else {}
+            stored = sub_provenance[key]
+            if stored.get("calculation") != settings:
+                continue
+            comp_name = BladeTDBGen.folder_name(elements, fractions, case["level"])
+            sub_comp_name = BladeTDBGen.folder_name(sub_elements, sub_fractions, case["level"])
+
+            for phase in phases:
+                src = sub_workdir / phase["lattice"] / sub_comp_name
+                dst = workdir / phase["lattice"] / comp_name
+
+                if not BladeTDBGen.path_exists(dst / "POSCAR", self.manifest):
+                    continue
+                if stored.get("cases", {}).get(f"{phase['lattice']}/{sub_comp_name}") is None:
+                    continue
+
+                if self.manifest is not None:
+                    if self.manifest.missing_files(src, required):
+                        continue
+                elif not all((src / name).exists() for name in required):
+                    continue
+
+                # copy2 keeps mtimes, so a folder reused on an earlier run matches its source
+                files = [path for path in src.iterdir() if path.is_file()]
+                if any(not BladeTDBGen.same_file(path, dst / path.name) for path in files):
+                    for path in files:
+                        shutil.copy2(path, dst / path.name)
+                    print(f"Reusing sub-system result {src} -> {dst}")
+
+                reused.add(dst)
+
+        return reused
+
+    @staticmethod
+    def same_file(path, other):
+        if not other.exists():
+            return False
+        stat, other_stat = path.stat(), other.stat()
+        return stat.st_size == other_stat.st_size and stat.st_mtime_ns == other_stat.st_mtime_ns
+
+    def print_relaxation_report(self):
+        if not self.relaxation_report:
+            return
+
+        print("\nRelaxation report:")
+        print(f"{'system':<20} {'endmember':>10} {'subsystem':>10} {'computed':>10} {'failed':>10}")
+        totals = {"endmember": 0, "subsystem": 0, "computed": 0, "failed": 0}
+
+        for system, counts in self.relaxation_report.items():
+            print(
+                f"{system:<20} {counts['endmember']:>10} {counts['subsystem']:>10} "
+                f"{counts['computed']:>10} {counts['failed']:>10}"
+            )
+            for key in totals:
+                totals[key] += counts[key]
+
+        print(
+            f"{'total':<20} {totals['endmember']:>10} {totals['subsystem']:>10} "
+            f"{totals['computed']:>10} {totals['failed']:>10}"
+        )
 
     @staticmethod
-    def check_required_files(cases, elements, phases, workdir):
+    def check_required_files(cases, elements, phases, workdir, manifest=None):
         required = ["POSCAR", "energy", "CONTCAR", "str.out", "force.out", "stress.out"]
         missing_any = False
 
@@ -297,7 +839,10 @@ class BladeTDBGen:
 
             for phase in phases:
                 folder = workdir / phase["lattice"] / comp_name
-                missing = [name for name in required if not (folder / name).exists()]
+                if manifest is not None:
+                    missing = manifest.missing_files(folder, required)
+                else:
+                    missing = [name for name in required if not (folder / name).exists()]
 
                 if missing:
                     missing_any = True
@@ -306,11 +851,37 @@ class BladeTDBGen:
         return not missing_any
 
     @staticmethod
-    def run_fit_model(elements, phases, sqsgen_levels, params):
+    def incomplete_folders(cases, elements, phases, workdir, manifest=None):
+        required = ["POSCAR", "energy", "CONTCAR", "str.out", "force.out", "stress.out"]
+        incomplete = []
+
+        for case in cases:
+            comp_name = BladeTDBGen.folder_name(elements, case["fractions"], case["level"])
+
+            for phase in phases:
+                folder = workdir / phase["lattice"] / comp_name
+                if manifest is not None:
+                    missing = manifest.missing_files(folder, required)
+                else:
+                    missing = [name for name in required if not (folder / name).exists()]
+
+                if missing:
+                    incomplete.append(folder)
+
+        return incomplete
+
+    @staticmethod
+    def run_fit_model(elements, phases, sqsgen_levels, params, cwd=None):
+        calculator_params = {
+            "calculator": BladeCalculatorFactory.device_of(params),
+            "model": params.get("model"),
+            "dtype": params.get("dtype"),
+        }
         fit_cmd = (
             "from materialsframework.tools.sqs2tdb import Sqs2tdb; "
-            "from materialsframework.calculators import GraceCalculator as Calculator; "
-            f"s=Sqs2tdb(fmax={params['fmax']}, verbose={params['verbose']}, calculator=Calculator(device='{params['calculator']}')); "
+            "from blade.tools.blade_calculator import BladeCalculatorFactory; "
+            f"s=Sqs2tdb(fmax={params['fmax']}, verbose={params['verbose']}, "
+            f"calculator=BladeCalculatorFactory.from_params({calculator_params!r})); "
             f"s.species={elements!r}; "
             f"s.lattices={[phase['lattice'] for phase in phases]!r}; "
             f"s.level={max(entry['level'] for entry in sqsgen_levels)!r}; "
@@ -320,7 +891,7 @@ class BladeTDBGen:
             f"s.bv={params['bv']}; "
             f"s.phonon={params['phonon']}; "
             f"s.open_calphad={params['open_calphad']}; "
-            f"s.terms={params['terms']}; "
+            f"s.terms={params['terms']!r}; "
             "s._fit_model()"
         )
 
@@ -328,6 +899,7 @@ class BladeTDBGen:
             [sys.executable, "-c", fit_cmd],
             capture_output=True,
             text=True,
+            cwd=cwd,
         )
 
         print("\n_fit_model return code:", result.returncode)
@@ -366,50 +938,56 @@ class BladeTDBGen:
         return text
 
     @staticmethod
-    def _rewrite_folder_labels_to_elements(folder, elements):
+    def _poscar_text_to_elements(text, elements):
         label_to_element = {chr(ord("a") + i): elements[i] for i in range(len(elements))}
+        text = BladeTDBGen._replace_variable_labels_in_text(text, elements)
+        lines = text.splitlines()
 
-        for fname in ["POSCAR", "str_template.out", "str.out", "species.in"]:
-            path = folder / fname
-            if not path.exists():
-                continue
+        if len(lines) >= BladeTDBGen.poscar_header_lines:
+            atom_lines = lines[BladeTDBGen.poscar_header_lines:]
 
-            text = path.read_text()
-            text = BladeTDBGen._replace_variable_labels_in_text(text, elements)
+            grouped = {}
+            species_order = []
 
-            if fname == "POSCAR":
-                lines = text.splitlines()
+            for line in atom_lines:
+                parts = line.split()
+                if len(parts) < BladeTDBGen.poscar_site_fields:
+                    continue
 
-                if len(lines) >= 8:
-                    atom_lines = lines[8:]
+                coords = parts[:-1]
+                sp = parts[-1]
+                sp = label_to_element.get(sp, sp)
 
-                    grouped = {}
-                    species_order = []
+                if sp not in grouped:
+                    grouped[sp] = []
+                    species_order.append(sp)
 
-                    for line in atom_lines:
-                        parts = line.split()
-                        if len(parts) < 4:
-                            continue
+                grouped[sp].append(" ".join(coords + [sp]))
 
-                        coords = parts[:-1]
-                        sp = parts[-1]
-                        sp = label_to_element.get(sp, sp)
+            new_atom_lines = []
+            for sp in species_order:
+                new_atom_lines.extend(grouped[sp])
 
-                        if sp not in grouped:
-                            grouped[sp] = []
-                            species_order.append(sp)
+            lines[5] = " ".join(species_order)
+            lines[6] = " ".join(str(len(grouped[sp])) for sp in species_order)
+            lines = lines[:8] + new_atom_lines
 
-                        grouped[sp].append(" ".join(coords + [sp]))
+            text = "\n".join(lines) + "\n"
 
-                    new_atom_lines = []
-                    for sp in species_order:
-                        new_atom_lines.extend(grouped[sp])
+        return text
 
-                    lines[5] = " ".join(species_order)
-                    lines[6] = " ".join(str(len(grouped[sp])) for sp in species_order)
-                    lines = lines[:8] + new_atom_lines
+    @staticmethod
+    def _rewrite_folder_labels_to_elements(folder, elements):
+        for fname in ["POSCAR", "str_template.out", "str.out", "species.in"]:
+            path = folder / fname
+            if not path.exists():
+                continue
 
-                    text = "\n".join(lines) + "\n"
+            text = path.read_text()
+            if fname == "POSCAR":
+                text = BladeTDBGen._poscar_text_to_elements(text, elements)
+            else:
+                text = BladeTDBGen._replace_variable_labels_in_text(text, elements)
 
             path.write_text(text)
 
@@ -424,7 +1002,7 @@ class BladeTDBGen:
             dst_phase_dir = workdir / lattice
             dst_phase_dir.mkdir(parents=True, exist_ok=True)
 
-            if not src_phase_dir.exists():
+            if not BladeTDBGen.path_exists(src_phase_dir, self.manifest, is_dir=True):
                 print(f"Missing SQS source phase directory: {src_phase_dir}")
                 continue
 
@@ -438,18 +1016,21 @@ class BladeTDBGen:
                 dst_case_name = BladeTDBGen.folder_name(elements, fractions, level)
                 dst = dst_phase_dir / dst_case_name
 
-                if not src.exists():
+                if not BladeTDBGen.path_exists(src, self.manifest):
                     print(f"Missing SQS source folder: {src}")
                     continue
 
-                if not dst.exists():
+                # labels are rewritten only on a fresh copy; an existing folder may hold a relaxed POSCAR
+                if not BladeTDBGen.path_exists(dst, self.manifest):
                     shutil.copytree(src, dst)
+                    BladeTDBGen._rewrite_folder_labels_to_elements(dst, elements)
 
-                BladeTDBGen._rewrite_folder_labels_to_elements(dst, elements)
+                if self.manifest is not None:
+                    self.manifest.record_folder(dst)
 
                 # also copy one top-level POSCAR for multiplicity inference
                 src_poscar = src / "POSCAR"
-                if src_poscar.exists():
+                if BladeTDBGen.path_exists(src_poscar, self.manifest):
                     top_poscar = workdir / BladeTDBGen.poscar_filename(
                         elements,
                         fractions,
@@ -468,7 +1049,20 @@ class BladeTDBGen:
 
                     top_poscar.write_text(text)
 
-    def fit_tdb(self, cases, elements, phases, workdir, sqsgen_levels, params, default_supercell_size=(2, 2, 2)):
+                    if self.manifest is not None:
+                        self.manifest.record_file(top_poscar)
+
+    def fit_tdb(  # noqa: PLR0911, PLR0912, PLR0913, PLR0915 (each fitter and failure path exits here)
+        self,
+        cases,
+        elements,
+        phases,
+        workdir,
+        sqsgen_levels,
+        params,
+        default_supercell_size=(2, 2, 2),
+        skip_folders=None,
+    ):
         self.copy_sqs_folders_into_workdir(cases, elements, phases, workdir)
 
         BladeTDBGen.write_species_in(workdir, elements, phases)
@@ -479,6 +1073,7 @@ class BladeTDBGen:
             elements=elements,
             workdir=workdir,
             default_supercell_size=default_supercell_size,
+            manifest=self.manifest,
         )
         BladeTDBGen.write_mult_in(workdir, phase_multiplicities)
         BladeTDBGen.write_terms_in(workdir, phases, terms=None)
@@ -486,19 +1081,75 @@ class BladeTDBGen:
         s2t = Sqs2tdb(
             fmax=params['fmax'],
             verbose=params['verbose'],
-            calculator=Calculator(device=params['calculator']),
+            calculator=BladeCalculatorFactory.from_params(params),
         )
 
-        BladeTDBGen.calculate_all_structures(s2t, cases, elements, phases, workdir)
+        store = None
+        reused_endmembers = set()
+        if params.get("endmember_store", False):
+            store = BladeEndmemberStore(self.path2 / "endmembers", params)
+            reused_endmembers = BladeTDBGen.materialize_endmembers(
+                store, cases, elements, phases, workdir, default_supercell_size, self.manifest
+            )
+
+        reused_subsystem = self.reuse_subsystem_cases(cases, elements, phases, workdir, params)
+
+        if self.manifest is not None:
+            for folder in reused_endmembers | reused_subsystem:
+                self.manifest.record_folder(folder)
+
+        stats = BladeTDBGen.calculate_all_structures(
+            s2t,
+            cases,
+            elements,
+            phases,
+            workdir,
+            warm_start=params.get("warm_start", False),
+            skip_folders=reused_endmembers | reused_subsystem | set(skip_folders or ()),
+            manifest=self.manifest,
+            pre_stages=BladeRelax.tiers_from_params(params) + BladeRelax.schedule_from_params(params),
+            retry=BladeTDBGen.retry_ladder(params),
+            retry_async=params.get("retry_async", False),
+        )
+
+        self.relaxation_report["-".join(elements)] = {
+            "endmember": len(reused_endmembers),
+            "subsystem": len(reused_subsystem),
+            "computed": stats["computed"],
+            "failed": stats["failed"],
+        }
+
+        if store is not None:
+            BladeTDBGen.publish_endmembers(store, cases, elements, phases, workdir, default_supercell_size)
 
         fit_cases = [case for case in cases if not BladeTDBGen.is_pure_endmember(case["fractions"])]
 
         print("\nChecking required files...")
-        all_good = BladeTDBGen.check_required_files(fit_cases, elements, phases, workdir)
+        all_good = BladeTDBGen.check_required_files(fit_cases, elements, phases, workdir, self.manifest)
+        incomplete = []
+        self.excluded_cases["-".join(elements)] = set()
 
         if not all_good:
-            print("\nAborting fit because some folders are missing required files.")
-            return
+            if not params.get("partial_fit", False):
+                print("\nAborting fit because some folders are missing required files.")
+                return
+
+            # fall back to fitting without the folders that could not be completed
+            incomplete = BladeTDBGen.incomplete_folders(fit_cases, elements, phases, workdir, self.manifest)
+            for phase in phases:
+                lattice_dir = workdir / phase["lattice"]
+                n_complete = sum(
+                    1
+                    for case in fit_cases
+                    if lattice_dir / BladeTDBGen.folder_name(elements, case["fractions"], case["level"])
+                    not in incomplete
+                )
+                if n_complete == 0:
+                    print(f"\nAborting fit because no {phase['lattice']} folder is complete.")
+                    return
+
+            print(f"\nFitting without {len(incomplete)} incomplete folders.")
+            self.excluded_cases["-".join(elements)] = {f"{folder.parent.name}/{folder.name}" for folder in incomplete}
 
         print("\nPhase multiplicities:")
         for lattice, mult in phase_multiplicities.items():
@@ -532,6 +1183,17 @@ class BladeTDBGen:
         tdb_path = workdir / tdb_name
         moved = []
 
+        if params.get("fitter", "sqs2tdb") == "native":
+            tdb_path = BladeRKFit.from_params(params).fit_system(
+                workdir, elements, s2t.lattices, tdb_path, exclude=incomplete
+            )
+            if tdb_path is None:
+                print("\nNative fit failed: no relaxed SQS energies found.")
+                return None
+
+            print(f"\nGenerated TDB: {tdb_path}")
+            return tdb_path
+
         try:
             os.chdir(workdir)
 
@@ -547,6 +1209,13 @@ class BladeTDBGen:
                             src.rename(dst)
                             moved.append((dst, src))
 
+            for folder in incomplete:
+                src = Path(folder.parent.name) / folder.name
+                if src.exists():
+                    dst = Path(folder.parent.name) / f"__skip__{folder.name}"
+                    src.rename(dst)
+                    moved.append((dst, src))
+
             fit_success = BladeTDBGen.run_fit_model(elements, phases, sqsgen_levels, params)
 
             if not fit_success:
@@ -575,8 +1244,621 @@ class BladeTDBGen:
 
         if tdb_path.exists():
             print(f"\nGenerated TDB: {tdb_path}")
+            return tdb_path
+
+        print(f"\nTDB was not created: {tdb_path}")
+        return None
+
+    @staticmethod
+    def prepare_fit_dir(fit_cases, elements, phases, workdir, fit_dir, optional_cases=()):  # noqa: PLR0913 (fit_tdb inputs)
+        if fit_dir.exists():
+            shutil.rmtree(fit_dir)
+
+        for phase in phases:
+            lattice = phase["lattice"]
+            src_lattice_dir = workdir / lattice
+            dst_lattice_dir = fit_dir / lattice
+            dst_lattice_dir.mkdir(parents=True, exist_ok=True)
+
+            for name in ["species.in", "mult.in", "terms.in"]:
+                if (src_lattice_dir / name).exists():
+                    shutil.copy2(src_lattice_dir / name, dst_lattice_dir / name)
+
+            # endmember folders are left out, as fit_tdb hides them from the fit
+            for case in fit_cases:
+                comp_name = BladeTDBGen.folder_name(elements, case["fractions"], case["level"])
+                shutil.copytree(src_lattice_dir / comp_name, dst_lattice_dir / comp_name)
+
+            for case in optional_cases:
+                comp_name = BladeTDBGen.folder_name(elements, case["fractions"], case["level"])
+                if (src_lattice_dir / comp_name).is_dir():
+                    shutil.copytree(src_lattice_dir / comp_name, dst_lattice_dir / comp_name)
+
+    @staticmethod
+    def variant_name(variant, index):
+        return str(variant.get("name", f"variant{index}"))
+
+    def fit_variant(self, fit_cases, elements, phases, workdir, sqsgen_levels, params, name):  # noqa: PLR0913 (fit_tdb inputs)
+        workdir = workdir.resolve()
+        fit_dir = workdir / "fits" / name
+        tdb_name = BladeTDBGen.get_tdb_name(elements)
+
+        native = params.get("fitter", "sqs2tdb") == "native"
+
+        # the native fitter takes its G parameters from the endmember folders, so they are copied too
+        endmembers = []
+        if native:
+            cases = BladeTDBGen.expand_all_cases(sqsgen_levels, elements)
+            endmembers = [case for case in cases if BladeTDBGen.is_pure_endmember(case["fractions"])]
+        BladeTDBGen.prepare_fit_dir(fit_cases, elements, phases, workdir, fit_dir, optional_cases=endmembers)
+
+        if params.get("terms") is not None:
+            BladeTDBGen.write_terms_in(fit_dir, phases, terms=params["terms"])
+
+        if native:
+            lattices = [phase["lattice"] for phase in phases]
+            if BladeRKFit.from_params(params).fit_system(fit_dir, elements, lattices, fit_dir / tdb_name) is None:
+                print(f"Fit variant {name} for {elements}: no relaxed SQS energies found")
+                return None
+        elif not BladeTDBGen.run_fit_model(elements, phases, sqsgen_levels, params, cwd=fit_dir):
+            print(f"Fit variant {name} for {elements}: _fit_model() failed")
+            return None
+        else:
+            result = subprocess.run(
+                ["sqs2tdb", "-tdb"], capture_output=True, text=True, cwd=fit_dir, check=False
+            )
+            if result.returncode != 0 or not (fit_dir / tdb_name).exists():
+                print(f"Fit variant {name} for {elements}: TDB was not created")
+                print(result.stderr)
+                return None
+
+        tdb_path = workdir / f"{Path(tdb_name).stem}__{name}.tdb"
+        shutil.copy2(fit_dir / tdb_name, tdb_path)
+        print(f"Generated TDB for variant {name}: {tdb_path}")
+        return tdb_path
+
+    def refit_composition(self, sqsgen_levels, elements, phase_dicts, params, param_variants, max_workers=None):  # noqa: PLR0913 (run_workflow inputs)
+        workdir = self.get_composition_dir(elements)
+        cases = BladeTDBGen.expand_all_cases(sqsgen_levels, elements)
+        fit_cases = [case for case in cases if not BladeTDBGen.is_pure_endmember(case["fractions"])]
+
+        print(f"\nRefitting composition: {elements}")
+        print("Checking required files...")
+        if not BladeTDBGen.check_required_files(fit_cases, elements, phase_dicts, workdir, self.manifest):
+            print(f"Skipping refit of {elements} because some folders are missing required files.")
+            return {}
+
+        variants = [
+            (BladeTDBGen.variant_name(variant, i), {**params, **variant})
+            for i, variant in enumerate(param_variants)
+        ]
+
+        # each fit runs in its own directory through subprocesses, so threads are sufficient
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                name: pool.submit(
+                    self.fit_variant,
+                    fit_cases,
+                    elements,
+                    phase_dicts,
+                    workdir,
+                    sqsgen_levels,
+                    variant_params,
+                    name,
+                )
+                for name, variant_params in variants
+            }
+
+        return {name: future.result() for name, future in futures.items()}
+
+    def refit_all_compositions(self, sqsgen_levels, phase_dicts, params, param_variants, max_workers=None):
+        results = {}
+
+        for comp in self.composition_list:
+            elements = list(comp)
+
+            try:
+                results["-".join(elements)] = self.refit_composition(
+                    sqsgen_levels=sqsgen_levels,
+                    elements=elements,
+                    phase_dicts=phase_dicts,
+                    params=params,
+                    param_variants=param_variants,
+                    max_workers=max_workers,
+                )
+            except Exception as exc:
+                print(f"Refit failed for composition {elements}: {exc}")
+
+        return results
+
+    def fit_all_jointly(self, phase_dicts, params, merged_name="MERGED.tdb"):
+        """
+        Fit every binary in `composition_list` with one sparse solve per lattice.
+
+        The relaxed SQS folders must already exist (e.g. from `run_all_compositions`). Writes a
+        `<A>_<B>_joint.tdb` into each composition directory, next to and never replacing the per-system
+        TDB and its provenance, and a merged database of all binaries to `<path2>/<merged_name>`.
+
+        Returns:
+            Path | None: The merged TDB, or None if nothing could be fit.
+        """
+        systems = [
+            {"workdir": self.get_composition_dir(list(comp)), "elements": list(comp)}
+            for comp in self.composition_list
+            if len(comp) == BladeRKFit.BINARY and self.get_composition_dir(list(comp)).is_dir()
+        ]
+        if not systems:
+            print("No binary compositions with results to fit.")
+            return None
+
+        fitter = BladeRKFit.from_params(params)
+        fits, merged = fitter.fit_joint(systems, [phase["lattice"] for phase in phase_dicts])
+
+        for fit in fits:
+            if not fit["lattices"]:
+                print(f"No relaxed SQS energies for {fit['elements']}")
+                continue
+            tdb_path = fitter.write_tdb(self.get_joint_tdb_path(fit["elements"]), fit)
+            print(f"Generated TDB: {tdb_path}")
+
+        if not merged["lattices"]:
+            return None
+
+        merged_path = fitter.write_tdb(self.path2 / merged_name, merged)
+        print(f"Generated merged TDB: {merged_path}")
+        return merged_path
+
+    def screening_structures(self, cases, elements, phases):
+        """
+        Read the ideal SQS structure of every case straight from the SQS sources.
+
+        The variable labels are replaced by `elements` in memory, so nothing is copied into the workdir of a
+        system that may not be promoted.
+
+        Returns:
+            list[tuple[dict, dict, ase.Atoms]]: (phase, case, atoms) for every case whose source exists.
+        """
+        structures = []
+
+        for phase in phases:
+            lattice = phase["lattice"]
+            src_phase_dir = self.path2 / "SQS" / f"{lattice}_{len(elements)}" / lattice
+
+            for case in cases:
+                src_case_name = BladeTDBGen._sqs_source_case_name(case["fractions"], case["level"])
+                src_poscar = src_phase_dir / src_case_name / "POSCAR"
+                if not BladeTDBGen.path_exists(src_poscar, self.manifest):
+                    continue
+
+                text = BladeTDBGen._poscar_text_to_elements(src_poscar.read_text(), elements)
+                structures.append((phase, case, read(io.StringIO(text), format="vasp")))
+
+        return structures
+
+    @staticmethod
+    def batch_energies(structures, calculator, relax_steps=0, relax_fmax=0.1):
+        """
+        Single-point (or lightly relaxed) energies of many structures in one pass with one calculator.
+
+        Identical structures, such as the pure endmembers shared by every system of a lattice, are
+        evaluated once. A structure whose evaluation fails gets its error instead of an energy.
+
+        Returns:
+            list[dict]: Per structure, in input order, `energy` (eV, None on failure), `steps` and `error`.
+        """
+        keys = []
+        unique = {}
+        for atoms in structures:
+            key = (
+                atoms.numbers.tobytes(),
+                atoms.cell.array.round(8).tobytes(),
+                atoms.get_scaled_positions().round(8).tobytes(),
+            )
+            keys.append(key)
+            unique.setdefault(key, atoms)
+
+        results = {}
+        for key, structure in unique.items():
+            atoms = structure.copy()
+            try:
+                if relax_steps > 0:
+                    entry = BladeRelax.run_stage(
+                        atoms,
+                        {"calculator": calculator, "fmax": relax_fmax, "steps": relax_steps},
+                    )
+                    results[key] = {"energy": entry["energy"], "steps": entry["steps"], "error": None}
+                else:
+                    atoms.calc = calculator
+                    energy = float(atoms.get_potential_energy())
+                    results[key] = {"energy": energy, "steps": 0, "error": None}
+            except Exception as exc:
+                results[key] = {"energy": None, "steps": 0, "error": str(exc)}
+
+        print(f"Evaluated {len(unique)} unique of {len(structures)} screening structures")
+        return [results[key] for key in keys]
+
+    @staticmethod
+    def mixing_energies(rows, elements):
+        """
+        Add the mixing energy per atom to screening rows, referenced linearly to the pure endmembers of the
+        same lattice.
+
+        Returns:
+            pandas.DataFrame: The rows with a `mixing_energy_per_atom` column, NaN for lattices without
+                every endmember.
+        """
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+
+        df["mixing_energy_per_atom"] = np.nan
+        for lattice, sub in df.groupby("lattice"):
+            references = {}
+            for _, row in sub.iterrows():
+                fractions = json.loads(row["fractions"])
+                if BladeTDBGen.is_pure_endmember(fractions):
+                    references[int(np.argmax(fractions))] = row["energy_per_atom"]
+
+            if len(references) < len(elements):
+                print(f"Missing endmembers for {elements} {lattice}, cannot compute mixing energies")
+                continue
+
+            for index, row in sub.iterrows():
+                fractions = json.loads(row["fractions"])
+                reference = sum(frac * references[i] for i, frac in enumerate(fractions))
+                df.loc[index, "mixing_energy_per_atom"] = row["energy_per_atom"] - reference
+
+        return df
+
+    def screen_compositions(  # noqa: PLR0915 (reads, evaluates and ranks in one pass)
+        self,
+        sqsgen_levels,
+        phase_dicts,
+        params,
+        relax_steps=0,
+        output=None,
+    ):
+        """
+        Rank all systems by single-point (or lightly relaxed) SQS mixing energies.
+
+        The ideal SQS structures of every system of `composition_list` are read from the SQS sources and
+        evaluated together by `batch_energies` with one shared calculator, so the model is loaded once and
+        endmembers shared between systems are computed once. Nothing is copied into the workdirs; the
+        promoted systems are copied when they are fitted. Per-case results are written to a Parquet
+        table, `<path2>/screening.parquet` by default.
+
+        Returns:
+            pandas.DataFrame: One row per system with the lowest mixing energy (eV/atom) over all cases
+                and lattices and the lattice and case where it occurs, sorted from most to least negative.
+                `status` is "ok" for ranked systems; systems without a mixing energy (failed, no
+                structures or missing endmember energies) are listed last with a NaN energy and the reason.
+        """
+        calculator = BladeCalculatorFactory.from_params(params)
+        unranked = {}
+        entries = []
+
+        for comp in self.composition_list:
+            elements = list(comp)
+            cases = BladeTDBGen.expand_all_cases(sqsgen_levels, elements)
+
+            try:
+                structures = self.screening_structures(cases, elements, phase_dicts)
+            except Exception as exc:
+                print(f"Screening failed for composition {elements}: {exc}")
+                unranked["-".join(elements)] = f"failed: {exc}"
+                continue
+
+            if not structures:
+                unranked["-".join(elements)] = "no structures"
+                continue
+
+            entries.extend((elements, phase, case, atoms) for phase, case, atoms in structures)
+
+        energies = BladeTDBGen.batch_energies(
+            [atoms for *_, atoms in entries], calculator, relax_steps=relax_steps
+        )
+
+        rows = {}
+        errors = {}
+        for (elements, phase, case, atoms), result in zip(entries, energies, strict=True):
+            system = "-".join(elements)
+            if result["error"] is not None:
+                errors.setdefault(system, result["error"])
+                continue
+
+            rows.setdefault(system, []).append(
+                {
+                    "system": system,
+                    "lattice": phase["lattice"],
+                    "level": case["level"],
+                    "fractions": json.dumps([float(x) for x in case["fractions"]]),
+                    "n_atoms": len(atoms),
+                    "relax_steps": result["steps"],
+                    "energy_per_atom": result["energy"] / len(atoms),
+                }
+            )
+
+        frames = []
+        for comp in self.composition_list:
+            system = "-".join(comp)
+            if system in errors:
+                print(f"Screening failed for composition {list(comp)}: {errors[system]}")
+                unranked[system] = f"failed: {errors[system]}"
+                continue
+            if system not in rows:
+                continue
+
+            df = BladeTDBGen.mixing_energies(rows[system], list(comp))
+            frames.append(df)
+            if df["mixing_energy_per_atom"].isna().all():
+                unranked[system] = "missing endmember energies"
+
+        columns = ["system", "lattice", "level", "fractions", "min_mixing_energy_per_atom", "status"]
+        if frames:
+            results = pd.concat(frames, ignore_index=True)
+            output = Path(output) if output is not None else self.path2 / "screening.parquet"
+            results.to_parquet(output, index=False)
+            print(f"Wrote screening results: {output}")
+
+            mixing = results.dropna(subset=["mixing_energy_per_atom"])
+            best = mixing.loc[mixing.groupby("system")["mixing_energy_per_atom"].idxmin()]
+            ranking = best[["system", "lattice", "level", "fractions", "mixing_energy_per_atom"]]
+            ranking = ranking.rename(columns={"mixing_energy_per_atom": "min_mixing_energy_per_atom"})
+            ranking = ranking.assign(status="ok").sort_values("min_mixing_energy_per_atom")
         else:
-            print(f"\nTDB was not created: {tdb_path}")
+            ranking = pd.DataFrame(columns=columns)
+
+        if unranked:
+            print(f"Systems without a screening mixing energy: {unranked}")
+            missing = pd.DataFrame(
+                [
+                    {"system": system, "min_mixing_energy_per_atom": np.nan, "status": reason}
+                    for system, reason in unranked.items()
+                ],
+                columns=columns,
+            )
+            ranking = pd.concat([ranking, missing], ignore_index=True) if len(ranking) else missing
+
+        return ranking.reset_index(drop=True)
+
+    def promoted_compositions(self, ranking, threshold=0.0):
+        """
+        Return the compositions whose lowest mixing energy is at or below `threshold` (eV/atom).
+
+        Systems that were not ranked (see `screen_compositions`) are never promoted; they are printed with
+        their reason so they are not dropped silently.
+        """
+        promoted = set(ranking.loc[ranking["min_mixing_energy_per_atom"] <= threshold, "system"])
+        ranked = set(ranking.loc[ranking["min_mixing_energy_per_atom"].notna(), "system"])
+        reasons = dict(zip(ranking["system"], ranking["status"], strict=True))
+
+        for comp in self.composition_list:
+            system = "-".join(comp)
+            if system not in ranked:
+                print(f"Not promoted, {system} has no screening mixing energy: {reasons.get(system, 'not screened')}")
+
+        return [list(comp) for comp in self.composition_list if "-".join(comp) in promoted]
+
+    @staticmethod
+    def read_interaction_parameters(tdb_path, temperature=298.15):
+        """
+        Read the excess (L) parameters of a TDB file evaluated at `temperature`.
+
+        The parameters are read through pycalphad, so constituents come in pycalphad's sorted order.
+
+        Returns:
+            dict: Maps (phase, constituents, order) to the parameter value in J/mol, where constituents
+                holds one tuple of species per sublattice, e.g. (("CR", "TI"), ("B",)) for L(HEDB1,CR,TI:B).
+        """
+        db = Database(str(tdb_path))
+        parameters = {}
+
+        for param in db._parameters.all():
+            if param["parameter_type"] != "L":
+                continue
+
+            phase = param["phase_name"].upper()
+            constituents = tuple(
+                tuple(sp.name.upper() for sp in sublattice) for sublattice in param["constituent_array"]
+            )
+            order = int(param["parameter_order"])
+
+            # resolve FUNCTION references, then evaluate the temperature piecewise
+            expression = param["parameter"]
+            for _ in range(len(db.symbols) + 1):
+                refs = {s: db.symbols[s.name] for s in expression.free_symbols if s.name in db.symbols}
+                if not refs:
+                    break
+                expression = expression.subs(refs)
+
+            try:
+                value = float(expression.subs({v.T: float(temperature)}))
+            except Exception as exc:
+                names = ":".join(",".join(sublattice) for sublattice in constituents)
+                print(f"Could not evaluate L({phase},{names};{order}): {exc}")
+                continue
+
+            parameters[(phase, constituents, order)] = value
+
+        return parameters
+
+    @staticmethod
+    def compare_tdb(tdb_path, reference_path, temperature=298.15):
+        """
+        Compare the interaction parameters of two TDB files, e.g. a native fit against `sqs2tdb`.
+
+        Returns:
+            dict: Maps (phase, constituents, order) to (value, reference value, difference) in J/mol.
+        """
+        values = BladeTDBGen.read_interaction_parameters(tdb_path, temperature)
+        reference = BladeTDBGen.read_interaction_parameters(reference_path, temperature)
+
+        comparison = {}
+        for key in sorted(set(values) | set(reference)):
+            a = values.get(key, 0.0)
+            b = reference.get(key, 0.0)
+            comparison[key] = (a, b, a - b)
+        return comparison
+
+    @staticmethod
+    def mixing_sublattice(sublattices):
+        """
+        Return the species of the only sublattice that mixes several species, or () if there is none or
+        more than one.
+        """
+        mixing = [sublattice for sublattice in sublattices if len(sublattice) > 1]
+        return mixing[0] if len(mixing) == 1 else ()
+
+    @staticmethod
+    def predicted_excess_energies(parameters, elements, n_div=10):
+        """
+        Evaluate the Redlich-Kister excess energy of every phase on a composition grid.
+
+        Binary terms use the Redlich-Kister expansion and ternary terms the Muggianu extension, both on the
+        one sublattice of the parameter that mixes several species; the other sublattices are taken as fully
+        occupied by their single species. Reciprocal parameters, mixing on more than one sublattice, are
+        skipped.
+
+        Returns:
+            dict: Maps phase name to an array of excess energies (J/mol), one per grid point.
+        """
+        species = [el.upper() for el in elements]
+        grid = np.array(
+            [
+                counts
+                for counts in product(range(n_div + 1), repeat=len(species))
+                if sum(counts) == n_div
+            ],
+            dtype=float,
+        ) / n_div
+        index = {sp: i for i, sp in enumerate(species)}
+
+        phases = sorted({phase for phase, _, _ in parameters})
+        energies = {phase: np.zeros(len(grid)) for phase in phases}
+
+        ternary_orders = {}
+        for (phase, sublattices, order) in parameters:
+            if len(BladeTDBGen.mixing_sublattice(sublattices)) == BladeRKFit.TERNARY:
+                ternary_orders.setdefault((phase, sublattices), set()).add(order)
+
+        for (phase, sublattices, order), value in parameters.items():
+            constituents = BladeTDBGen.mixing_sublattice(sublattices)
+            if not constituents or not all(sp in index for sp in constituents):
+                continue
+
+            x = [grid[:, index[sp]] for sp in constituents]
+
+            if len(constituents) == BladeRKFit.BINARY:
+                energies[phase] += x[0] * x[1] * value * (x[0] - x[1]) ** order
+            elif len(constituents) == BladeRKFit.TERNARY:
+                factor = 1.0
+                if ternary_orders[(phase, sublattices)] != {0}:
+                    factor = x[order] + (1.0 - x[0] - x[1] - x[2]) / 3.0
+                energies[phase] += x[0] * x[1] * x[2] * factor * value
+
+        return energies
+
+    def run_adaptive_workflow(  # noqa: PLR0913 (run_workflow inputs)
+        self,
+        sqsgen_levels,
+        elements,
+        phase_dicts,
+        params,
+        tol=50.0,
+        default_supercell_size=(2, 2, 2),
+    ):
+        """
+        Relax and fit SQS levels one at a time until the fit stops changing.
+
+        After each level the predicted excess energies of every phase are compared with the previous fit.
+        Levels stop being added once the largest change falls below `tol` (J/mol). The fit of every level
+        is kept as `<tdb stem>_level<level>.tdb`, and the TDB of the last level that fitted is left at the
+        usual TDB path with its provenance. The stopping level, the final level and the change and TDB of
+        every level are written to `<workdir>/adaptive_levels.json`.
+
+        Returns:
+            int | None: The level at which the fit converged, or None if all levels were used.
+        """
+        workdir = self.get_composition_dir(elements)
+        workdir.mkdir(parents=True, exist_ok=True)
+
+        entries = sorted(sqsgen_levels, key=lambda entry: entry["level"])
+        done = set()
+        previous = None
+        history = []
+        stopping_level = None
+        final = None
+
+        for k, entry in enumerate(entries):
+            levels = entries[: k + 1]
+            cases = BladeTDBGen.expand_all_cases(levels, elements)
+
+            if all(BladeTDBGen.is_pure_endmember(case["fractions"]) for case in cases):
+                continue
+
+            print(f"\nAdaptive fit of {elements} up to level {entry['level']}")
+            tdb_path = self.fit_tdb(
+                cases=cases,
+                elements=elements,
+                phases=phase_dicts,
+                workdir=workdir,
+                sqsgen_levels=levels,
+                params=params,
+                default_supercell_size=default_supercell_size,
+                skip_folders=done,
+            )
+
+            for case in cases:
+                comp_name = BladeTDBGen.folder_name(elements, case["fractions"], case["level"])
+                for phase in phase_dicts:
+                    folder = workdir / phase["lattice"] / comp_name
+                    if (folder / "CONTCAR").exists():
+                        done.add(folder)
+
+            if tdb_path is None:
+                history.append({"level": entry["level"], "max_change": None, "tdb": None})
+                continue
+
+            level_tdb = tdb_path.with_name(f"{tdb_path.stem}_level{entry['level']}.tdb")
+            shutil.copy2(tdb_path, level_tdb)
+            final = (entry["level"], levels, level_tdb, self.excluded_cases.get("-".join(elements), set()))
+
+            parameters = BladeTDBGen.read_interaction_parameters(tdb_path, params["t_min"])
+            energies = BladeTDBGen.predicted_excess_energies(parameters, elements)
+
+            max_change = None
+            if previous is not None:
+                max_change = 0.0
+                for phase in set(energies) | set(previous):
+                    current = energies.get(phase, 0.0)
+                    last = previous.get(phase, 0.0)
+                    max_change = max(max_change, float(np.max(np.abs(np.asarray(current - last)))))
+
+            history.append({"level": entry["level"], "max_change": max_change, "tdb": level_tdb.name})
+            print(f"Level {entry['level']}: max change in predicted excess energy = {max_change}")
+            previous = energies
+
+            if max_change is not None and max_change < tol:
+                stopping_level = entry["level"]
+                break
+
+        # a later level that failed to fit may have left another TDB behind, so restore the last good one
+        if final is not None:
+            _, final_levels, final_tdb, excluded = final
+            shutil.copy2(final_tdb, self.get_tdb_path(elements))
+            self.excluded_cases["-".join(elements)] = excluded
+            self.record_provenance(final_levels, elements, phase_dicts, params)
+
+        report = {
+            "elements": elements,
+            "tol": tol,
+            "stopping_level": stopping_level,
+            "final_level": final[0] if final is not None else None,
+            "history": history,
+        }
+        (workdir / "adaptive_levels.json").write_text(json.dumps(report, indent=2))
+        print(f"Stopping level for {elements}: {stopping_level}")
+        return stopping_level
 
     def run_workflow(
         self,
@@ -586,6 +1868,7 @@ class BladeTDBGen:
         workdir,
         params,
         default_supercell_size=(2, 2, 2),
+        skip_folders=None,
     ):
         workdir.mkdir(parents=True, exist_ok=True)
 
@@ -599,7 +1882,7 @@ class BladeTDBGen:
                 f"name={BladeTDBGen.composition_string(elements, case['fractions'])}"
             )
 
-        self.fit_tdb(
+        return self.fit_tdb(
             cases=cases,
             elements=elements,
             phases=phase_dicts,
@@ -607,6 +1890,7 @@ class BladeTDBGen:
             sqsgen_levels=sqsgen_levels,
             params=params,
             default_supercell_size=default_supercell_size,
+            skip_folders=skip_folders,
         )
 
     def get_composition_dir(self, elements):
@@ -619,9 +1903,181 @@ class BladeTDBGen:
     def get_tdb_path(self, elements):
         return self.get_composition_dir(elements) / BladeTDBGen.get_tdb_name(elements)
 
-    def should_skip_composition(self, elements):
+    def get_joint_tdb_path(self, elements):
         tdb_path = self.get_tdb_path(elements)
-        return self.skip_existing and tdb_path.exists()
+        return tdb_path.with_name(f"{tdb_path.stem}_joint.tdb")
+
+    @staticmethod
+    def fingerprint(data):
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+    @staticmethod
+    def calculation_settings(params):
+        settings = BladeEndmemberStore.calculator_settings(params)
+        settings["warm_start"] = params.get("warm_start", False)
+        return settings
+
+    @staticmethod
+    def fit_settings(params):
+        keys = ["t_min", "t_max", "sro", "bv", "phonon", "open_calphad", "terms"]
+        settings = {key: params.get(key) for key in keys}
+
+        # only recorded for the native fitter so existing sqs2tdb fits keep their fingerprint
+        if params.get("fitter", "sqs2tdb") != "sqs2tdb":
+            settings["fitter"] = params["fitter"]
+            settings["rk_weights"] = params.get("rk_weights", "uniform")
+        return settings
+
+    def case_fingerprints(self, cases, elements, phases, params):
+        """
+        Fingerprint every case folder from its source SQS structure and the calculator settings.
+
+        Returns:
+            dict: Maps "<lattice>/<case folder>" to a hash, or None when the source SQS is missing.
+        """
+        settings = BladeTDBGen.calculation_settings(params)
+        fingerprints = {}
+
+        for phase in phases:
+            lattice = phase["lattice"]
+            src_phase_dir = self.path2 / "SQS" / f"{lattice}_{len(elements)}" / lattice
+
+            for case in cases:
+                src_poscar = src_phase_dir / BladeTDBGen._sqs_source_case_name(case["fractions"], case["level"]) / "POSCAR"
+                comp_name = BladeTDBGen.folder_name(elements, case["fractions"], case["level"])
+
+                if not src_poscar.exists():
+                    fingerprints[f"{lattice}/{comp_name}"] = None
+                    continue
+
+                structure_hash = hashlib.sha256(src_poscar.read_bytes()).hexdigest()
+                fingerprints[f"{lattice}/{comp_name}"] = BladeTDBGen.fingerprint(
+                    {"structure": structure_hash, "calculation": settings}
+                )
+
+        return fingerprints
+
+    def provenance(self, sqsgen_levels, elements, phases, params):
+        cases = BladeTDBGen.expand_all_cases(sqsgen_levels, elements)
+        case_hashes = self.case_fingerprints(cases, elements, phases, params)
+        fit = {
+            "cases": [[case["level"], case["fractions"]] for case in cases],
+            "lattices": [phase["lattice"] for phase in phases],
+            "fit": BladeTDBGen.fit_settings(params),
+            "structures": case_hashes,
+        }
+        fit_hash = BladeTDBGen.fingerprint(fit)
+        return {
+            "fingerprint": fit_hash,
+            "fit": fit_hash,
+            "cases": case_hashes,
+            "calculation": BladeTDBGen.calculation_settings(params),
+        }
+
+    def get_provenance_path(self, elements):
+        tdb_path = self.get_tdb_path(elements)
+        return tdb_path.with_name(tdb_path.name + ".provenance.json")
+
+    def write_provenance(self, elements, provenance):
+        tdb_path = self.get_tdb_path(elements)
+        self.get_provenance_path(elements).write_text(json.dumps(provenance, indent=2))
+
+        # also stamp the fingerprint into the TDB itself as a comment
+        text = tdb_path.read_text()
+        lines = [line for line in text.splitlines() if not line.startswith("$ BLADE provenance")]
+        lines.insert(0, f"$ BLADE provenance {provenance['fingerprint']}")
+        tdb_path.write_text("\n".join(lines) + "\n")
+
+    def record_provenance(self, sqsgen_levels, elements, phases, params):
+        """
+        Write the provenance of the TDB just fitted from `sqsgen_levels`.
+        """
+        provenance = self.provenance(sqsgen_levels, elements, phases, params)
+
+        # cases left out of a partial fit are not recorded, so the next run recalculates them
+        excluded = self.excluded_cases.get("-".join(elements))
+        if excluded:
+            provenance["cases"] = {key: value for key, value in provenance["cases"].items() if key not in excluded}
+            provenance["partial"] = sorted(excluded)
+        self.write_provenance(elements, provenance)
+
+    def composition_status(self, sqsgen_levels, elements, phases, params):
+        """
+        Compare the stored provenance of a system with its current inputs.
+
+        Returns:
+            tuple[str, set[str]]: The status, one of "up_to_date", "refit" or "recalc", and the
+                "<lattice>/<case folder>" keys whose calculation inputs are unchanged.
+        """
+        current = self.provenance(sqsgen_levels, elements, phases, params)
+        tdb_path = self.get_tdb_path(elements)
+        provenance_path = self.get_provenance_path(elements)
+
+        if not tdb_path.exists() or not provenance_path.exists():
+            return "recalc", set()
+
+        stored = json.loads(provenance_path.read_text())
+        unchanged = {
+            key
+            for key, value in current["cases"].items()
+            if value is not None and stored.get("cases", {}).get(key) == value
+        }
+
+        if len(unchanged) != len(current["cases"]):
+            return "recalc", unchanged
+        if stored.get("fit") != current["fit"]:
+            return "refit", unchanged
+        return "up_to_date", unchanged
+
+    def refresh_changed_cases(self, sqsgen_levels, elements, phases, params):
+        """
+        Replace the workdir copy of every case folder whose source SQS changed with a fresh copy.
+
+        `copy_sqs_folders_into_workdir` never overwrites an existing folder, so without this a changed
+        source would be fitted from the old, possibly already relaxed, workdir structure. A folder is only
+        replaced when both its stored and its current fingerprint exist and differ; without provenance or
+        with a missing source SQS the workdir copy is the only one left and is kept.
+
+        Returns:
+            list[Path]: The refreshed case folders.
+        """
+        provenance_path = self.get_provenance_path(elements)
+        if not provenance_path.exists():
+            return []
+
+        stored = json.loads(provenance_path.read_text()).get("cases", {})
+        workdir = self.get_composition_dir(elements)
+        cases = BladeTDBGen.expand_all_cases(sqsgen_levels, elements)
+        current = self.case_fingerprints(cases, elements, phases, params)
+        changed = [
+            key
+            for key, value in current.items()
+            if value is not None and stored.get(key) is not None and stored[key] != value
+        ]
+
+        refreshed = []
+        for key in changed:
+            folder = workdir / key
+            if folder.exists():
+                shutil.rmtree(folder)
+                refreshed.append(folder)
+            if self.manifest is not None:
+                self.manifest.forget(folder)
+
+        if refreshed:
+            print(f"{elements}: re-copying {len(refreshed)} changed case folders")
+            self.copy_sqs_folders_into_workdir(cases, elements, phases, workdir)
+        return refreshed
+
+    def should_skip_composition(self, elements, sqsgen_levels=None, phase_dicts=None, params=None):
+        if not self.skip_existing:
+            return False
+
+        if sqsgen_levels is None or phase_dicts is None or params is None:
+            return self.get_tdb_path(elements).exists()
+
+        status, _ = self.composition_status(sqsgen_levels, elements, phase_dicts, params)
+        return status == "up_to_date"
 
     def run_single_composition(
         self,
@@ -635,24 +2091,43 @@ class BladeTDBGen:
         workdir.mkdir(parents=True, exist_ok=True)
 
         tdb_path = self.get_tdb_path(elements)
+        skip_folders = set()
 
-        if self.should_skip_composition(elements):
-            print(f"Skipping {elements} because TDB already exists: {tdb_path}")
-            return
+        # with skip_existing, only the stages whose inputs changed are redone
+        if self.skip_existing:
+            status, unchanged = self.composition_status(sqsgen_levels, elements, phase_dicts, params)
+
+            if status == "up_to_date":
+                print(f"Skipping {elements} because TDB is up to date: {tdb_path}")
+                return
+
+            print(f"{elements}: {status} ({len(unchanged)} case folders unchanged)")
+            required = ["POSCAR", "energy", "CONTCAR", "str.out", "force.out", "stress.out"]
+            for key in unchanged:
+                folder = workdir / key
+                if all(BladeTDBGen.path_exists(folder / name, self.manifest) for name in required):
+                    skip_folders.add(folder)
+
+            self.refresh_changed_cases(sqsgen_levels, elements, phase_dicts, params)
 
         print(f"\nRunning composition: {elements}")
         print(f"Workdir: {workdir}")
         print(f"Expected TDB: {tdb_path}")
 
-        self.run_workflow(
+        result = self.run_workflow(
             sqsgen_levels=sqsgen_levels,
             elements=elements,
             phase_dicts=phase_dicts,
             workdir=workdir,
             params=params,
             default_supercell_size=default_supercell_size,
+            skip_folders=skip_folders,
         )
 
+        # fingerprinted after the run so the calculator settings record the device actually used
+        if result is not None:
+            self.record_provenance(sqsgen_levels, elements, phase_dicts, params)
+
     def run_all_compositions(
         self,
         sqsgen_levels,
@@ -660,7 +2135,7 @@ class BladeTDBGen:
         params = {
             "fmax": 1e-4,
             "verbose": True,
-            "calculator": Calculator(device="cuda"),
+            "calculator": "cuda",
             "t_min": 298.15,
             "t_max": 10000.0,
             "sro": False,
@@ -668,13 +2143,18 @@ class BladeTDBGen:
             "phonon": False,
             "open_calphad": False,
             "terms": None,
+            "warm_start": False,
+            "endmember_store": False,
         },
         default_supercell_size=(2, 2, 2),
     ):
         original_dir = Path.cwd()
 
+        # lower-order systems first so higher-order systems can reuse their results
+        ordered = sorted(self.composition_list, key=lambda comp: (len(comp), list(comp)))
+
         try:
-            for comp in self.composition_list:
+            for comp in ordered:
                 elements = list(comp)
 
                 try:
@@ -689,4 +2169,6 @@ class BladeTDBGen:
                     print(f"Failed for composition {elements}: {exc}")
 
         finally:
-            os.chdir(original_dir)
\ No newline at end of file
+            os.chdir(original_dir)
+
+        self.print_relaxation_report()
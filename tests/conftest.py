@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from blade.analysis.blade_screening import BLADEScreening
+from blade.tools.blade_atat_io import BladeAtatIO
+
+# eV/atom: G of the two endmembers and the L0, L1 interactions of the binary
+G_A, G_B, L0, L1 = -3.0, -5.0, -0.2, 0.05
+
+FCC_COORDS = [[0.0, 0.0, 0.0], [0.0, 0.5, 0.5], [0.5, 0.0, 0.5], [0.5, 0.5, 0.0]]
+
+
+def binary_energy(x_a):
+    x_b = 1.0 - x_a
+    return x_a * G_A + x_b * G_B + x_a * x_b * (L0 + L1 * (x_a - x_b))
+
+
+def write_binary_lattice(lattice_dir, elements, folder_name):
+    """
+    Write relaxed FCC_A1 SQS folders of a binary with 4-atom cells and exact Redlich-Kister energies.
+
+    `folder_name(elements, fractions, level)` names the case folders.
+    """
+    lattice_dir.mkdir(parents=True, exist_ok=True)
+    (lattice_dir / "mult.in").write_text("a=1\n")
+    (lattice_dir / "terms.in").write_text("1,0\n2,1\n")
+
+    folders = []
+    for n_a, level in [(4, 0), (3, 2), (2, 1), (1, 2), (0, 0)]:
+        fractions = [n_a / 4, 1 - n_a / 4]
+        folder = lattice_dir / folder_name(elements, fractions, level)
+        folder.mkdir(exist_ok=True)
+
+        species = [elements[0]] * n_a + [elements[1]] * (4 - n_a)
+        BladeAtatIO.write_str(folder / "str.out", 3.6 * np.eye(3), np.eye(3), FCC_COORDS, species)
+        (folder / "energy").write_text(f"{4 * binary_energy(n_a / 4):.10f}\n")
+        folders.append(folder)
+
+    return folders
+
+
+@pytest.fixture
+def binary_lattice():
+    return write_binary_lattice
+
+
+def make_screening_grid(tdb_path="A_B.tdb", gm=None):
+    """
+    Build a two-temperature, three-point binary grid in the layout of `BLADEScreening.evaluate_grid`.
+
+    The middle point is two-phase at the first temperature; unused vertices carry no phase.
+    """
+    gm = np.array([[-3.0, -5.0, -4.0], [-6.0, -2.0, -7.0]]) if gm is None else np.asarray(gm)
+    x = np.array([[0.25, 0.75], [0.5, 0.5], [0.75, 0.25]])
+    mu = np.stack([gm - 1.0, gm + 1.0], axis=-1)
+
+    npv = np.full((2, 3, 3), np.nan)
+    labels = np.full((2, 3, 3), "", dtype=object)
+    npv[:, :, 0], labels[:, :, 0] = 1.0, "FCC_A1"
+    npv[0, 1, :2], labels[0, 1, :2] = (0.6, 0.4), ("FCC_A1", "BCC_A2")
+
+    return BLADEScreening.grid_dataset(
+        tdb_path, np.array([1000.0, 1500.0]), x, ["A", "B"], 101325.0, gm, mu, npv, labels
+    )
+
+
+@pytest.fixture
+def screening_grid():
+    return make_screening_grid
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from blade.tools.blade_atat_io import BladeAtatIO
+
+COORD_SYS = 3.6 * np.eye(3)
+SUPERCELL = np.eye(3)
+COORDS = [[0.0, 0.0, 0.0], [0.0, 0.5, 0.5], [0.5, 0.0, 0.5], [0.5, 0.5, 0.0]]
+
+CONTCAR = """relaxed
+1.0
+3.7 0.0 0.0
+0.0 3.7 0.0
+0.0 0.0 3.7
+{species}
+{counts}
+Direct
+0.99 0.0 0.01
+0.0 0.51 0.5
+0.5 0.0 0.49
+0.5 0.5 0.0
+"""
+
+
+def test_str_round_trip(tmp_path):
+    path = tmp_path / "str.out"
+    BladeAtatIO.write_str(path, COORD_SYS, SUPERCELL, COORDS, ["Cr", "Cr", "Ti", "Ti"])
+
+    coord_sys, supercell, coords, species = BladeAtatIO.read_str(path)
+    assert coord_sys == pytest.approx(COORD_SYS)
+    assert supercell == pytest.approx(SUPERCELL)
+    assert coords == pytest.approx(np.array(COORDS))
+    assert species == ["Cr", "Cr", "Ti", "Ti"]
+
+
+def test_read_str_rejects_truncated_files(tmp_path):
+    path = tmp_path / "str.out"
+    path.write_text("1 0 0\n0 1 0\n0 0 1\n")
+    with pytest.raises(ValueError, match="valid ATAT"):
+        BladeAtatIO.read_str(path)
+
+
+def test_relaxed_str_out_keeps_the_template_cell_and_nearest_images(tmp_path):
+    template = tmp_path / "str_template.out"
+    BladeAtatIO.write_str(template, COORD_SYS, SUPERCELL, COORDS, ["Cr", "Cr", "Ti", "Ti"])
+    contcar = tmp_path / "CONTCAR"
+    contcar.write_text(CONTCAR.format(species="Cr Ti", counts="2 2"))
+
+    BladeAtatIO.write_relaxed_str_out_from_template(template, contcar, tmp_path / "str.out")
+
+    coord_sys, supercell, coords, species = BladeAtatIO.read_str(tmp_path / "str.out")
+    assert coord_sys == pytest.approx(COORD_SYS)
+    assert supercell == pytest.approx(SUPERCELL)
+    assert species == ["Cr", "Cr", "Ti", "Ti"]
+    assert coords == pytest.approx(
+        np.array([[-0.01, 0.0, 0.01], [0.0, 0.51, 0.5], [0.5, 0.0, 0.49], [0.5, 0.5, 0.0]])
+    )
+
+
+def test_relaxed_str_out_rejects_reordered_species(tmp_path):
+    template = tmp_path / "str_template.out"
+    BladeAtatIO.write_str(template, COORD_SYS, SUPERCELL, COORDS, ["Cr", "Cr", "Ti", "Ti"])
+    contcar = tmp_path / "CONTCAR"
+    contcar.write_text(CONTCAR.format(species="Ti Cr", counts="2 2"))
+
+    with pytest.raises(ValueError, match="Species order"):
+        BladeAtatIO.write_relaxed_str_out_from_template(template, contcar, tmp_path / "str.out")
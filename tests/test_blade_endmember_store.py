@@ -0,0 +1,50 @@
+from blade.tools.blade_endmember_store import BladeEndmemberStore
+
+PARAMS = {"fmax": 1e-3, "calculator": "cpu"}
+
+
+def relaxed_folder(path, tag="relaxed"):
+    path.mkdir(parents=True)
+    for name in BladeEndmemberStore.required:
+        (path / name).write_text(f"{tag} {name}\n")
+    return path
+
+
+def test_entries_are_keyed_by_relaxation_settings(tmp_path):
+    plain = BladeEndmemberStore(tmp_path, PARAMS)
+    tiers = BladeEndmemberStore(tmp_path, {**PARAMS, "relax_tiers": [{"fmax": 0.05}]})
+    schedule = BladeEndmemberStore(tmp_path, {**PARAMS, "relax_schedule": [{"fmax": 1e-2}]})
+
+    stores = (plain, tiers, schedule)
+    entries = {store.entry_dir("CR", "BCC_A2", (2, 2, 2)) for store in stores}
+    assert len(entries) == len(stores)
+
+    plain.publish("CR", "BCC_A2", (2, 2, 2), relaxed_folder(tmp_path / "case"))
+    assert plain.has("CR", "BCC_A2", (2, 2, 2))
+    assert not schedule.has("CR", "BCC_A2", (2, 2, 2))
+
+
+def test_publish_and_materialize_round_trip(tmp_path):
+    store = BladeEndmemberStore(tmp_path / "store", PARAMS)
+    assert not store.publish("CR", "BCC_A2", (2, 2, 2), tmp_path / "missing")
+
+    store.publish("CR", "BCC_A2", (2, 2, 2), relaxed_folder(tmp_path / "case"))
+    target = tmp_path / "workdir" / "case"
+    assert store.materialize("CR", "BCC_A2", (2, 2, 2), target)
+
+    assert (target / "energy").read_text() == "relaxed energy\n"
+    assert not (target / "settings.json").exists()
+
+
+def test_publish_replaces_a_partial_entry(tmp_path):
+    store = BladeEndmemberStore(tmp_path / "store", PARAMS)
+    entry = store.entry_dir("CR", "BCC_A2", (2, 2, 2))
+    entry.mkdir(parents=True)
+    (entry / "POSCAR").write_text("partial\n")
+    assert not store.has("CR", "BCC_A2", (2, 2, 2))
+
+    store.publish("CR", "BCC_A2", (2, 2, 2), relaxed_folder(tmp_path / "case", "new"))
+
+    assert store.has("CR", "BCC_A2", (2, 2, 2))
+    assert (entry / "POSCAR").read_text() == "new POSCAR\n"
+    assert [path.name for path in entry.parent.iterdir()] == [entry.name]
@@ -0,0 +1,61 @@
+import os
+
+from blade.analysis.blade_volume import BLADEVolume
+from blade.tools.blade_manifest import BladeManifest
+
+POSCAR = """Cr
+1.0
+2.88 0.0 0.0
+0.0 2.88 0.0
+0.0 0.0 2.88
+Cr
+2
+direct
+0.0 0.0 0.0
+0.5 0.5 0.5
+"""
+
+
+def test_exists_drops_files_deleted_after_recording(tmp_path):
+    manifest = BladeManifest(tmp_path / "blade_manifest.sqlite")
+    folder = tmp_path / "CR" / "BCC_A2" / "sqs_lev=0_a=1.0"
+    folder.mkdir(parents=True)
+    (folder / "POSCAR").write_text(POSCAR)
+    (folder / "energy").write_text("-19.0\n")
+    manifest.record_folder(folder)
+
+    assert manifest.exists(folder / "energy")
+    (folder / "energy").unlink()
+
+    assert not manifest.exists(folder / "energy")
+    assert "energy" not in manifest.list_files(folder)
+
+
+def test_exists_rerecords_changed_files(tmp_path):
+    manifest = BladeManifest(tmp_path / "blade_manifest.sqlite")
+    path = tmp_path / "POSCAR_BCC_A2"
+    path.write_text(POSCAR)
+    manifest.record_file(path)
+
+    path.write_text(POSCAR * 2)
+    os.utime(path, (1.0, 1.0))
+    assert manifest.exists(path)
+
+    size, mtime = manifest.conn.execute(
+        "SELECT size, mtime FROM files WHERE path = ?", (BladeManifest.key(path),)
+    ).fetchone()
+    assert (size, mtime) == (len(POSCAR) * 2, 1.0)
+
+
+def test_find_poscars_from_manifest_matches_the_tree(tmp_path):
+    comp_dir = tmp_path / "CR"
+    for phase in ("BCC_A2", "FCC_A1"):
+        folder = comp_dir / phase / "sqs_lev=0_a=1.0"
+        folder.mkdir(parents=True)
+        (folder / "POSCAR").write_text(POSCAR)
+
+    manifest = BladeManifest(tmp_path / "blade_manifest.sqlite")
+    manifest.rebuild(tmp_path)
+
+    vol = BLADEVolume()
+    assert vol.find_poscars(comp_dir, manifest) == vol.find_poscars(comp_dir)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from blade.analysis.blade_miscibility import BLADEMiscibility
+from blade.analysis.blade_screening import BLADEScreening
+
+# regular solutions: a positive L0 opens a gap closing at Tc = L0 / (2R) at x = 0.5
+L0 = 20000.0
+TC = L0 / (2 * 8.31451)
+
+TDB = f"""ELEMENT VA VACUUM 0 0 0 !
+ELEMENT CR BCC_A2 0 0 0 !
+ELEMENT TI HCP_A3 0 0 0 !
+PHASE FCC_A1 % 1 1 !
+CONSTITUENT FCC_A1 :CR,TI: !
+PHASE BCC_A2 % 1 1 !
+CONSTITUENT BCC_A2 :CR,TI: !
+PHASE LAVES % 2 1 3 !
+CONSTITUENT LAVES :CR:CR,TI: !
+PHASE HCP_A3 % 2 1 0.5 !
+CONSTITUENT HCP_A3 :CR,TI:VA: !
+PARAMETER G(FCC_A1,CR;0) 298.15 -10*T; 6000 N !
+PARAMETER G(FCC_A1,TI;0) 298.15 -10*T; 6000 N !
+PARAMETER L(FCC_A1,CR,TI;0) 298.15 {L0}; 6000 N !
+PARAMETER G(BCC_A2,CR;0) 298.15 -10*T; 6000 N !
+PARAMETER G(BCC_A2,TI;0) 298.15 -10*T; 6000 N !
+PARAMETER L(BCC_A2,CR,TI;0) 298.15 -5000; 6000 N !
+PARAMETER G(LAVES,CR:CR;0) 298.15 -40*T; 6000 N !
+PARAMETER G(LAVES,CR:TI;0) 298.15 -40*T; 6000 N !
+PARAMETER G(HCP_A3,CR:VA;0) 298.15 -10*T; 6000 N !
+PARAMETER G(HCP_A3,TI:VA;0) 298.15 -10*T; 6000 N !
+"""
+
+
+@pytest.fixture
+def tdb_path(tmp_path):
+    path = tmp_path / "CRTI.tdb"
+    path.write_text(TDB)
+    return str(path)
+
+
+def line(tdb_path, phase, y):
+    comps = BLADEScreening.components(tdb_path)
+    model = BLADEScreening.models(tdb_path, comps, [phase])[phase]
+    return BLADEMiscibility.composition_line(model, y)
+
+
+def test_composition_line_counts_the_spectator_sublattices(tdb_path):
+    y = np.array([0.0, 0.5, 1.0])
+
+    points, x, pair = line(tdb_path, "FCC_A1", y)
+    assert pair == ["CR", "TI"]
+    assert points.tolist() == [[0.0, 1.0], [0.5, 0.5], [1.0, 0.0]]
+    assert x.tolist() == pytest.approx(y)
+
+    # (CR)1(CR,TI)3: the fixed CR site adds a quarter of the atoms
+    points, x, pair = line(tdb_path, "LAVES", y)
+    assert pair == ["CR", "TI"]
+    assert points.tolist() == [[1.0, 0.0, 1.0], [1.0, 0.5, 0.5], [1.0, 1.0, 0.0]]
+    assert x.tolist() == pytest.approx((3 * y + 1) / 4)
+
+
+def test_detect_finds_the_regular_solution_critical_point(tdb_path):
+    finder = BLADEMiscibility(n_x=49, n_t=12, t_min=100.0, t_max=3000.0, tol=0.5)
+    results = {result["phase"]: result for result in finder.detect(tdb_path)}
+
+    assert sorted(results) == ["BCC_A2", "FCC_A1", "LAVES"]
+    assert not results["BCC_A2"]["gap"]
+    assert not results["LAVES"]["gap"]
+    assert np.isnan(results["BCC_A2"]["Tc"])
+    assert finder.detect_phase(tdb_path, "HCP_A3") is None
+
+    fcc = results["FCC_A1"]
+    assert fcc["gap"]
+    # the finite-difference spinodal closes slightly below the analytic Tc
+    assert fcc["Tc"] == pytest.approx(TC, abs=2.0)
+    assert fcc["x_c"] == pytest.approx(0.5, abs=0.03)
+
+    assert finder.interesting(tdb_path)
+    assert not finder.interesting(tdb_path, ["BCC_A2", "HCP_A3"])
+
+
+def test_gap_open_at_t_max_reports_t_max(tdb_path):
+    finder = BLADEMiscibility(n_x=19, n_t=4, t_min=100.0, t_max=1000.0)
+    result = finder.detect_phase(tdb_path, "FCC_A1")
+
+    assert result["gap"]
+    assert result["Tc"] == finder.t_max
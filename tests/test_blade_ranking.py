@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from blade.analysis.blade_ranking import BLADERanking
+from blade.analysis.blade_screening import BLADEScreening
+
+T_COLD, T_HOT = 1000.0, 1500.0
+
+
+def make_rows(system, energies, temperature=T_COLD):
+    return [
+        {"file": system, "T_K": temperature, "x_A": i / 10, "G_system": g}
+        for i, g in enumerate(energies)
+    ]
+
+
+def test_top_keeps_the_k_lowest_rows_per_group_and_system():
+    rows = [
+        *make_rows("A_B.tdb", [-1.0, -4.0, -2.0, np.nan]),
+        *make_rows("A_C.tdb", [-3.0, -0.5]),
+        *make_rows("A_C.tdb", [-9.0], temperature=T_HOT),
+        {"file": "A_C.tdb", "T_K": T_COLD, "G_system": None},
+    ]
+    ranking = BLADERanking(k=2)
+    ranking.update_rows(rows)
+
+    assert len(ranking) == sum(1 for row in rows if np.isfinite(row["G_system"] or np.nan))
+    assert ranking.groups == [T_COLD, T_HOT]
+    assert ranking.systems(T_COLD) == ["A_B.tdb", "A_C.tdb"]
+    assert [row["G_system"] for row in ranking.top(T_COLD)] == [-4.0, -3.0]
+    assert [row["G_system"] for row in ranking.top(T_HOT)] == [-9.0]
+
+    per_system = ranking.top_per_system(T_COLD)
+    assert [row["G_system"] for row in per_system["A_B.tdb"]] == [-4.0, -2.0]
+    assert [row["G_system"] for row in per_system["A_C.tdb"]] == [-3.0, -0.5]
+
+
+def test_stats_match_numpy():
+    energies = [-1.0, -4.0, -2.5, -3.0]
+    ranking = BLADERanking(k=1)
+    ranking.update_rows(make_rows("A_B.tdb", energies))
+
+    n, mean, std = ranking.stats(T_COLD, "A_B.tdb")
+    assert n == len(energies)
+    assert mean == pytest.approx(np.mean(energies))
+    assert std == pytest.approx(np.std(energies, ddof=1))
+    assert np.isnan(ranking.stats(T_HOT, "A_B.tdb")[2])
+
+
+def test_update_grid_matches_the_row_path(screening_grid):
+    grid = screening_grid(gm=[[-3.0, -5.0, -4.0], [-6.0, np.nan, -7.0]])
+    from_grid, from_rows = BLADERanking(k=2), BLADERanking(k=2)
+    from_grid.update_grid(grid)
+    from_rows.update_rows(BLADEScreening.grid_rows(grid))
+
+    for temperature in (T_COLD, T_HOT):
+        assert from_grid.stats(temperature, "A_B.tdb") == pytest.approx(
+            from_rows.stats(temperature, "A_B.tdb")
+        )
+        grid_top, row_top = from_grid.top(temperature), from_rows.top(temperature)
+        for key in ("G_system", "x_A", "x_B", "eq_phases"):
+            assert [row[key] for row in grid_top] == [row[key] for row in row_top]
+
+    assert [row["G_system"] for row in from_grid.top(T_COLD)] == [-5.0, -4.0]
+    assert from_grid.top(T_COLD)[0]["eq_phases"] == "FCC_A1,BCC_A2"
+
+
+def test_top_normalized_ranks_by_z_score_within_each_system():
+    ranking = BLADERanking(k=2)
+    ranking.update_rows(make_rows("A_B.tdb", [-10.0, -11.0, -12.0]))
+    ranking.update_rows(make_rows("A_C.tdb", [0.0, 0.0, 0.0, -3.0]))
+    ranking.update_rows(make_rows("A_D.tdb", [-50.0]))
+
+    rows = ranking.top_normalized(T_COLD)
+    assert [row["file"] for row in rows] == ["A_C.tdb", "A_B.tdb"]
+    assert rows[0]["z_G_system"] == pytest.approx(-1.5)
+    assert rows[1]["z_G_system"] == pytest.approx(-1.0)
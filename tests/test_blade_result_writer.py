@@ -0,0 +1,75 @@
+import pyarrow.dataset as ds
+import pytest
+
+from blade.analysis.blade_result_writer import BLADEResultWriter
+from blade.analysis.blade_screening import BLADEScreening
+
+T_HOT = 1500.0
+
+ROW = {
+    "file": "A_B.tdb",
+    "T_K": 1000.0,
+    "P_Pa": 101325.0,
+    "elements": "A,B",
+    "x_A": 0.5,
+    "x_B": 0.5,
+    "G_system": -5.0,
+    "mu_A": -6.0,
+    "mu_B": -4.0,
+    "eq_phases": "FCC_A1,BCC_A2",
+    "eq_phase_fractions": "0.6,0.4",
+}
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_grid_and_rows_round_trip_with_a_fixed_schema(tmp_path, screening_grid, suffix):
+    path = tmp_path / f"results{suffix}"
+    grid = screening_grid()
+
+    with BLADEResultWriter(path, ["A", "B", "C"], row_group_size=2) as writer:
+        writer.write_grid(grid)
+        writer.write_rows(BLADEScreening.grid_rows(grid))
+        writer.write_rows([BLADEScreening.fail_row("A_C.tdb", 1000.0, 101325.0, {}, "no grid")])
+
+    assert writer.rows_written == 2 * len(grid["GM"].values.ravel()) + 1
+    df = BLADEResultWriter.read(path)
+    assert list(df.columns) == BLADEResultWriter.make_schema(["A", "B", "C"]).names
+
+    n = len(grid["GM"].values.ravel())
+    from_grid, from_rows = (
+        df.iloc[:n].reset_index(drop=True),
+        df.iloc[n : 2 * n].reset_index(drop=True),
+    )
+    for column in ("T_K", "x_A", "x_B", "G_system", "mu_A", "mu_B"):
+        assert from_grid[column].tolist() == pytest.approx(from_rows[column].tolist())
+    assert from_grid["x_C"].isna().all()
+    assert [list(p) for p in from_grid["eq_phases"]] == [list(p) for p in from_rows["eq_phases"]]
+    assert list(from_grid["eq_phases"][1]) == ["FCC_A1", "BCC_A2"]
+    assert df["error"].iloc[-1] == "no grid"
+
+
+def test_read_selects_columns_and_rows(tmp_path):
+    path = tmp_path / "results.parquet"
+    with BLADEResultWriter(path, ["A", "B"]) as writer:
+        writer.write_rows([ROW, {**ROW, "T_K": T_HOT, "G_system": -7.0}])
+
+    df = BLADEResultWriter.read(path, columns=["T_K", "G_system"], filter=ds.field("T_K") == T_HOT)
+    assert df.to_dict("records") == [{"T_K": T_HOT, "G_system": -7.0}]
+    assert list(df.columns) == ["T_K", "G_system"]
+
+
+def test_rows_outside_the_schema_are_rejected(tmp_path):
+    with BLADEResultWriter(tmp_path / "results.parquet", ["A", "B"]) as writer:
+        with pytest.raises(ValueError, match="x_C"):
+            writer.write_rows([{**ROW, "x_C": 0.0}])
+
+
+def test_empty_result_file_keeps_the_schema(tmp_path):
+    path = tmp_path / "results.arrow"
+    BLADEResultWriter(path, ["B", "A"]).close()
+
+    assert BLADEResultWriter.columns(path) == BLADEResultWriter.make_schema(["A", "B"]).names
+    assert BLADEResultWriter.read(path).empty
+
+    with pytest.raises(ValueError, match="Unknown result format"):
+        BLADEResultWriter(tmp_path / "results.csv", ["A"])
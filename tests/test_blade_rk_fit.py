@@ -0,0 +1,62 @@
+import pytest
+from conftest import G_A, G_B, L0, L1
+
+from blade.tools.blade_rk_fit import BladeRKFit
+
+EV = BladeRKFit.EV_TO_J_PER_MOL
+
+
+def test_read_terms_keeps_the_highest_order_per_interaction(tmp_path):
+    path = tmp_path / "terms.in"
+    path.write_text("1,0:1,0\n2,0\n2,2\n3,0\n")
+    assert BladeRKFit.read_terms(path) == {1: 0, 2: 2, 3: 0}
+    assert BladeRKFit.read_terms(tmp_path / "missing.in") == BladeRKFit.DEFAULT_TERMS
+
+
+def test_fit_system_recovers_the_redlich_kister_parameters(tmp_path, binary_lattice):
+    binary_lattice(tmp_path / "FCC_A1", ["CR", "TI"], lambda el, x, level: f"sqs_{x[0]:g}")
+    fitter = BladeRKFit(bv=1e-12)
+
+    tdb_path = fitter.fit_system(tmp_path, ["CR", "TI"], ["FCC_A1"], tmp_path / "CR_TI.tdb")
+    fit = fitter.fit_systems(
+        [{"workdir": tmp_path, "elements": ["CR", "TI"], "lattices": ["FCC_A1"]}]
+    )
+
+    lattice = fit[0]["lattices"]["FCC_A1"]
+    assert lattice["G"] == pytest.approx({"CR": G_A * EV, "TI": G_B * EV})
+    assert lattice["L"] == pytest.approx({(("CR", "TI"), 0): L0 * EV, (("CR", "TI"), 1): L1 * EV})
+    assert lattice["rms"] < 1e-6 * EV
+    assert "PARAMETER L(FCC_A1,CR,TI;1)" in tdb_path.read_text()
+
+
+def test_batched_systems_match_single_fits(tmp_path, binary_lattice):
+    systems = []
+    for elements in (["CR", "TI"], ["NB", "W"]):
+        workdir = tmp_path / "".join(elements)
+        binary_lattice(workdir / "FCC_A1", elements, lambda el, x, level: f"sqs_{x[0]:g}")
+        systems.append({"workdir": workdir, "elements": elements, "lattices": ["FCC_A1"]})
+
+    fitter = BladeRKFit()
+    batched = fitter.fit_systems(systems)
+    for system, fit in zip(systems, batched, strict=True):
+        single = fitter.fit_systems([system])[0]
+        assert fit["lattices"]["FCC_A1"]["L"] == pytest.approx(single["lattices"]["FCC_A1"]["L"])
+
+
+def test_joint_fit_shares_endmembers_between_binaries(tmp_path, binary_lattice):
+    systems = []
+    for elements in (["CR", "TI"], ["CR", "W"]):
+        workdir = tmp_path / "".join(elements)
+        binary_lattice(workdir / "FCC_A1", elements, lambda el, x, level: f"sqs_{x[0]:g}")
+        systems.append({"workdir": workdir, "elements": elements})
+
+    fits, merged = BladeRKFit(bv=1e-12).fit_joint(systems, ["FCC_A1"])
+
+    assert merged["elements"] == ["CR", "TI", "W"]
+    assert merged["lattices"]["FCC_A1"]["G"] == pytest.approx(
+        {"CR": G_A * EV, "TI": G_B * EV, "W": G_B * EV}
+    )
+    for fit, other in zip(fits, ["TI", "W"], strict=True):
+        assert fit["lattices"]["FCC_A1"]["L"] == pytest.approx(
+            {(("CR", other), 0): L0 * EV, (("CR", other), 1): L1 * EV}
+        )
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from blade.analysis.blade_screening import BLADEScreening
+from blade.analysis.blade_simplex import BLADESimplex
+
+TDB = """ELEMENT VA VACUUM 0 0 0 !
+ELEMENT AL FCC_A1 0 0 0 !
+ELEMENT CR BCC_A2 0 0 0 !
+ELEMENT NI FCC_A1 0 0 0 !
+ELEMENT TI HCP_A3 0 0 0 !
+PHASE FCC_A1 % 1 1 !
+CONSTITUENT FCC_A1 :AL,CR,NI,TI: !
+PARAMETER G(FCC_A1,AL;0) 298.15 -1000-10*T; 6000 N !
+PARAMETER G(FCC_A1,CR;0) 298.15 2000-12*T; 6000 N !
+PARAMETER G(FCC_A1,NI;0) 298.15 -500-11*T; 6000 N !
+PARAMETER G(FCC_A1,TI;0) 298.15 800-9*T; 6000 N !
+PARAMETER L(FCC_A1,AL,NI;0) 298.15 -40000; 6000 N !
+PARAMETER L(FCC_A1,CR,TI;0) 298.15 25000; 6000 N !
+"""
+
+
+# J/mol, agreement between warm and cold sweeps
+GM_TOL = 1e-3
+
+
+@pytest.fixture
+def tdb_path(tmp_path):
+    path = tmp_path / "ALCRNITI.tdb"
+    path.write_text(TDB)
+    yield path
+    BLADEScreening.clear()
+
+
+def cartesian_size(x):
+    return int(np.prod([len(np.unique(x[:, i])) for i in range(x.shape[1] - 1)]))
+
+
+def test_default_plan_does_not_solve_the_whole_box(tdb_path):
+    comps = BLADEScreening.components(tdb_path)
+    x = BLADEScreening.grid_points(tdb_path, list(BLADESimplex(comps, 10)))
+    chunks = BLADEScreening.plan_chunks(tdb_path, [1000.0, 1500.0], x)
+
+    points = [p for t, p in chunks if t[0] == 0]
+    assert sorted(np.concatenate(points)) == list(range(len(x)))
+    assert all(cartesian_size(x[p]) <= 2 * len(p) for p in points)
+    assert sum(cartesian_size(x[p]) for p in points) < cartesian_size(x) / 2
+
+
+def test_evaluate_grid_matches_single_point_equilibria(tdb_path):
+    comps = BLADEScreening.components(tdb_path)
+    compositions = [point for point in BLADESimplex(comps, 6) if min(point.values()) > 0] + [
+        {"AL": 0.1, "CR": 0.2, "NI": 0.3, "TI": 0.4}
+    ]
+    grid = BLADEScreening.evaluate_grid(tdb_path, [1200.0], compositions)
+
+    for p, point in enumerate(compositions):
+        row = BLADEScreening.compute_row(tdb_path, T=1200.0, x=point)
+        assert grid["GM"].values[0, p] == pytest.approx(row["G_system"], rel=1e-6)
+
+
+def test_warm_sweep_counts_solver_calls_and_matches_cold(tdb_path):
+    compositions = [
+        {"AL": 0.25, "CR": 0.25, "NI": 0.25, "TI": 0.25},
+        {"AL": 0.1, "CR": 0.2, "NI": 0.3, "TI": 0.4},
+    ]
+    report = BLADEScreening.compare_warm_start(tdb_path, [1500.0, 1000.0], compositions)
+
+    assert report["T_K"] == [1000.0, 1500.0]
+    assert all(n > 0 for n in report["cold_solves"] + report["warm_solves"])
+    assert report["max_dGM"] < GM_TOL
@@ -0,0 +1,46 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from blade.analysis.blade_simplex import BLADESimplex
+
+
+@pytest.mark.parametrize(("n_components", "n_div"), [(1, 5), (2, 4), (3, 6), (4, 5)])
+def test_counts_match_filtered_product_order(n_components, n_div):
+    simplex = BLADESimplex([f"E{i}" for i in range(n_components)], n_div)
+    expected = [c for c in product(range(n_div + 1), repeat=n_components) if sum(c) == n_div]
+
+    assert len(simplex) == len(expected)
+    assert list(simplex.iter_counts()) == expected
+    assert simplex.counts_array().tolist() == [list(c) for c in expected]
+
+
+def test_rank_and_unrank_are_inverse():
+    simplex = BLADESimplex(["A", "B", "C", "D"], 7)
+    for r, counts in enumerate(simplex.iter_counts()):
+        assert simplex.rank(counts) == r
+        assert simplex.unrank(r) == counts
+
+    with pytest.raises(IndexError):
+        simplex.unrank(len(simplex))
+    with pytest.raises(ValueError, match="not a point"):
+        simplex.rank((1, 1, 1, 1))
+
+
+def test_shards_cover_the_grid_once():
+    simplex = BLADESimplex(["A", "B", "C"], 9)
+    n_shards = 4
+    shards = [list(simplex.iter_counts(*simplex.shard(i, n_shards))) for i in range(n_shards)]
+    assert [c for shard in shards for c in shard] == list(simplex.iter_counts())
+
+
+def test_fixed_components_scale_the_free_fractions():
+    simplex = BLADESimplex(["CR", "TI"], 4, fixed={"B": 2 / 3})
+    points = list(simplex)
+    array = simplex.array()
+
+    assert simplex.columns == ["B", "CR", "TI"]
+    assert points[1] == pytest.approx({"B": 2 / 3, "CR": 1 / 12, "TI": 1 / 4})
+    assert array == pytest.approx(np.array([[p[c] for c in simplex.columns] for p in points]))
+    assert array.sum(axis=1) == pytest.approx(np.ones(len(simplex)))
@@ -0,0 +1,430 @@
+import json
+import shutil
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("materialsframework")
+
+from ase import Atoms  # noqa: E402
+from ase.calculators.emt import EMT  # noqa: E402
+from ase.io import read  # noqa: E402
+
+from blade.tools.blade_relax import BladeRelax  # noqa: E402
+from blade.tools.blade_tdb_gen import BladeTDBGen  # noqa: E402
+
+POSCAR = """{name}
+1.0
+3.6 0.0 0.0
+0.0 3.6 0.0
+0.0 0.0 3.6
+a b
+1 1
+Direct
+0.0 0.0 0.0 a
+0.5 0.5 0.5 b
+"""
+
+
+def write_sources(path2, levels, phases, name):
+    for case in BladeTDBGen.expand_all_cases(levels, ["CR", "TI"]):
+        for phase in phases:
+            lattice = phase["lattice"]
+            src = path2 / "SQS" / f"{lattice}_2" / lattice
+            src = src / BladeTDBGen._sqs_source_case_name(case["fractions"], case["level"])
+            src.mkdir(parents=True, exist_ok=True)
+            (src / "POSCAR").write_text(POSCAR.format(name=name))
+    return src
+
+
+def test_changed_source_poscar_refreshes_workdir_copy(tmp_path, monkeypatch):
+    levels = [{"level": 1, "compositions": [[0.5, 0.5]]}]
+    phases = [{"lattice": "FCC_A1", "generator_name": "fcc"}]
+    params = {"fmax": 1e-3, "calculator": "cpu"}
+    elements = ["CR", "TI"]
+
+    gen = BladeTDBGen(phases, False, [tmp_path, tmp_path], [elements], 1, skip_existing=True)
+    src = write_sources(tmp_path, levels, phases, "original")
+
+    cases = BladeTDBGen.expand_all_cases(levels, elements)
+    workdir = gen.get_composition_dir(elements)
+    gen.copy_sqs_folders_into_workdir(cases, elements, phases, workdir)
+    dst = workdir / "FCC_A1" / BladeTDBGen.folder_name(elements, cases[0]["fractions"], 1)
+
+    # a finished system: relaxed workdir structure, fitted TDB and provenance
+    (dst / "POSCAR").write_text("relaxed\n")
+    gen.get_tdb_path(elements).write_text("$ fitted\n")
+    gen.write_provenance(elements, gen.provenance(levels, elements, phases, params))
+    assert gen.composition_status(levels, elements, phases, params)[0] == "up_to_date"
+
+    (src / "POSCAR").write_text(POSCAR.format(name="edited"))
+    assert gen.composition_status(levels, elements, phases, params)[0] == "recalc"
+
+    seen = {}
+
+    def run_workflow(**kwargs):
+        seen["POSCAR"] = (dst / "POSCAR").read_text()
+        seen["skip_folders"] = kwargs["skip_folders"]
+
+    monkeypatch.setattr(gen, "run_workflow", run_workflow)
+    gen.run_single_composition(levels, elements, phases, params)
+
+    assert seen["POSCAR"].splitlines()[0] == "edited"
+    assert dst not in seen["skip_folders"]
+
+
+def test_copy_relax_copy_keeps_relaxed_poscar_readable(tmp_path):
+    levels = [{"level": 1, "compositions": [[0.5, 0.5]]}]
+    phases = [{"lattice": "FCC_A1", "generator_name": "fcc"}]
+    elements = ["Cu", "Ni"]
+
+    gen = BladeTDBGen(phases, False, [tmp_path, tmp_path], [elements], 1)
+    for case in BladeTDBGen.expand_all_cases(levels, elements):
+        src = tmp_path / "SQS" / "FCC_A1_2" / "FCC_A1"
+        src = src / BladeTDBGen._sqs_source_case_name(case["fractions"], case["level"])
+        src.mkdir(parents=True, exist_ok=True)
+        (src / "POSCAR").write_text(POSCAR.format(name="sqs"))
+
+    cases = BladeTDBGen.expand_all_cases(levels, elements)
+    workdir = gen.get_composition_dir(elements)
+    gen.copy_sqs_folders_into_workdir(cases, elements, phases, workdir)
+    dst = workdir / "FCC_A1" / BladeTDBGen.folder_name(elements, cases[0]["fractions"], 1)
+
+    BladeRelax.relax_folder(dst, [{"calculator": EMT(), "fmax": 0.5, "steps": 5}])
+    relaxed = (dst / "POSCAR").read_text()
+
+    gen.copy_sqs_folders_into_workdir(cases, elements, phases, workdir)
+
+    assert (dst / "POSCAR").read_text() == relaxed
+    atoms = read(dst / "POSCAR", format="vasp")
+    assert sorted(atoms.get_chemical_symbols()) == ["Cu", "Ni"]
+    assert relaxed.splitlines()[-1].split()[-1] in elements
+
+
+def relaxed_workdir(tmp_path, monkeypatch):
+    levels = [{"level": 1, "compositions": [[0.5, 0.5]]}]
+    phases = [{"lattice": "FCC_A1", "generator_name": "fcc"}]
+    elements = ["CR", "TI"]
+
+    gen = BladeTDBGen(phases, False, [tmp_path, tmp_path], [elements], 1, skip_existing=True)
+    src = write_sources(tmp_path, levels, phases, "original")
+
+    cases = BladeTDBGen.expand_all_cases(levels, elements)
+    workdir = gen.get_composition_dir(elements)
+    gen.copy_sqs_folders_into_workdir(cases, elements, phases, workdir)
+    dst = workdir / "FCC_A1" / BladeTDBGen.folder_name(elements, cases[0]["fractions"], 1)
+    (dst / "POSCAR").write_text("relaxed\n")
+
+    monkeypatch.setattr(gen, "run_workflow", lambda **kwargs: None)
+    return gen, levels, elements, phases, src, dst
+
+
+def test_workdir_without_provenance_is_kept(tmp_path, monkeypatch):
+    gen, levels, elements, phases, _, dst = relaxed_workdir(tmp_path, monkeypatch)
+    params = {"fmax": 1e-3, "calculator": "cpu"}
+
+    assert gen.composition_status(levels, elements, phases, params)[0] == "recalc"
+    gen.run_single_composition(levels, elements, phases, params)
+
+    assert (dst / "POSCAR").read_text() == "relaxed\n"
+
+
+def test_workdir_with_missing_source_is_kept(tmp_path, monkeypatch):
+    gen, levels, elements, phases, src, dst = relaxed_workdir(tmp_path, monkeypatch)
+    params = {"fmax": 1e-3, "calculator": "cpu"}
+
+    gen.get_tdb_path(elements).write_text("$ fitted\n")
+    gen.write_provenance(elements, gen.provenance(levels, elements, phases, params))
+    (src / "POSCAR").unlink()
+
+    assert gen.composition_status(levels, elements, phases, params)[0] == "recalc"
+    gen.run_single_composition(levels, elements, phases, params)
+
+    assert (dst / "POSCAR").read_text() == "relaxed\n"
+
+
+class FailingSqs2tdb:
+    fmax = 1e-3
+    verbose = False
+
+    def _calculate(self, folder):
+        raise RuntimeError("relaxation diverged")
+
+
+def failing_workdir(tmp_path):
+    elements = ["CR", "TI"]
+    cases = [{"level": 1, "fractions": [0.5, 0.5]}]
+    folder = tmp_path / "FCC_A1" / BladeTDBGen.folder_name(elements, cases[0]["fractions"], 1)
+    folder.mkdir(parents=True)
+    (folder / "POSCAR").write_text(POSCAR.format(name="sqs"))
+    return elements, cases, [{"lattice": "FCC_A1"}], folder
+
+
+def test_failure_summary_is_removed_after_a_clean_run(tmp_path):
+    elements, cases, phases, folder = failing_workdir(tmp_path)
+
+    stats = BladeTDBGen.calculate_all_structures(
+        FailingSqs2tdb(), cases, elements, phases, tmp_path
+    )
+    assert stats["failed"] == 1
+    assert (tmp_path / "failures.csv").exists()
+
+    stats = BladeTDBGen.calculate_all_structures(
+        FailingSqs2tdb(), cases, elements, phases, tmp_path, skip_folders={folder}
+    )
+    assert stats["failed"] == 0
+    assert not (tmp_path / "failures.csv").exists()
+
+
+def test_async_retry_runs_in_a_subprocess(tmp_path):
+    elements, cases, phases, folder = failing_workdir(tmp_path)
+    ladder = [{"device": "cpu", "optimizer": "UNKNOWN"}]
+
+    stats = BladeTDBGen.calculate_all_structures(
+        FailingSqs2tdb(), cases, elements, phases, tmp_path, retry=ladder, retry_async=True
+    )
+
+    (outcome,) = stats["failures"]
+    assert outcome["status"] == "failed"
+    assert outcome["first_error"] == "relaxation diverged"
+    assert outcome["attempts"] == 1
+    assert (folder / "retry.json").exists()
+
+
+def test_partial_fit_leaves_excluded_cases_out_of_provenance(tmp_path, monkeypatch):
+    gen, levels, elements, phases, _, dst = relaxed_workdir(tmp_path, monkeypatch)
+    params = {"fmax": 1e-3, "calculator": "cpu"}
+    tdb_path = gen.get_tdb_path(elements)
+
+    def run_workflow(**kwargs):
+        gen.excluded_cases["-".join(elements)] = {f"{dst.parent.name}/{dst.name}"}
+        tdb_path.write_text("$ fitted\n")
+        return tdb_path
+
+    monkeypatch.setattr(gen, "run_workflow", run_workflow)
+    gen.run_single_composition(levels, elements, phases, params)
+
+    assert gen.composition_status(levels, elements, phases, params)[0] == "recalc"
+
+
+def subsystem_workdirs(tmp_path, params):
+    phases = [{"lattice": "FCC_A1", "generator_name": "fcc"}]
+    gen = BladeTDBGen(phases, False, [tmp_path, tmp_path], [["CR", "TI", "V"]], 1)
+    case = {"level": 1, "fractions": [0.5, 0.5, 0.0]}
+
+    sub_name = BladeTDBGen.folder_name(["CR", "TI"], [0.5, 0.5], 1)
+    src = gen.get_composition_dir(["CR", "TI"]) / "FCC_A1" / sub_name
+    src.mkdir(parents=True)
+    for name in ["POSCAR", "energy", "CONTCAR", "str.out", "force.out", "stress.out"]:
+        (src / name).write_text(f"binary {name}\n")
+    provenance = {
+        "calculation": BladeTDBGen.calculation_settings(params),
+        "cases": {f"FCC_A1/{sub_name}": "fingerprint"},
+    }
+    gen.get_provenance_path(["CR", "TI"]).write_text(json.dumps(provenance))
+
+    workdir = gen.get_composition_dir(["CR", "TI", "V"])
+    dst = workdir / "FCC_A1" / BladeTDBGen.folder_name(["CR", "TI", "V"], case["fractions"], 1)
+    dst.mkdir(parents=True)
+    (dst / "POSCAR").write_text("ternary POSCAR\n")
+    return gen, [case], phases, workdir, dst
+
+
+def test_subsystem_cases_are_reused_only_with_the_same_settings(tmp_path, monkeypatch):
+    params = {"fmax": 1e-3, "calculator": "cpu"}
+    gen, cases, phases, workdir, dst = subsystem_workdirs(tmp_path, params)
+    elements = ["CR", "TI", "V"]
+
+    other = {**params, "fmax": 1e-2}
+    assert gen.reuse_subsystem_cases(cases, elements, phases, workdir, other) == set()
+    assert (dst / "POSCAR").read_text() == "ternary POSCAR\n"
+
+    assert gen.reuse_subsystem_cases(cases, elements, phases, workdir, params) == {dst}
+    assert (dst / "energy").read_text() == "binary energy\n"
+
+    # an already reused folder is not copied again
+    copies = []
+    monkeypatch.setattr(shutil, "copy2", lambda *args: copies.append(args))
+    assert gen.reuse_subsystem_cases(cases, elements, phases, workdir, params) == {dst}
+    assert copies == []
+
+
+def test_native_fit_variants_use_their_own_terms(tmp_path, binary_lattice):
+    levels = [
+        {"level": 0, "compositions": [[1.0]]},
+        {"level": 1, "compositions": [[0.5, 0.5]]},
+        {"level": 2, "compositions": [[0.75, 0.25]]},
+    ]
+    phases = [{"lattice": "FCC_A1", "generator_name": "fcc"}]
+    elements = ["CR", "TI"]
+
+    gen = BladeTDBGen(phases, False, [tmp_path, tmp_path], [elements], 1)
+    workdir = gen.get_composition_dir(elements)
+    binary_lattice(workdir / "FCC_A1", elements, BladeTDBGen.folder_name)
+    cases = BladeTDBGen.expand_all_cases(levels, elements)
+    fit_cases = [case for case in cases if not BladeTDBGen.is_pure_endmember(case["fractions"])]
+
+    params = {"fitter": "native", "bv": 1e-9}
+    variants = {"l1": {**params, "terms": None}, "l0": {**params, "terms": "1,0\n2,0\n"}}
+    fitted = {
+        name: BladeTDBGen.read_interaction_parameters(
+            gen.fit_variant(fit_cases, elements, phases, workdir, levels, variant, name)
+        )
+        for name, variant in variants.items()
+    }
+
+    assert ("FCC_A1", (("CR", "TI"),), 1) in fitted["l1"]
+    assert ("FCC_A1", (("CR", "TI"),), 1) not in fitted["l0"]
+    assert fitted["l1"][("FCC_A1", (("CR", "TI"),), 0)] == pytest.approx(
+        -0.2 * 96485.33212, rel=1e-4
+    )
+
+
+SUBLATTICE_TDB = """ELEMENT VA VACUUM 0 0 0 !
+ELEMENT B BETA_RHOMBO_B 0 0 0 !
+ELEMENT CR BCC_A2 0 0 0 !
+ELEMENT TI HCP_A3 0 0 0 !
+PHASE HEDB1 % 2 1 2 !
+CONSTITUENT HEDB1 :CR,TI:B: !
+PHASE BORIDE % 2 2 1 !
+CONSTITUENT BORIDE :B:CR,TI: !
+PARAMETER L(HEDB1,CR,TI:B;0) 298.15 -4000; 6000 N !
+PARAMETER L(BORIDE,B:CR,TI;0) 298.15 1000; 6000 N !
+PARAMETER L(BORIDE,B:CR,TI;1) 298.15 -2000; 6000 N !
+"""
+
+
+def test_interaction_parameters_keep_every_sublattice(tmp_path):
+    tdb_path = tmp_path / "B_CR_TI.tdb"
+    tdb_path.write_text(SUBLATTICE_TDB)
+
+    parameters = BladeTDBGen.read_interaction_parameters(tdb_path)
+    assert parameters == {
+        ("HEDB1", (("CR", "TI"), ("B",)), 0): pytest.approx(-4000.0),
+        ("BORIDE", (("B",), ("CR", "TI")), 0): pytest.approx(1000.0),
+        ("BORIDE", (("B",), ("CR", "TI")), 1): pytest.approx(-2000.0),
+    }
+
+    energies = BladeTDBGen.predicted_excess_energies(parameters, ["CR", "TI"], n_div=4)
+    assert energies["HEDB1"] == pytest.approx([0.0, -750.0, -1000.0, -750.0, 0.0])
+    assert energies["BORIDE"] == pytest.approx([0.0, 375.0, 250.0, 0.0, 0.0])
+
+
+FIT_TDB = """ELEMENT CR BCC_A2 0 0 0 !
+ELEMENT TI HCP_A3 0 0 0 !
+PHASE FCC_A1 % 1 1 !
+CONSTITUENT FCC_A1 :CR,TI: !
+PARAMETER L(FCC_A1,CR,TI;0) 298.15 {value}; 6000 N !
+"""
+
+
+def test_adaptive_workflow_keeps_every_level_and_records_the_last_fit(tmp_path, monkeypatch):
+    levels = [
+        {"level": 0, "compositions": [[1.0]]},
+        {"level": 1, "compositions": [[0.5, 0.5]]},
+        {"level": 2, "compositions": [[0.75, 0.25]]},
+        {"level": 3, "compositions": [[0.25, 0.75]]},
+    ]
+    phases = [{"lattice": "FCC_A1", "generator_name": "fcc"}]
+    elements = ["CR", "TI"]
+    params = {"t_min": 298.15, "calculator": "cpu"}
+
+    gen = BladeTDBGen(phases, False, [tmp_path, tmp_path], [elements], 1)
+    tdb_path = gen.get_tdb_path(elements)
+
+    def fit_tdb(**kwargs):
+        level = max(entry["level"] for entry in kwargs["sqsgen_levels"])
+        if level == levels[-1]["level"]:
+            # a failed fit that leaves a broken TDB behind
+            tdb_path.write_text("$ incomplete\n")
+            return None
+        tdb_path.write_text(FIT_TDB.format(value=-10000.0 * level))
+        return tdb_path
+
+    monkeypatch.setattr(gen, "fit_tdb", fit_tdb)
+    assert gen.run_adaptive_workflow(levels, elements, phases, params) is None
+
+    report = json.loads((gen.get_composition_dir(elements) / "adaptive_levels.json").read_text())
+    assert report["final_level"] == levels[-2]["level"]
+    assert [entry["tdb"] for entry in report["history"]] == [
+        "CR_TI_level1.tdb",
+        "CR_TI_level2.tdb",
+        None,
+    ]
+
+    level_values = {
+        level: BladeTDBGen.read_interaction_parameters(
+            tdb_path.with_name(f"CR_TI_level{level}.tdb")
+        )
+        for level in (1, 2)
+    }
+    assert level_values[1][("FCC_A1", (("CR", "TI"),), 0)] == pytest.approx(-10000.0)
+    assert level_values[2][("FCC_A1", (("CR", "TI"),), 0)] == pytest.approx(-20000.0)
+    assert BladeTDBGen.read_interaction_parameters(tdb_path) == level_values[2]
+
+    provenance = json.loads(gen.get_provenance_path(elements).read_text())
+    assert provenance == gen.provenance(levels[:3], elements, phases, params)
+
+
+FCC_POSCAR = """sqs
+1.0
+3.7 0.0 0.0
+0.0 3.7 0.0
+0.0 0.0 3.7
+{species}
+{counts}
+Direct
+0.0 0.0 0.0 {labels[0]}
+0.0 0.5 0.5 {labels[1]}
+0.5 0.0 0.5 {labels[2]}
+0.5 0.5 0.0 {labels[3]}
+"""
+
+
+class CountingEMT(EMT):
+    calls = 0
+
+    def calculate(self, *args, **kwargs):
+        CountingEMT.calls += 1
+        super().calculate(*args, **kwargs)
+
+
+def test_screening_batches_structures_without_copying_into_workdirs(tmp_path):
+    levels = [{"level": 0, "compositions": [[1.0]]}, {"level": 1, "compositions": [[0.5, 0.5]]}]
+    phases = [{"lattice": "FCC_A1", "generator_name": "fcc"}]
+    systems = [["Cu", "Ni"], ["Cu", "Al"]]
+
+    gen = BladeTDBGen(phases, False, [tmp_path, tmp_path], systems, 1)
+    for case in BladeTDBGen.expand_all_cases(levels, ["Cu", "Ni"]):
+        labels = ["a" if i < round(4 * case["fractions"][0]) else "b" for i in range(4)]
+        species = sorted(set(labels))
+        src = tmp_path / "SQS" / "FCC_A1_2" / "FCC_A1"
+        src = src / BladeTDBGen._sqs_source_case_name(case["fractions"], case["level"])
+        src.mkdir(parents=True)
+        (src / "POSCAR").write_text(
+            FCC_POSCAR.format(
+                species=" ".join(species),
+                counts=" ".join(str(labels.count(sp)) for sp in species),
+                labels=labels,
+            )
+        )
+
+    CountingEMT.calls = 0
+    ranking = gen.screen_compositions(levels, phases, {"calculator": CountingEMT()})
+
+    # Cu is shared by both systems and evaluated once
+    assert CountingEMT.calls == len({"Cu", "Ni", "Al", "CuNi", "CuAl"})
+    assert sorted(ranking["system"]) == ["Cu-Al", "Cu-Ni"]
+    assert (ranking["status"] == "ok").all()
+    assert not any(gen.get_composition_dir(elements).exists() for elements in systems)
+
+    results = pd.read_parquet(tmp_path / "screening.parquet")
+    cu_ni = results[(results["system"] == "Cu-Ni") & (results["level"] == 1)].iloc[0]
+    atoms = Atoms(
+        ["Cu", "Cu", "Ni", "Ni"],
+        scaled_positions=[[0.0, 0.0, 0.0], [0.0, 0.5, 0.5], [0.5, 0.0, 0.5], [0.5, 0.5, 0.0]],
+        cell=[3.7, 3.7, 3.7],
+        pbc=True,
+    )
+    atoms.calc = EMT()
+    assert cu_ni["energy_per_atom"] == pytest.approx(atoms.get_potential_energy() / len(atoms))